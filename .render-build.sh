@@ -17,6 +17,10 @@ python manage.py makemigrations
 echo "Running migrations..."
 python manage.py migrate --noinput
 
+# Table of the shared database cache (CACHES in settings.py); does nothing for other backends
+echo "Creating cache table..."
+python manage.py createcachetable
+
 # Create superuser if it doesn't exist
 echo "Creating superuser..."
 python manage.py shell -c "
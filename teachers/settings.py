@@ -4,6 +4,7 @@ Django settings for teachers project.
 
 import os
 from pathlib import Path
+from .database import database_config
 # Temporarily disabled dotenv loading
 # from dotenv import load_dotenv
 # load_dotenv()
@@ -62,16 +63,27 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'teachers_app.middleware.BillingPipelineMiddleware',
 ]
 
 ROOT_URLCONF = 'teachers.urls'
 
+# Compiled templates are kept in memory by the cached loader, so a render does not re-read
+# and re-parse the template files. It stays on under DEBUG too (the autoreloader clears it
+# when a template changes); TEMPLATE_CACHE=False turns it off.
+template_loaders = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+if os.getenv('TEMPLATE_CACHE', 'True') == 'True':
+    template_loaders = [('django.template.loaders.cached.Loader', template_loaders)]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': template_loaders,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -84,16 +96,14 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'teachers.wsgi.application'
 
-# Database
+# Database: DATABASE_URL (PostgreSQL or SQLite), db.sqlite3 without it; see teachers/database.py
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': database_config(BASE_DIR / 'db.sqlite3'),
 }
 
 # Create database directory if it doesn't exist
-os.makedirs(os.path.dirname(DATABASES['default']['NAME']), exist_ok=True)
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    os.makedirs(os.path.dirname(DATABASES['default']['NAME']), exist_ok=True)
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -148,27 +158,72 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Cache (salary calculations and report fragments, see SalaryCacheService and FragmentCacheService).
+# Invalidations must reach every worker, so without DEBUG the default is the database cache,
+# shared by all gunicorn workers (.render-build.sh runs createcachetable). LocMem is per process
+# and only the default for development and tests. Other shared backends, e.g.
+# CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache CACHE_LOCATION=/var/tmp/teachers_cache
+if DEBUG:
+    _default_cache = ('django.core.cache.backends.locmem.LocMemCache', 'teachers-cache')
+else:
+    _default_cache = ('django.core.cache.backends.db.DatabaseCache', 'teachers_cache')
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', _default_cache[0]),
+        'LOCATION': os.environ.get('CACHE_LOCATION', _default_cache[1]),
+    }
+}
+SALARY_CACHE_TIMEOUT = int(os.environ.get('SALARY_CACHE_TIMEOUT', 60 * 60 * 24))
+# Report table fragments ({% cache %}) are keyed by a version stamp (see FragmentCacheService);
+# the timeout only bounds how long a fragment missed by the invalidation can be shown
+FRAGMENT_CACHE_TIMEOUT = int(os.environ.get('FRAGMENT_CACHE_TIMEOUT', 60 * 60 * 24))
+
+# How old a tap queued by an offline kiosk may be when it is synced (clock_batch), in seconds
+CLOCK_OFFLINE_WINDOW = int(os.environ.get('CLOCK_OFFLINE_WINDOW', 60 * 60 * 24 * 7))
+
+# When the work sessions recorded in a request are billed (see BillingPipeline):
+# 'request' at the end of the request, 'job' in a queued background job (run_jobs),
+# 'month_close' only by the month-end bulk billing
+BILLING_FLUSH = os.environ.get('BILLING_FLUSH', 'request')
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Logging configuration
+# LOG_PROFILE=development logs everything at DEBUG (the default when DEBUG is on);
+# LOG_PROFILE=production logs the app at INFO and everything else at WARNING, so
+# per-save debug lines (WorkSession.save) are never formatted. LOG_LEVEL overrides the app level.
+LOG_PROFILE = os.getenv('LOG_PROFILE', 'development' if DEBUG else 'production')
+LOGGING_PROFILES = {
+    'development': {'root': 'DEBUG', 'app': 'DEBUG'},
+    'production': {'root': 'WARNING', 'app': 'INFO'},
+}
+_log_levels = LOGGING_PROFILES.get(LOG_PROFILE, LOGGING_PROFILES['production'])
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'formatters': {
+        'verbose': {
+            'format': '{asctime} {levelname} {name} {process:d} {message}',
+            'style': '{',
+        },
+    },
     'handlers': {
         'console': {
             'class': 'logging.StreamHandler',
+            'formatter': 'verbose',
         },
     },
     'root': {
         'handlers': ['console'],
-        'level': 'DEBUG',
+        'level': _log_levels['root'],
     },
     'loggers': {
         'teachers_app': {
             'handlers': ['console'],
-            'level': 'DEBUG',
-            'propagate': True,
+            'level': os.getenv('LOG_LEVEL', _log_levels['app']),
+            'propagate': False,
         },
     },
 }
@@ -1,6 +1,7 @@
 from django.contrib import admin
-from .models import Teacher, Inspector, Student, Task, WorkSession, SuperUser, CustomUser
-from .billing_models import Bill, BillItem
+from .models import Teacher, Inspector, Student, Task, WorkSession, SuperUser, CustomUser, MonthlyTeacherTotals, MonthlyStudentTotals
+from .billing_models import Bill, BillItem, LedgerEntry, StudentBalance
+from .job_models import BackgroundJob
 from decimal import Decimal
 
 @admin.register(Task)
@@ -74,3 +75,48 @@ class BillItemAdmin(admin.ModelAdmin):
     def get_queryset(self, request):
         queryset = super().get_queryset(request)
         return queryset.select_related('bill', 'bill__student__user')
+
+
+@admin.register(MonthlyTeacherTotals)
+class MonthlyTeacherTotalsAdmin(admin.ModelAdmin):
+    list_display = ('teacher', 'month', 'session_count', 'hours', 'teacher_payment', 'updated_at')
+    list_filter = ('month',)
+    search_fields = ('teacher__user__username',)
+    list_select_related = ('teacher__user',)
+
+@admin.register(MonthlyStudentTotals)
+class MonthlyStudentTotalsAdmin(admin.ModelAdmin):
+    list_display = ('student', 'month', 'session_count', 'hours', 'student_billing', 'updated_at')
+    list_filter = ('month',)
+    search_fields = ('student__user__username',)
+    list_select_related = ('student__user',)
+
+@admin.register(LedgerEntry)
+class LedgerEntryAdmin(admin.ModelAdmin):
+    list_display = ('student', 'kind', 'amount', 'balance_after', 'bill', 'note', 'created_at')
+    list_filter = ('kind',)
+    search_fields = ('student__user__username',)
+    list_select_related = ('student__user', 'bill')
+
+    # The ledger is append-only: entries are written by LedgerService only
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+@admin.register(StudentBalance)
+class StudentBalanceAdmin(admin.ModelAdmin):
+    list_display = ('student', 'balance', 'updated_at')
+    search_fields = ('student__user__username',)
+    list_select_related = ('student__user',)
+    readonly_fields = ('student', 'balance', 'updated_at')
+
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'status', 'progress_done', 'progress_total', 'attempts', 'created_at', 'finished_at')
+    list_filter = ('kind', 'status')
+    readonly_fields = ('started_at', 'heartbeat_at', 'finished_at', 'locked_by')
@@ -0,0 +1,242 @@
+"""
+Read-only JSON API for integrations, plus bulk creation of work sessions.
+
+Every list is keyset-paginated (KeysetPaginator cursors in ?after= / ?before=, page size
+in ?limit=) and takes a sparse fieldset in ?fields= (see serializers.py). Responses are
+{"results": [...], "next": cursor or null, "previous": cursor or null}. Authentication is
+the regular session login.
+"""
+import json
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET, require_http_methods
+from .billing_models import Bill
+from .imports import Lookups, insert_work_sessions, parse_row
+from .models import Teacher, Student, WorkSession, SalaryReport
+from .pagination import KeysetPaginator, InvalidCursor
+from .serializers import (
+    UnknownField, BillSerializer, SalaryReportSerializer, StudentSerializer, TeacherSerializer, WorkSessionSerializer
+)
+from .services import BulkSalaryService
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+# Sessions accepted by one bulk create request
+MAX_BULK_SESSIONS = 1000
+# Import columns that set pay and the salary month directly; superusers only, as in the CSV import
+SUPERUSER_COLUMNS = ('hourly_rate', 'created_at')
+
+
+def _error(message, status, **extra):
+    return JsonResponse({'error': message, **extra}, status=status)
+
+
+def _int_or_none(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _filter_ids(request, queryset, *names):
+    """Apply ?<name>=<id> filters; raises ValueError for ids that are not integers"""
+    for name in names:
+        value = request.GET.get(name)
+        if value in (None, ''):
+            continue
+        if _int_or_none(value) is None:
+            raise ValueError(f"{name} must be an id")
+        queryset = queryset.filter(**{f'{name}_id': int(value)})
+    return queryset
+
+
+def _list_response(request, queryset, serializer_class, ordering, refresh=None):
+    """One keyset page of the queryset in the requested fieldset"""
+    try:
+        serializer = serializer_class(request.GET.get('fields'))
+    except UnknownField as e:
+        return _error(str(e), 400)
+    limit = _int_or_none(request.GET.get('limit', PAGE_SIZE))
+    if limit is None or not 1 <= limit <= MAX_PAGE_SIZE:
+        return _error(f"limit must be between 1 and {MAX_PAGE_SIZE}", 400)
+
+    paginator = KeysetPaginator(serializer.prepare(queryset), ordering=ordering, page_size=limit)
+    try:
+        page = paginator.page(after=request.GET.get('after'), before=request.GET.get('before'))
+    except InvalidCursor as e:
+        return _error(str(e), 400)
+    items = refresh(page.items) if refresh else page.items
+    return JsonResponse({
+        'results': serializer.many(items),
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    })
+
+
+def _own_teacher_id(user):
+    return Teacher.objects.filter(user=user).values_list('id', flat=True).first()
+
+
+@require_http_methods(['GET', 'POST'])
+def work_sessions(request):
+    """
+    GET: live work sessions, newest first; inspectors see all of them (?teacher=, ?student=,
+    ?task= filter by id), teachers their own.
+    POST: bulk create for superusers, and for teachers their own sessions; see _create_work_sessions.
+    """
+    user = request.user
+    if not user.is_authenticated:
+        return _error('Autenticação necessária.', 401)
+
+    if request.method == 'POST':
+        # Inspectors are view-only: writes are for superusers and for teachers' own sessions
+        if user.is_superuser:
+            return _create_work_sessions(request, None)
+        own_teacher_id = _own_teacher_id(user) if user.is_teacher else None
+        if own_teacher_id is None:
+            return _error('Sem permissão para registrar sessões de trabalho.', 403)
+        return _create_work_sessions(request, own_teacher_id)
+
+    own_teacher_id = None
+    if not user.is_inspector_effective:
+        own_teacher_id = _own_teacher_id(user) if user.is_teacher else None
+        if own_teacher_id is None:
+            return _error('Sem permissão para consultar sessões de trabalho.', 403)
+
+    sessions = WorkSession.objects.filter(is_deleted=False)
+    if own_teacher_id is not None:
+        sessions = sessions.filter(teacher_id=own_teacher_id)
+    try:
+        sessions = _filter_ids(request, sessions, 'teacher', 'student', 'task')
+    except ValueError as e:
+        return _error(str(e), 400)
+    return _list_response(request, sessions, WorkSessionSerializer, ('-created_at', '-id'))
+
+
+def _create_work_sessions(request, own_teacher_id):
+    """
+    Create many work sessions in one request: a JSON list of objects, or {"sessions": [...]},
+    with the columns of the CSV import (teacher and student by username, task by id or name,
+    entry_type, hours / clock_in, clock_out / start_time, end_time, and for superusers
+    optionally created_at and hourly_rate). Teachers may leave teacher out and can only
+    create their own sessions, at the task's rate, like the record work form.
+
+    All or nothing: any invalid session gets a 400 listing {"index", "error"} for each of
+    them. Otherwise the sessions are inserted with one bulk insert (imports.insert_work_sessions)
+    and returned with 201 in the ?fields= fieldset.
+    """
+    try:
+        data = json.loads(request.body or b'null')
+    except ValueError:
+        return _error('Corpo JSON inválido.', 400)
+    if isinstance(data, dict):
+        data = data.get('sessions')
+    if not isinstance(data, list) or not data:
+        return _error('Envie uma lista de sessões.', 400)
+    if len(data) > MAX_BULK_SESSIONS:
+        return _error(f'No máximo {MAX_BULK_SESSIONS} sessões por pedido.', 400)
+    try:
+        serializer = WorkSessionSerializer(request.GET.get('fields'))
+    except UnknownField as e:
+        return _error(str(e), 400)
+
+    lookups = Lookups()
+    own_username = None
+    if own_teacher_id is not None:
+        own_username = next(name for name, pk in lookups.teachers.items() if pk == own_teacher_id)
+    entries, errors = [], []
+    for index, item in enumerate(data):
+        if not isinstance(item, dict):
+            errors.append({'index': index, 'error': 'expected an object'})
+            continue
+        row = {key: '' if value is None else str(value) for key, value in item.items()}
+        if own_username is not None:
+            if row.setdefault('teacher', own_username) != own_username:
+                errors.append({'index': index, 'error': 'teachers can only create their own sessions'})
+                continue
+            restricted = [column for column in SUPERUSER_COLUMNS if column in row]
+            if restricted:
+                errors.append({'index': index, 'error': f"only superusers can set {', '.join(restricted)}"})
+                continue
+        try:
+            entries.append(parse_row(row, lookups))
+        except ValueError as e:
+            errors.append({'index': index, 'error': str(e)})
+    if errors:
+        return _error('Sessões inválidas; nenhuma foi criada.', 400, errors=errors)
+
+    insert_work_sessions(entries, lookups)
+    from .billing_services import StudentBillingService
+    for entry in entries:
+        if entry.student_id:
+            # Queued, and billed together at the end of the request (BillingPipelineMiddleware)
+            StudentBillingService.create_bill_item_for_work_session(entry)
+
+    created = serializer.prepare(WorkSession.objects.filter(pk__in=[entry.pk for entry in entries])).order_by('id')
+    return JsonResponse({'results': serializer.many(created)}, status=201)
+
+
+@require_GET
+def teachers(request):
+    """Teachers by id; inspectors only"""
+    if not request.user.is_authenticated:
+        return _error('Autenticação necessária.', 401)
+    if not request.user.is_inspector_effective:
+        return _error('Sem permissão para consultar professores.', 403)
+    return _list_response(request, Teacher.objects.all(), TeacherSerializer, ('id',))
+
+
+@require_GET
+def students(request):
+    """Students by id; inspectors and teachers (who pick them when recording work). ?active=1 for active ones"""
+    user = request.user
+    if not user.is_authenticated:
+        return _error('Autenticação necessária.', 401)
+    if not (user.is_inspector_effective or user.is_teacher):
+        return _error('Sem permissão para consultar clientes.', 403)
+    queryset = Student.objects.all()
+    if request.GET.get('active') in ('1', 'true'):
+        queryset = queryset.filter(is_active=True)
+    return _list_response(request, queryset, StudentSerializer, ('id',))
+
+
+@require_GET
+def salary_reports(request):
+    """
+    Salary report summaries, newest period first: inspectors see all (?teacher= filters),
+    teachers their own. Missing or stale totals are refreshed for the page, as on the list page.
+    """
+    user = request.user
+    if not user.is_authenticated:
+        return _error('Autenticação necessária.', 401)
+    reports = SalaryReport.objects.filter(is_deleted=False)
+    if not user.is_inspector_effective:
+        own_teacher_id = _own_teacher_id(user) if user.is_teacher else None
+        if own_teacher_id is None:
+            return _error('Sem permissão para consultar relatórios.', 403)
+        reports = reports.filter(teacher_id=own_teacher_id)
+    try:
+        reports = _filter_ids(request, reports, 'teacher')
+    except ValueError as e:
+        return _error(str(e), 400)
+    return _list_response(
+        request, reports, SalaryReportSerializer, ('-start_date', '-id'), refresh=BulkSalaryService.refresh_report_totals
+    )
+
+
+@require_GET
+def bills(request):
+    """Bills, newest month first: inspectors see all (?student= filters), students their own"""
+    user = request.user
+    if not user.is_authenticated:
+        return _error('Autenticação necessária.', 401)
+    queryset = Bill.objects.all()
+    if not user.is_inspector_effective:
+        own_student_id = Student.objects.filter(user=user).values_list('id', flat=True).first()
+        if own_student_id is None:
+            return _error('Sem permissão para consultar faturas.', 403)
+        queryset = queryset.filter(student_id=own_student_id)
+    try:
+        queryset = _filter_ids(request, queryset, 'student')
+    except ValueError as e:
+        return _error(str(e), 400)
+    return _list_response(request, queryset, BillSerializer, ('-month', '-id'))
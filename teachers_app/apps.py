@@ -3,4 +3,7 @@ from django.apps import AppConfig
 class TeachersAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'teachers_app'
-    verbose_name = 'Teachers'
\ No newline at end of file
+    verbose_name = 'Teachers'
+
+    def ready(self):
+        from . import signals  # noqa: F401
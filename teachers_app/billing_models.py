@@ -1,7 +1,10 @@
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Cast, Coalesce, Round
 from decimal import Decimal
 from django.utils import timezone
-from .models import Student
+from .models import Student, Task
+from .calculations import to_hundredths
 
 # Bill Model
 class Bill(models.Model):
@@ -28,6 +31,67 @@ class BillItem(models.Model):
     service_price_at_billing = models.DecimalField(max_digits=20, decimal_places=4)
     quantity = models.DecimalField(max_digits=20, decimal_places=4)
     amount = models.DecimalField(max_digits=20, decimal_places=4)
-    
+    # Set on items generated from the month's work sessions (one per task); manual service items leave it empty
+    task = models.ForeignKey(Task, on_delete=models.SET_NULL, null=True, blank=True, related_name='bill_items')
+    # amount rounded to whole cents, kept in sync by save(); bulk writers set it themselves
+    amount_cents = models.BigIntegerField(null=True, blank=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def save(self, *args, **kwargs):
+        self.amount_cents = to_hundredths(self.amount)
+        super().save(*args, **kwargs)
+
+    @staticmethod
+    def cents_expression():
+        """amount_cents, or amount converted in SQL for rows written in bulk before the backfill"""
+        return Coalesce(
+            F('amount_cents'),
+            Cast(Round(F('amount') * 100), models.BigIntegerField()),
+            output_field=models.BigIntegerField()
+        )
+
     def __str__(self):
         return f"{self.service_name} - ${self.amount}"
+
+
+# LedgerEntry Model - Append-only history of what each student was charged and paid
+class LedgerEntry(models.Model):
+    KIND_CHOICES = [
+        ('charge', 'Cobrança'),
+        ('payment', 'Pagamento'),
+        ('adjustment', 'Ajuste'),
+    ]
+
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='ledger_entries')
+    bill = models.ForeignKey(Bill, on_delete=models.SET_NULL, null=True, blank=True, related_name='ledger_entries')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    # Positive amounts add to what the student owes (bill totals going up), negative ones reduce it
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    balance_after = models.DecimalField(max_digits=12, decimal_places=2)
+    note = models.CharField(max_length=200, blank=True)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['student', 'id'], name='ledger_student_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.student} - {self.get_kind_display()} {self.amount} (saldo {self.balance_after})"
+
+
+# StudentBalance Model - Running balance of a student's ledger, one indexed row per student
+class StudentBalance(models.Model):
+    student = models.OneToOneField(Student, on_delete=models.CASCADE, primary_key=True, related_name='ledger_balance')
+    balance = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # "Who owes money" lists: balances above zero, largest first
+            models.Index(fields=['balance'], name='studentbalance_balance_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.student} - {self.balance}"
@@ -1,87 +1,616 @@
 from django.db import models
+from django.db.models import Count, F, Sum
 from decimal import Decimal
 from datetime import date
-from django.db import transaction
-from .billing_models import Bill, BillItem
+from contextlib import contextmanager
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from dateutil.relativedelta import relativedelta
+from .models import WorkSession
+from .billing_models import Bill, BillItem, LedgerEntry, StudentBalance
+from .services import FragmentCacheService, annotate_session_cents, cents_to_decimal
+from .calculations import to_hundredths
+import threading
+import time
 
 class StudentBillingService:
+    @staticmethod
+    def get_month_work_sessions(student, month):
+        """
+        Get a student's non-deleted work sessions billed in the month containing `month`
+        (by created_at, clock_in or start_time depending on the entry type), the sessions
+        BulkBillingService bills.
+        """
+        month_start = date(month.year, month.month, 1)
+        return WorkSession.objects.filter(
+            student=student,
+            effective_date__gte=month_start,
+            effective_date__lt=month_start + relativedelta(months=1),
+            is_deleted=False
+        )
+
     @staticmethod
     def calculate_student_balance(student):
-        """Calculate the current balance for a student"""
-        # This will be implemented when we have the billing models
-        return Decimal('0.00')
+        """Amount the student owes, read from their ledger balance (see LedgerService)"""
+        return LedgerService.balance(student)
 
     @staticmethod
     def get_student_bills(student):
-        """Get all bills for a student"""
-        # This will be implemented when we have the billing models
-        return []
+        """All bills for a student, newest month first"""
+        return Bill.objects.filter(student=student).order_by('-month')
 
     @staticmethod
     def create_bill_item_for_work_session(work_session):
         """
-        Create a BillItem for a WorkSession if a student is associated. Finds or creates the Bill for the student for the current month.
-        Updates the Bill's total_amount.
+        Bill a work session: bring the task item and total of its student's bill for the
+        session's billing month in line with that month's sessions (see BillingPipeline).
+
+        Inside a request (BillingPipelineMiddleware) the session is only queued, and the
+        request's sessions are billed together once the response is ready; None is returned.
+        Elsewhere the session is billed right away and its task's BillItem is returned.
+        Sessions without a student or without hours yet (open clock sessions) are not
+        billed, and free tasks get no item, so both return None.
         """
-        import logging
-        logger = logging.getLogger(__name__)
-        
-        # Log the incoming work session data
-        logger.debug(f"Processing work session: {work_session.task.name}, price: {work_session.task.price}, hours: {work_session.stored_hours}")
-        
-        # Only create bill item if we have a student AND stored_hours is not None
-        if work_session.student and work_session.stored_hours is not None:
-            # Get task price and stored hours
-            service_price = work_session.task.price
-            quantity = work_session.stored_hours
-            
-            # Calculate bill amount (0 for free tasks)
-            amount = service_price * quantity if service_price > 0 else Decimal('0.00')
-            logger.debug(f"Calculated bill amount: {amount} (type: {type(amount)})")
-            
-            # Skip bill item creation for free tasks
-            if amount == 0 or amount == Decimal('0.00'):
-                logger.debug("Free task - skipping bill item creation")
-                return None
-            
-            # Determine the billing month (first day of the session's month)
-            session_date = work_session.created_at.date() if work_session.created_at else date.today()
-            
-            # Rest of the bill item creation logic...
-            
-        # If no student or not clocked out yet, just return None
-        logger.debug("No bill item created - either no student or hours not calculated yet")
-        return None
-        billing_month = session_date.replace(day=1)
-        
-        # Find or create the Bill for this student and month
-        bill, created = Bill.objects.get_or_create(
-            student=work_session.student,
-            month=billing_month,
-            defaults={
-                'total_amount': 0,
+        pipeline = BillingPipeline.current()
+        if pipeline is not None:
+            pipeline.add(work_session)
+            return None
+
+        pipeline = BillingPipeline()
+        key = pipeline.add(work_session)
+        if key is None:
+            return None
+        pipeline.flush()
+        return BillItem.objects.filter(
+            bill__student_id=key[0], bill__month=key[1], task_id=work_session.task_id
+        ).select_related('bill').first()
+
+
+class BillingPipeline:
+    """
+    Work sessions waiting to be billed, grouped by student and billing month.
+
+    Billing a student-month runs BulkBillingService.apply with the 'sync' action: the
+    bill is created if missing (get-or-create semantics), and its task items and total
+    are recomputed from the month's sessions with bulk_create/bulk_update. A flush
+    therefore costs the same handful of queries for one session or thousands, and
+    billing a session twice changes nothing. Paid bills are left alone.
+
+    BillingPipelineMiddleware opens one pipeline per request and closes it after the
+    view, which flushes it, queues a background job or leaves the month to month-end
+    billing depending on settings.BILLING_FLUSH ('request', 'job' or 'month_close').
+    """
+    _local = threading.local()
+
+    def __init__(self):
+        self.pending = set()  # {(student_id, month_start)}
+
+    @classmethod
+    def current(cls):
+        """The pipeline collecting this thread's sessions, or None"""
+        return getattr(cls._local, 'pipeline', None)
+
+    @classmethod
+    @contextmanager
+    def collect(cls):
+        """Collect the sessions billed inside the block and close() the pipeline when it succeeds"""
+        previous = cls.current()
+        pipeline = cls._local.pipeline = cls()
+        try:
+            yield pipeline
+        finally:
+            cls._local.pipeline = previous
+        pipeline.close()
+
+    def add(self, work_session):
+        """Queue the session's student-month; returns the (student_id, month_start) key or None if not billable"""
+        if not work_session.student_id or work_session.stored_hours is None or work_session.is_deleted:
+            return None
+        if work_session.effective_month is None:
+            work_session.set_effective_date()
+        key = (work_session.student_id, work_session.effective_month)
+        self.pending.add(key)
+        return key
+
+    def by_month(self):
+        """Pending student ids per billing month"""
+        months = {}
+        for student_id, month_start in self.pending:
+            months.setdefault(month_start, set()).add(student_id)
+        return dict(sorted(months.items()))
+
+    @staticmethod
+    def bills(month_start, student_ids):
+        """{student_id: Bill} for just these students, instead of the whole month"""
+        return {bill.student_id: bill for bill in Bill.objects.filter(month=month_start, student_id__in=student_ids)}
+
+    def flush(self):
+        """Bill every pending student-month now; returns {month_start: (results, stats)}"""
+        results = {}
+        for month_start, student_ids in self.by_month().items():
+            actions = {student_id: 'sync' for student_id in student_ids}
+            try:
+                results[month_start] = BulkBillingService.apply(month_start, actions, bills=self.bills(month_start, student_ids))
+            except IntegrityError:
+                # A concurrent flush created one of the bills first; bill it as an update
+                results[month_start] = BulkBillingService.apply(month_start, actions, bills=self.bills(month_start, student_ids))
+        self.pending.clear()
+        return results
+
+    def enqueue(self, created_by=None):
+        """Hand the pending student-months to background 'bill_students' jobs, one per month"""
+        from .job_services import JobService
+        jobs = [
+            JobService.enqueue(
+                'bill_students', month_start.year, month_start.month,
+                {student_id: 'sync' for student_id in student_ids}, created_by=created_by
+            )
+            for month_start, student_ids in self.by_month().items()
+        ]
+        self.pending.clear()
+        return jobs
+
+    def close(self):
+        """Dispose of the pending sessions as settings.BILLING_FLUSH says"""
+        if not self.pending:
+            return
+        mode = getattr(settings, 'BILLING_FLUSH', 'request')
+        if mode == 'job':
+            self.enqueue()
+        elif mode == 'month_close':
+            # bill_all_students recomputes every student-month at month end
+            self.pending.clear()
+        else:
+            self.flush()
+
+
+class LedgerService:
+    """
+    Student balances kept by an append-only ledger. Every change to what a student owes
+    (a bill total moving, a payment) appends a LedgerEntry and moves the student's
+    StudentBalance row in the same transaction, so a balance is one indexed read and
+    the entries always add up to it. Entries are never updated or deleted; corrections
+    are new 'adjustment' entries.
+    """
+
+    @staticmethod
+    def balance(student):
+        """The student's current balance; 0.00 before their first entry"""
+        balance = StudentBalance.objects.filter(student=student).values_list('balance', flat=True).first()
+        return balance if balance is not None else Decimal('0.00')
+
+    @staticmethod
+    def debtors():
+        """Balances of the students who owe money, largest first"""
+        return StudentBalance.objects.filter(balance__gt=0).select_related('student__user').order_by('-balance')
+
+    @staticmethod
+    def record_many(changes, kind='charge', note=''):
+        """
+        Append one entry per (student_id, bill_id, cents) change, skipping zero changes, and
+        move the students' balances. The balance rows are read with one locked query and
+        written with one bulk query, whatever the number of changes. Returns the entries.
+        """
+        changes = [change for change in changes if change[2]]
+        if not changes:
+            return []
+        # No savepoint: the entries and balances go with the caller's transaction, or fail with it
+        with transaction.atomic(savepoint=False):
+            student_ids = {student_id for student_id, _, _ in changes}
+            existing = {
+                snapshot.student_id: snapshot
+                for snapshot in StudentBalance.objects.select_for_update().filter(student_id__in=student_ids)
             }
+            new = {sid: StudentBalance(student_id=sid) for sid in student_ids if sid not in existing}
+            balances = {sid: to_hundredths(snapshot.balance) for sid, snapshot in {**existing, **new}.items()}
+
+            now = timezone.now()
+            entries = []
+            for student_id, bill_id, cents in changes:
+                balances[student_id] += cents
+                entries.append(LedgerEntry(
+                    student_id=student_id, bill_id=bill_id, kind=kind, note=note, created_at=now,
+                    amount=cents_to_decimal(cents), balance_after=cents_to_decimal(balances[student_id]),
+                ))
+            for student_id, snapshot in {**existing, **new}.items():
+                snapshot.balance = cents_to_decimal(balances[student_id])
+                snapshot.updated_at = now
+
+            StudentBalance.objects.bulk_create(new.values())
+            StudentBalance.objects.bulk_update(existing.values(), ['balance', 'updated_at'])
+            LedgerEntry.objects.bulk_create(entries)
+        return entries
+
+    @staticmethod
+    def record(student_id, cents, kind='charge', bill_id=None, note=''):
+        """Append a single entry (see record_many); None for a zero change"""
+        entries = LedgerService.record_many([(student_id, bill_id, cents)], kind, note)
+        return entries[0] if entries else None
+
+    @staticmethod
+    def pay_bill(bill, paid_at=None):
+        """Mark a bill paid and credit its total to the student; False if it was already paid"""
+        paid_at = paid_at or timezone.now()
+        with transaction.atomic():
+            # The conditional UPDATE makes a double submit credit the payment only once
+            if not Bill.objects.filter(pk=bill.pk, is_paid=False).update(
+                    is_paid=True, payment_date=paid_at, updated_at=timezone.now()):
+                return False
+            total = Bill.objects.filter(pk=bill.pk).values_list('total_amount', flat=True).get()
+            LedgerService.record(
+                bill.student_id, -to_hundredths(total), kind='payment', bill_id=bill.pk,
+                note=f"Pagamento da fatura {bill.month:%m/%Y}"
+            )
+        bill.is_paid, bill.payment_date = True, paid_at
+        return True
+
+    @staticmethod
+    def find_drift():
+        """Return [(student_id, balance cents, ledger cents), ...] where a balance row does not match its entries"""
+        ledger = dict(
+            LedgerEntry.objects.values('student_id').annotate(total=Sum('amount'))
+            .values_list('student_id', 'total').order_by()
         )
-        
-        # Create the BillItem
-        bill_item = BillItem.objects.create(
-            bill=bill,
-            service_name=work_session.task.name,
-            service_description=work_session.task.description or '',
-            service_price_at_billing=service_price,
-            quantity=quantity,
-            amount=amount
+        balances = dict(StudentBalance.objects.values_list('student_id', 'balance'))
+        drift = []
+        for student_id in sorted(set(ledger) | set(balances)):
+            stored, expected = to_hundredths(balances.get(student_id, 0)), to_hundredths(ledger.get(student_id, 0))
+            if stored != expected:
+                drift.append((student_id, stored, expected))
+        return drift
+
+    @staticmethod
+    def rebuild_balances(student_ids):
+        """Rewrite the balance rows of these students from the sum of their entries"""
+        with transaction.atomic():
+            list(StudentBalance.objects.select_for_update().filter(student_id__in=student_ids).values_list('pk'))
+            totals = dict(
+                LedgerEntry.objects.filter(student_id__in=student_ids).values('student_id')
+                .annotate(total=Sum('amount')).values_list('student_id', 'total').order_by()
+            )
+            for student_id in student_ids:
+                StudentBalance.objects.update_or_create(
+                    student_id=student_id, defaults={'balance': totals.get(student_id) or Decimal('0.00')}
+                )
+
+    @staticmethod
+    def bill_differences():
+        """
+        Return [(student_id, balance cents, unpaid bills cents), ...] for students whose balance
+        is not the total of their unpaid bills, e.g. after bills were edited in the admin
+        """
+        unpaid = dict(
+            Bill.objects.filter(is_paid=False).values('student_id').annotate(total=Sum('total_amount'))
+            .values_list('student_id', 'total').order_by()
         )
-        
-        # Update the Bill's total amount
-        bill.total_amount = BillItem.objects.filter(
-            bill=bill,
-            service_price_at_billing__gt=0,
-            amount__gt=0
-        ).aggregate(
-            total=models.Sum('amount', default=0)
-        )['total']
-        bill.save()
-        
-        return bill_item
-        
+        balances = dict(StudentBalance.objects.values_list('student_id', 'balance'))
+        differences = []
+        for student_id in sorted(set(unpaid) | set(balances)):
+            balance, owed = to_hundredths(balances.get(student_id, 0)), to_hundredths(unpaid.get(student_id) or 0)
+            if balance != owed:
+                differences.append((student_id, balance, owed))
+        return differences
+
+
+class BillTotalsService:
+    """
+    Bill.total_amount kept up to date incrementally. A bill's total is the sum of its items
+    with a positive price and amount, each rounded to the cent, as create_bill and
+    BulkBillingService count it. Item changes move the bill total with
+    UPDATE ... SET total_amount = total_amount + delta in the item's transaction, so
+    concurrent charges to one bill add up instead of the last writer winning.
+    """
+
+    @staticmethod
+    def counted_items():
+        """Items that count towards their bill's total"""
+        return BillItem.objects.filter(service_price_at_billing__gt=0, amount__gt=0)
+
+    @staticmethod
+    def item_cents(item):
+        """What an item adds to its bill's total, in cents; 0 for None"""
+        if item is None or not (item.service_price_at_billing > 0 and item.amount > 0):
+            return 0
+        return item.amount_cents if item.amount_cents is not None else to_hundredths(item.amount)
+
+    @staticmethod
+    def add(bill_id, cents, student_id=None):
+        """Add cents (possibly negative) to a bill's total with one atomic UPDATE, and charge the student"""
+        if not cents:
+            return
+        with transaction.atomic(savepoint=False):
+            Bill.objects.filter(pk=bill_id).update(
+                total_amount=F('total_amount') + cents_to_decimal(cents),
+                updated_at=timezone.now()
+            )
+            if student_id is None:
+                student_id = Bill.objects.filter(pk=bill_id).values_list('student_id', flat=True).first()
+            if student_id is not None:
+                LedgerService.record(student_id, cents, bill_id=bill_id)
+
+    @staticmethod
+    def add_item(bill, **fields):
+        """Create a BillItem on the bill and add it to the bill's total"""
+        with transaction.atomic():
+            item = BillItem.objects.create(bill=bill, **fields)
+            BillTotalsService.add(bill.pk, BillTotalsService.item_cents(item), student_id=bill.student_id)
+        FragmentCacheService.touch(FragmentCacheService.STUDENT, bill.student_id)
+        return item
+
+    @staticmethod
+    def _touch_students(bill_ids):
+        """Drop the cached page fragments of the students these bills belong to"""
+        FragmentCacheService.touch_many(
+            FragmentCacheService.STUDENT, Bill.objects.filter(pk__in=bill_ids).values_list('student_id', flat=True)
+        )
+
+    @staticmethod
+    def save_item(item):
+        """Save a new or changed item and move the difference into its bill's total (and its old bill's)"""
+        with transaction.atomic():
+            previous = None
+            if item.pk:
+                previous = BillItem.objects.select_for_update().filter(pk=item.pk).first()
+            item.save()
+            BillTotalsService._touch_students({item.bill_id, previous.bill_id if previous else None})
+            if previous is not None and previous.bill_id != item.bill_id:
+                BillTotalsService.add(previous.bill_id, -BillTotalsService.item_cents(previous))
+                previous = None
+            BillTotalsService.add(
+                item.bill_id, BillTotalsService.item_cents(item) - BillTotalsService.item_cents(previous)
+            )
+        return item
+
+    @staticmethod
+    def delete_item(item):
+        """Delete an item and take it out of its bill's total"""
+        with transaction.atomic():
+            previous = BillItem.objects.select_for_update().filter(pk=item.pk).first()
+            item.delete()
+            if previous is not None:
+                BillTotalsService.add(previous.bill_id, -BillTotalsService.item_cents(previous))
+                BillTotalsService._touch_students([previous.bill_id])
+
+    @staticmethod
+    def expected_totals(bill_ids=None):
+        """Return {bill_id: total in cents} recomputed from the items, for bills that have counted items"""
+        items = BillTotalsService.counted_items()
+        if bill_ids is not None:
+            items = items.filter(bill_id__in=bill_ids)
+        return dict(
+            items.values('bill_id').annotate(total=Sum(BillItem.cents_expression()))
+            .values_list('bill_id', 'total').order_by()
+        )
+
+    @staticmethod
+    def find_drift():
+        """Return [(bill_id, stored cents, expected cents), ...] for bills whose total is off"""
+        expected = BillTotalsService.expected_totals()
+        return [
+            (bill_id, to_hundredths(total), expected.get(bill_id, 0))
+            for bill_id, total in Bill.objects.values_list('pk', 'total_amount').order_by('pk').iterator()
+            if to_hundredths(total) != expected.get(bill_id, 0)
+        ]
+
+    @staticmethod
+    def reconcile(bill_ids):
+        """
+        Rewrite the totals of the given bills from their items, each bill locked while it is
+        recomputed. Returns [(bill_id, old cents, new cents), ...] for the totals that changed.
+        """
+        fixed = []
+        for bill_id in bill_ids:
+            with transaction.atomic():
+                row = Bill.objects.select_for_update().filter(pk=bill_id).values_list('total_amount', 'student_id').first()
+                if row is None:
+                    continue
+                stored, student_id = to_hundredths(row[0]), row[1]
+                expected = BillTotalsService.expected_totals([bill_id]).get(bill_id, 0)
+                if stored != expected:
+                    Bill.objects.filter(pk=bill_id).update(
+                        total_amount=cents_to_decimal(expected), updated_at=timezone.now()
+                    )
+                    LedgerService.record(
+                        student_id, expected - stored, kind='adjustment', bill_id=bill_id,
+                        note='Total da fatura recalculado a partir dos itens'
+                    )
+                    fixed.append((bill_id, stored, expected))
+        return fixed
+
+
+class BulkBillingService:
+    """Month-end billing for many students with a fixed number of queries"""
+
+    @staticmethod
+    def month_sessions(month_start):
+        """Non-deleted work sessions billed in the month starting at month_start"""
+        return WorkSession.objects.filter(
+            effective_date__gte=month_start,
+            effective_date__lt=month_start + relativedelta(months=1),
+            is_deleted=False
+        )
+
+    @staticmethod
+    def session_counts(month_start):
+        """Return {student_id: number of work sessions} for the month using one grouped query"""
+        rows = BulkBillingService.month_sessions(month_start).filter(
+            student__isnull=False
+        ).values('student_id').annotate(session_count=Count('id')).order_by()
+        return {row['student_id']: row['session_count'] for row in rows}
+
+    @staticmethod
+    def task_totals(month_start, student_ids=None):
+        """
+        Return {student_id: [row, ...]} with one row per billable task for the month, using a
+        single query grouped by student and task. Each row has task_id, service_name,
+        service_description, price, session_count, quantity (hours) and amount.
+        Free tasks are left out, like in create_bill_item_for_work_session.
+        """
+        work_sessions = BulkBillingService.month_sessions(month_start).filter(
+            student__isnull=False,
+            total_amount__gt=0
+        )
+        if student_ids is not None:
+            work_sessions = work_sessions.filter(student_id__in=student_ids)
+
+        rows = annotate_session_cents(work_sessions).values(
+            'student_id', 'task_id', 'task__name', 'task__description', 'task__price'
+        ).annotate(
+            session_count=Count('id'),
+            student_hours_cents=Sum('hours_cents'),
+            student_billing_cents=Sum('billing_cents'),
+        ).order_by('student_id', 'task_id')
+
+        totals = {}
+        for row in rows:
+            totals.setdefault(row['student_id'], []).append({
+                'task_id': row['task_id'],
+                'service_name': row['task__name'],
+                'service_description': row['task__description'] or '',
+                'price': row['task__price'],
+                'session_count': row['session_count'],
+                'quantity': cents_to_decimal(row['student_hours_cents']),
+                'amount': cents_to_decimal(row['student_billing_cents']),
+                'amount_cents': row['student_billing_cents'],
+            })
+        return totals
+
+    @staticmethod
+    def existing_bills(month_start):
+        """Return {student_id: Bill} for the month"""
+        return {bill.student_id: bill for bill in Bill.objects.filter(month=month_start)}
+
+    @staticmethod
+    def apply(month_start, actions, bills=None):
+        """
+        Create or update the month's bills and their work session items in one transaction.
+
+        actions maps student_id to 'create', 'update' or 'skip', with the same rules as
+        BulkSalaryService.apply, or to 'sync': create the bill if there is none and update
+        it unless it is paid (used by BillingPipeline). Every billed task becomes one BillItem linked to the task;
+        manual service items are kept and counted in the bill total as in create_bill. No bill is
+        created for a student with nothing billable in the month; they are reported as skipped.
+        Returns (results, stats): results is a list of (student_id, action) pairs and stats
+        holds row counts and the elapsed time in milliseconds.
+        """
+        started = time.perf_counter()
+        if bills is None:
+            bills = BulkBillingService.existing_bills(month_start)
+
+        to_create = [sid for sid, action in actions.items() if action in ('create', 'sync') and sid not in bills]
+        to_update = [
+            sid for sid, action in actions.items()
+            if sid in bills and (action == 'update' or (action == 'sync' and not bills[sid].is_paid))
+        ]
+        totals = BulkBillingService.task_totals(month_start, student_ids=to_create + to_update)
+        # Students with nothing billable (no sessions, or only free tasks) get no empty bill
+        unbilled = {sid for sid in to_create if not totals.get(sid)}
+        to_create = [sid for sid in to_create if sid not in unbilled]
+
+        updated_bills = [bills[sid] for sid in to_update]
+        stats = {
+            'bills_created': 0, 'bills_updated': 0,
+            'items_created': 0, 'items_updated': 0, 'items_deleted': 0,
+            'sessions': sum(row['session_count'] for rows in totals.values() for row in rows),
+        }
+
+        with transaction.atomic():
+            previous_totals = {}
+            if updated_bills:
+                # Updated totals are written whole: lock the bills so a concurrent charge
+                # (BillTotalsService.add) waits instead of being overwritten
+                previous_totals = dict(
+                    Bill.objects.select_for_update().filter(pk__in=[bill.pk for bill in updated_bills])
+                    .values_list('pk', 'total_amount')
+                )
+            # Manual service items, counted the same way create_bill does
+            service_totals = dict(
+                BillTotalsService.counted_items().filter(
+                    bill__in=updated_bills,
+                    task__isnull=True,
+                ).values('bill_id').annotate(total=Sum(BillItem.cents_expression())).values_list('bill_id', 'total').order_by()
+            ) if updated_bills else {}
+            existing_items = {
+                (item.bill_id, item.task_id): item
+                for item in BillItem.objects.filter(bill__in=updated_bills, task__isnull=False)
+            } if updated_bills else {}
+
+            new_bills = [
+                Bill(
+                    student_id=sid,
+                    month=month_start,
+                    total_amount=cents_to_decimal(sum(row['amount_cents'] for row in totals.get(sid, []))),
+                )
+                for sid in to_create
+            ]
+            Bill.objects.bulk_create(new_bills, batch_size=500)
+            if new_bills and new_bills[0].pk is None:
+                # Backends that cannot return ids from a bulk insert
+                created = Bill.objects.filter(month=month_start, student_id__in=to_create)
+                new_bills = list(created)
+            stats['bills_created'] = len(new_bills)
+
+            now = timezone.now()
+            for bill in updated_bills:
+                bill.total_amount = cents_to_decimal(service_totals.get(bill.pk, 0) + sum(
+                    row['amount_cents'] for row in totals.get(bill.student_id, [])
+                ))
+                bill.updated_at = now
+            Bill.objects.bulk_update(updated_bills, ['total_amount', 'updated_at'], batch_size=500)
+            stats['bills_updated'] = len(updated_bills)
+
+            # What the new and changed totals add to each student's balance
+            LedgerService.record_many(
+                [(bill.student_id, bill.pk, to_hundredths(bill.total_amount)) for bill in new_bills] +
+                [(bill.student_id, bill.pk, to_hundredths(bill.total_amount) - to_hundredths(previous_totals.get(bill.pk, 0)))
+                 for bill in updated_bills]
+            )
+
+            new_items, changed_items, kept = [], [], set()
+            for bill in new_bills + updated_bills:
+                for row in totals.get(bill.student_id, []):
+                    key = (bill.pk, row['task_id'])
+                    item = existing_items.get(key)
+                    if item is None:
+                        item = BillItem(bill=bill, task_id=row['task_id'])
+                        new_items.append(item)
+                    else:
+                        kept.add(key)
+                        changed_items.append(item)
+                    item.service_name = row['service_name']
+                    item.service_description = row['service_description']
+                    item.service_price_at_billing = row['price']
+                    item.quantity = row['quantity']
+                    item.amount = row['amount']
+                    item.amount_cents = row['amount_cents']
+                    item.updated_at = now
+
+            stale_ids = [item.pk for key, item in existing_items.items() if key not in kept]
+            BillItem.objects.bulk_create(new_items, batch_size=500)
+            BillItem.objects.bulk_update(
+                changed_items,
+                ['service_name', 'service_description', 'service_price_at_billing', 'quantity', 'amount', 'amount_cents',
+                 'updated_at'],
+                batch_size=500
+            )
+            if stale_ids:
+                BillItem.objects.filter(pk__in=stale_ids).delete()
+            stats.update(
+                items_created=len(new_items),
+                items_updated=len(changed_items),
+                items_deleted=len(stale_ids),
+            )
+
+        created, updated = set(to_create), set(to_update)
+        results = []
+        for sid, action in actions.items():
+            if sid in created:
+                results.append((sid, 'created'))
+            elif sid in updated:
+                results.append((sid, 'updated'))
+            elif sid in unbilled or (action in ('skip', 'sync') and sid in bills):
+                results.append((sid, 'skipped'))
+        stats['bills_skipped'] = len(results) - len(created) - len(updated)
+        stats['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        return results, stats
@@ -5,8 +5,12 @@ from django.utils import timezone
 from django.db import models
 from django.db.models import Sum, Q
 from dateutil.relativedelta import relativedelta
-from .models import Student, Task, WorkSession, Service
+from .models import Student, Task, WorkSession, Service, MonthlyStudentTotals
+from .services import FragmentCacheService
+from .conditional import bill_state, conditional_page
 from .billing_models import Bill, BillItem
+from .billing_services import StudentBillingService, BulkBillingService, BillTotalsService, LedgerService
+from .job_services import JobService
 from .forms import BillItemForm
 import calendar
 from datetime import datetime
@@ -52,17 +56,9 @@ def create_bill(request, student_id):
             bill_item.quantity = quantity
             bill_item.amount = service.price * quantity
 
-            bill_item.save()
-
-            # Recalculate total amount
-            bill.total_amount = BillItem.objects.filter(
-                bill=bill,
-                service_price_at_billing__gt=0,
-                amount__gt=0
-            ).aggregate(
-                total=Sum('amount', default=0)
-            )['total']
-            bill.save()
+            # Save the item and add it to the bill total
+            BillTotalsService.save_item(bill_item)
+            bill.refresh_from_db(fields=['total_amount'])
 
             messages.success(request, f'Serviço adicionado à fatura. Total: €{bill.total_amount:.2f}')
             return redirect('create_bill', student_id=student_id)
@@ -72,24 +68,8 @@ def create_bill(request, student_id):
             messages.error(request, 'No bill found for this month. Please add bill items first.')
             return redirect('create_bill', student_id=student_id)
 
-        # Get work sessions for this student and month
-        work_sessions = WorkSession.objects.filter(
-            Q(student=student, entry_type='manual', created_at__date__year=selected_month.year, created_at__date__month=selected_month.month) |
-            Q(student=student, entry_type='clock', clock_in__date__year=selected_month.year, clock_in__date__month=selected_month.month) |
-            Q(student=student, entry_type='time_range', start_time__date__year=selected_month.year, start_time__date__month=selected_month.month)
-        ).order_by('created_at', 'clock_in', 'start_time')
-
-        # Calculate total bill amount
-        bill_items_total = BillItem.objects.filter(
-            bill=bill,
-            service_price_at_billing__gt=0,
-            amount__gt=0
-        ).aggregate(total=Sum('amount'))['total'] or 0
-
-        work_sessions_total = work_sessions.aggregate(total=Sum('total_amount'))['total'] or 0
-
-        bill.total_amount = bill_items_total + work_sessions_total
-        bill.save()
+        # Recompute the bill from the month's sessions and service items with the bill locked
+        BulkBillingService.apply(bill.month, {student.id: 'sync'}, bills={student.id: bill})
 
         messages.success(request, f'Fatura criada com sucesso para {student} para {selected_month.year} - {selected_month.strftime("%B")}!')
         return redirect('student_bills', student_id=student_id)
@@ -97,11 +77,7 @@ def create_bill(request, student_id):
         form = BillItemForm()
 
     # Get work sessions for this student and month
-    work_sessions = WorkSession.objects.filter(
-        Q(student=student, entry_type='manual', created_at__date__year=selected_month.year, created_at__date__month=selected_month.month) |
-        Q(student=student, entry_type='clock', clock_in__date__year=selected_month.year, clock_in__date__month=selected_month.month) |
-        Q(student=student, entry_type='time_range', start_time__date__year=selected_month.year, start_time__date__month=selected_month.month)
-    ).order_by('created_at', 'clock_in', 'start_time')
+    work_sessions = StudentBillingService.get_month_work_sessions(student, selected_month).order_by('created_at', 'clock_in', 'start_time')
     
     # Debug logging
     print("=== Work Sessions Query Details ===")
@@ -182,24 +158,8 @@ def create_bill_final(request, student_id):
         messages.error(request, 'No bill found for this month. Please add bill items first.')
         return redirect('create_bill', student_id=student_id)
 
-    # Get work sessions for this student and month
-    work_sessions = WorkSession.objects.filter(
-        Q(student=student, entry_type='manual', created_at__date__year=selected_month.year, created_at__date__month=selected_month.month) |
-        Q(student=student, entry_type='clock', clock_in__date__year=selected_month.year, clock_in__date__month=selected_month.month) |
-        Q(student=student, entry_type='time_range', start_time__date__year=selected_month.year, start_time__date__month=selected_month.month)
-    ).order_by('created_at', 'clock_in', 'start_time')
-
-    # Calculate total bill amount
-    bill_items_total = BillItem.objects.filter(
-        bill=bill,
-        service_price_at_billing__gt=0,
-        amount__gt=0
-    ).aggregate(total=Sum('amount'))['total'] or 0
-
-    work_sessions_total = work_sessions.aggregate(total=Sum('total_amount'))['total'] or 0
-
-    bill.total_amount = bill_items_total + work_sessions_total
-    bill.save()
+    # Recompute the bill from the month's sessions and service items with the bill locked
+    BulkBillingService.apply(bill.month, {student.id: 'sync'}, bills={student.id: bill})
 
     messages.success(request, f'Fatura criada com sucesso para {student} for {selected_month.strftime("%B %Y")}!')
     return redirect('student_bills', student_id=student_id)
@@ -208,7 +168,7 @@ def create_bill_final(request, student_id):
 @user_passes_test(lambda u: u.is_superuser)
 def select_student_for_bill_creation(request):
     """View to select a student for bill creation"""
-    students = Student.objects.all()
+    students = Student.objects.select_related('user')
 
     if request.method == 'POST':
         student_id = request.POST.get('student_id')
@@ -223,7 +183,7 @@ def select_student_for_bill_creation(request):
 @user_passes_test(lambda u: u.is_inspector, login_url=None)
 def select_student_for_billing(request):
     """View to select a student for billing"""
-    students = Student.objects.all()
+    students = Student.objects.select_related('user')
 
     if request.method == 'POST':
         student_id = request.POST.get('student_id')
@@ -237,38 +197,50 @@ def select_student_for_billing(request):
 @login_required
 def student_bills(request, student_id):
     """View student's bills"""
-    student = get_object_or_404(Student, pk=student_id)
-    bills = Bill.objects.filter(student=student).order_by('-month')
+    student = get_object_or_404(Student.objects.select_related('user', 'ledger_balance'), pk=student_id)
+    bills = StudentBillingService.get_student_bills(student)
+    ledger_balance = getattr(student, 'ledger_balance', None)
 
     return render(request, 'student/student_bills.html', {
         'student': student,
-        'bills': bills
+        'bills': bills,
+        'balance': ledger_balance.balance if ledger_balance else Decimal('0.00'),
     })
 
 @login_required
+@user_passes_test(lambda u: u.is_superuser)
+def mark_bill_paid(request, bill_id):
+    """Record the payment of a bill in the student's ledger"""
+    bill = get_object_or_404(Bill, pk=bill_id)
+    if request.method == 'POST':
+        if LedgerService.pay_bill(bill):
+            messages.success(request, f'Pagamento da fatura de {bill.month:%m/%Y} registrado.')
+        else:
+            messages.info(request, 'Esta fatura já estava paga.')
+    return redirect('student_bills', student_id=bill.student_id)
+
+@login_required
+@user_passes_test(lambda u: u.is_superuser or u.is_inspector, login_url=None)
+def student_balances(request):
+    """Students who owe money, largest balance first, read from the ledger balances"""
+    return render(request, 'superuser/student_balances.html', {'balances': LedgerService.debtors()})
+
+@login_required
+@conditional_page(bill_state)
 def bill_detail(request, bill_id):
     """View bill details"""
     bill = get_object_or_404(Bill, pk=bill_id)
     
     # Get work sessions for this bill's month
-    work_sessions = WorkSession.objects.filter(
-        Q(student=bill.student, entry_type='manual', created_at__date__year=bill.month.year, created_at__date__month=bill.month.month) |
-        Q(student=bill.student, entry_type='clock', clock_in__date__year=bill.month.year, clock_in__date__month=bill.month.month) |
-        Q(student=bill.student, entry_type='time_range', start_time__date__year=bill.month.year, start_time__date__month=bill.month.month)
-    ).order_by('created_at', 'clock_in', 'start_time')
+    work_sessions = StudentBillingService.get_month_work_sessions(bill.student, bill.month).order_by('created_at', 'clock_in', 'start_time')
 
-    # Calculate total hours
-    total_hours = work_sessions.aggregate(
-        total_hours=Sum('stored_hours')
-    )['total_hours'] or 0
+    # Month totals come from the student's rollup row instead of re-summing the sessions
+    month_totals = MonthlyStudentTotals.for_month(bill.student, bill.month.year, bill.month.month)
+    total_hours = month_totals.hours
+    work_sessions_total = month_totals.student_billing
 
-    # Calculate work sessions total
-    work_sessions_total = work_sessions.aggregate(
-        total=Sum('total_amount')
-    )['total'] or 0
-
-    # Calculate bill items total
-    bill_items_total = bill.items.aggregate(
+    # Calculate bill items total; items generated from work sessions are already in work_sessions_total
+    bill_items_total = bill.items.filter(task__isnull=True).aggregate(
         total=Sum('amount')
     )['total'] or 0
 
@@ -289,12 +261,13 @@ def student_bill_items(request, student_id):
     # Get all bill items for this student
     bill_items = BillItem.objects.filter(
         bill__student=student,
+        task__isnull=True,
         service_price_at_billing__gt=0,
         amount__gt=0
     ).select_related('bill').order_by('-bill__month')
     
     # Get all work sessions for this student
-    work_sessions = WorkSession.objects.filter(student=student).select_related('teacher', 'task').order_by('-created_at')
+    work_sessions = WorkSession.objects.filter(student=student).select_related('teacher__user', 'task').order_by('-created_at')
     
     # Combine and sort by date
     from operator import attrgetter
@@ -313,68 +286,68 @@ def student_bill_items(request, student_id):
                 return timezone.make_aware(record.created_at)
             return record.created_at
     
-    combined_records = list(bill_items) + list(work_sessions)
-    combined_records.sort(key=get_sort_date, reverse=True)
-    
+    def records():
+        combined_records = list(bill_items) + list(work_sessions)
+        combined_records.sort(key=get_sort_date, reverse=True)
+        return combined_records
+
+    # The table is a cached fragment; records is a callable so the queries only run when it is rendered
     return render(request, 'superuser/student_bill_items.html', {
         'student': student,
-        'records': combined_records,
+        'records': records,
+        'fragment_version': FragmentCacheService.student_version(student.id),
+        'fragment_timeout': FragmentCacheService.timeout(),
     })
 
 @login_required
 @user_passes_test(lambda u: u.is_superuser)
 def bill_all_students(request):
     """Bulk billing for all students for a selected month, with preview and update/skip logic."""
-    from django.utils import timezone
-    from dateutil.relativedelta import relativedelta
-    from .models import Student, WorkSession, Service
-    from .billing_models import Bill, BillItem
-    from django.db.models import Sum
-    import calendar
-
     # Get month/year from GET or POST, default to previous month
     today = timezone.now().date()
     default_month = (today.replace(day=1) - relativedelta(months=1))
     year = int(request.GET.get('year', default_month.year))
     month = int(request.GET.get('month', default_month.month))
-    month_start = timezone.datetime(year, month, 1, tzinfo=timezone.get_current_timezone())
-    month_end = (month_start + relativedelta(months=1))
+    month_start = today.replace(year=year, month=month, day=1)
 
-    students = Student.objects.filter(is_active=True)
-    bills = Bill.objects.filter(month=month_start)
-    bills_by_student = {b.student_id: b for b in bills}
+    students = Student.objects.filter(is_active=True).select_related('user')
+    bills_by_student = BulkBillingService.existing_bills(month_start)
+    session_counts = BulkBillingService.session_counts(month_start)
 
     preview_data = []
     for student in students:
         bill = bills_by_student.get(student.id)
-        ws_count = WorkSession.objects.filter(student=student, start_time__gte=month_start, start_time__lt=month_end).count()
         preview_data.append({
             'student': student,
             'bill': bill,
             'already_billed': bool(bill),
             'paid': bill.is_paid if bill else False,
-            'work_sessions': ws_count,
+            'work_sessions': session_counts.get(student.id, 0),
         })
 
-    if request.method == 'POST' and 'confirm' in request.POST:
-        # Superuser has confirmed choices
-        actions = []
+    if request.method == 'POST' and ('confirm' in request.POST or 'background' in request.POST):
+        # Superuser has confirmed choices; students without a bill are always billed
+        requested = {}
         for item in preview_data:
-            sid = str(item['student'].id)
+            sid = item['student'].id
             if not item['already_billed']:
-                # Create bill immediately, no confirmation needed
-                bill = Bill.objects.create(student=item['student'], month=month_start, total_amount=0)
-                # Here, add bill items as needed (simplified, real logic may differ)
-                actions.append({'student': item['student'], 'action': 'created'})
+                requested[sid] = 'create'
             else:
-                action = request.POST.get(f'action_{sid}')
-                if action == 'update':
-                    bill = item['bill']
-                    # ... recalculate bill items here ...
-                    actions.append({'student': item['student'], 'action': 'updated'})
-                elif action == 'skip':
-                    actions.append({'student': item['student'], 'action': 'skipped'})
-        return render(request, 'superuser/bill_all_students_result.html', {'actions': actions, 'month': month, 'year': year})
+                requested[sid] = request.POST.get(f'action_{sid}')
+
+        if 'background' in request.POST:
+            job = JobService.enqueue('bill_students', year, month, requested, created_by=request.user)
+            messages.success(request, 'Faturação colocada em fila. O progresso é atualizado nesta página.')
+            return redirect('job_detail', job_id=job.pk)
+        results, stats = BulkBillingService.apply(month_start, requested, bills=bills_by_student)
+        students_by_id = {item['student'].id: item['student'] for item in preview_data}
+        actions = [{'student': students_by_id[sid], 'action': action} for sid, action in results]
+        return render(request, 'superuser/bill_all_students_result.html', {
+            'actions': actions,
+            'stats': stats,
+            'month': month,
+            'year': year,
+        })
 
     # Prepare months list for template (1-based)
     months = [
@@ -425,16 +398,14 @@ def charge_student_for_service(request):
         description = request.POST.get('description', '')
         period = datetime(selected_year, selected_month, 1, tzinfo=now.tzinfo)
         bill, _ = Bill.objects.get_or_create(student=student, month=period, defaults={'total_amount': 0})
-        BillItem.objects.create(
-            bill=bill,
+        BillTotalsService.add_item(
+            bill,
             service_name=service.name,
             service_description=description or service.description or '',
             service_price_at_billing=service.price,
             quantity=quantity,
             amount=service.price * quantity
         )
-        bill.total_amount = bill.items.aggregate(total=Sum('amount'))['total'] or 0
-        bill.save()
         messages.success(request, f'Adicionado {service.name} ao {student} para {period.strftime("%B")} {selected_year}.')
         return redirect('charge_student_for_service')
 
@@ -457,7 +428,7 @@ def edit_bill_item(request, item_id):
     if request.method == 'POST':
         form = BillItemForm(request.POST, instance=bill_item)
         if form.is_valid():
-            form.save()
+            BillTotalsService.save_item(form.save(commit=False))
             messages.success(request, 'Bill item updated successfully.')
             return redirect('student_bill_items', student_id=bill_item.bill.student.id)
     else:
@@ -470,7 +441,7 @@ def delete_bill_item(request, item_id):
     bill_item = get_object_or_404(BillItem, pk=item_id)
     student_id = bill_item.bill.student.id
     if request.method == 'POST':
-        bill_item.delete()
+        BillTotalsService.delete_item(bill_item)
         messages.success(request, 'Bill item deleted successfully.')
         return redirect('student_bill_items', student_id=student_id)
     return render(request, 'superuser/confirm_bill_item_delete.html', {'bill_item': bill_item})
@@ -0,0 +1,124 @@
+"""
+Hours and amounts of work sessions, computed for whole batches with integer arithmetic.
+
+Hours are carried as hundredths of an hour and money as cents, so no Decimal is built
+per value until the results are written back to sessions. The rules are the ones
+WorkSession.save() has always applied:
+
+- manual entries use manual_hours as entered (to the hundredth);
+- clock and time-range entries are rounded to whole hours, halves away from zero;
+- sessions without positive hours have no amounts;
+- the teacher is paid hours * hourly_rate and the student billed hours * task price
+  (0.00 for free tasks), each rounded to the cent with halves rounded up.
+
+This module does not touch the database; callers pass plain values or sessions.
+"""
+from datetime import timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from typing import NamedTuple, Optional
+
+MICROSECONDS_PER_HOUR = 3_600_000_000
+ONE_MICROSECOND = timedelta(microseconds=1)
+HUNDREDTH = Decimal('0.01')
+
+
+class SessionAmounts(NamedTuple):
+    hours: Optional[int]            # hundredths of an hour
+    teacher_payment: Optional[int]  # cents
+    student_billing: Optional[int]  # cents
+
+
+def to_hundredths(value):
+    """Decimal (or int/str) to an integer number of hundredths, halves rounded up; None stays None"""
+    if value is None:
+        return None
+    value = value if isinstance(value, Decimal) else Decimal(str(value))
+    return int(value.quantize(HUNDREDTH, rounding=ROUND_HALF_UP).scaleb(2))
+
+
+def from_hundredths(value):
+    """Integer hundredths (hours) or cents (money) to a 2-place Decimal; None stays None"""
+    return None if value is None else Decimal(value).scaleb(-2)
+
+
+def _div_half_up(numerator, denominator):
+    """numerator / denominator rounded to an integer, halves away from zero"""
+    quotient = (2 * abs(numerator) + denominator) // (2 * denominator)
+    return quotient if numerator >= 0 else -quotient
+
+
+def duration_hundredths(start, end):
+    """Whole hours between two datetimes, in hundredths (2.00 hours -> 200)"""
+    return _div_half_up((end - start) // ONE_MICROSECOND, MICROSECONDS_PER_HOUR) * 100
+
+
+def session_hours(entry_type, manual_hours=None, clock_in=None, clock_out=None, start_time=None, end_time=None):
+    """Hours of one session in hundredths, or None while they cannot be known (open clock session)"""
+    if entry_type == 'manual':
+        return to_hundredths(manual_hours)
+    if entry_type == 'clock':
+        return duration_hundredths(clock_in, clock_out) if clock_in and clock_out else None
+    if entry_type == 'time_range':
+        return duration_hundredths(start_time, end_time) if start_time and end_time else None
+    return None
+
+
+def amount_cents(hours, rate_cents):
+    """hours (hundredths) * rate (cents) in cents, halves rounded up"""
+    return _div_half_up(hours * rate_cents, 100)
+
+
+def compute_batch(entry_types, manual_hours, clock_ins, clock_outs, start_times, end_times,
+                  hourly_rates, prices):
+    """
+    Compute a batch given column by column: equal-length sequences, one item per session.
+    Rates and prices are money amounts (Decimal, int or str, so 20 is 20.00); a rate may be
+    None. Returns one SessionAmounts per session.
+    """
+    results = []
+    for entry_type, manual, clock_in, clock_out, start, end, rate, price in zip(
+            entry_types, manual_hours, clock_ins, clock_outs, start_times, end_times, hourly_rates, prices):
+        hours = session_hours(entry_type, manual, clock_in, clock_out, start, end)
+        if hours is None or hours <= 0:
+            results.append(SessionAmounts(hours, None, None))
+            continue
+        rate = to_hundredths(rate)
+        price = to_hundredths(price or 0)
+        results.append(SessionAmounts(
+            hours,
+            amount_cents(hours, rate) if rate is not None else None,
+            amount_cents(hours, price) if price else 0,
+        ))
+    return results
+
+
+def compute_sessions(sessions, prices):
+    """
+    compute_batch() for WorkSession-like objects. `prices` maps task ids to the task's
+    price; the hourly rate is read from each session.
+    """
+    sessions = list(sessions)
+    return compute_batch(
+        [s.entry_type for s in sessions], [s.manual_hours for s in sessions],
+        [s.clock_in for s in sessions], [s.clock_out for s in sessions],
+        [s.start_time for s in sessions], [s.end_time for s in sessions],
+        [s.hourly_rate for s in sessions], [prices[s.task_id] for s in sessions],
+    )
+
+
+def apply_to_sessions(sessions, prices):
+    """
+    Set stored_hours, teacher_payment_amount and total_amount on each session in place,
+    together with their integer copies (hours_hundredths, teacher_payment_cents,
+    total_amount_cents and hourly_rate_cents).
+    """
+    sessions = list(sessions)
+    for session, result in zip(sessions, compute_sessions(sessions, prices)):
+        session.hours_hundredths = result.hours
+        session.teacher_payment_cents = result.teacher_payment
+        session.total_amount_cents = result.student_billing
+        session.hourly_rate_cents = to_hundredths(session.hourly_rate)
+        session.stored_hours = from_hundredths(result.hours)
+        session.teacher_payment_amount = from_hundredths(result.teacher_payment)
+        session.total_amount = from_hundredths(result.student_billing)
+    return sessions
@@ -0,0 +1,119 @@
+from decimal import Decimal
+from django.db import IntegrityError, connection, transaction
+from django.db.models.signals import post_save
+from django.utils import timezone
+from . import calculations
+from .models import Task, WorkSession
+from .services import MonthlyTotalsService, SalaryCacheService
+
+# Columns written after clock-out, besides clock_out itself
+CLOCK_OUT_FIELDS = [
+    'stored_hours', 'hours_hundredths', 'hourly_rate_cents',
+    'teacher_payment_amount', 'teacher_payment_cents', 'total_amount', 'total_amount_cents',
+]
+
+
+class AlreadyClockedIn(Exception):
+    """The teacher already has an open clock session (see ws_one_open_clock_per_teacher)"""
+
+    def __init__(self, session):
+        super().__init__(f"Teacher {session.teacher_id} is already clocked in (session {session.pk})")
+        self.session = session
+
+
+class ClockService:
+    @staticmethod
+    def open_sessions():
+        """Open clock sessions; ws_one_open_clock_per_teacher allows at most one per teacher"""
+        return WorkSession.objects.filter(entry_type='clock', clock_out__isnull=True, is_deleted=False)
+
+    @staticmethod
+    def active_session(teacher_id):
+        return ClockService.open_sessions().filter(teacher_id=teacher_id).select_related('task', 'student__user').first()
+
+    @staticmethod
+    def clock_in(teacher_id, task, student_id=None, now=None):
+        """
+        Open a clock session. Raises AlreadyClockedIn when the teacher already has one,
+        including when two devices tap at the same time: the partial unique index
+        rejects the second insert.
+
+        `now` backdates the tap (a kiosk syncing queued events): created_at follows it,
+        since salary reports and the teacher rollups group sessions by created_at.
+        """
+        now = now or timezone.now()
+        session = WorkSession(
+            teacher_id=teacher_id, task=task, student_id=student_id,
+            entry_type='clock', clock_in=now, created_at=now
+        )
+        try:
+            with transaction.atomic():
+                session.save()
+        except IntegrityError:
+            active = ClockService.active_session(teacher_id)
+            if active is None:
+                raise
+            raise AlreadyClockedIn(active)
+        return session
+
+    @staticmethod
+    def clock_out(teacher_id, session_id=None, now=None):
+        """
+        Close the teacher's open clock session and return it, or None when there is none.
+
+        The session is found and closed by a single UPDATE ... RETURNING, so of two
+        concurrent clock-outs exactly one wins. Its hours and amounts are then written
+        by primary key, and the post_save receivers (rollups, stale reports, salary
+        cache) are sent the closed session as if save() had been called.
+        """
+        table = connection.ops.quote_name(WorkSession._meta.db_table)
+        task_table = connection.ops.quote_name(Task._meta.db_table)
+        clock_out = WorkSession._meta.get_field('clock_out').get_db_prep_value(now or timezone.now(), connection)
+        sql = (
+            f"UPDATE {table} SET clock_out = %s"
+            f" WHERE teacher_id = %s AND entry_type = 'clock' AND clock_out IS NULL AND is_deleted = %s"
+            f"{' AND id = %s' if session_id else ''}"
+            f" RETURNING *, (SELECT price FROM {task_table} WHERE {task_table}.id = {table}.task_id) AS task_price"
+        )
+        params = [clock_out, teacher_id, False] + ([session_id] if session_id else [])
+
+        with transaction.atomic():
+            closed = list(WorkSession.objects.raw(sql, params))
+            if not closed:
+                return None
+            session = closed[0]
+            previous_contributions = MonthlyTotalsService.session_contributions(session)
+
+            # effective_date follows clock_in, so it was already right when the session opened
+            # Extra raw() columns get no field conversion: SQLite returns the price as int or float
+            price = Decimal(str(session.task_price or 0))
+            calculations.apply_to_sessions([session], {session.task_id: price})
+            session.updated_at = timezone.now()
+            WorkSession.objects.filter(pk=session.pk).update(
+                updated_at=session.updated_at, **{field: getattr(session, field) for field in CLOCK_OUT_FIELDS}
+            )
+
+            session._previous_contributions = previous_contributions
+            session._previous_salary_month = SalaryCacheService.session_month(session)
+            post_save.send(
+                sender=WorkSession, instance=session, created=False, raw=False,
+                using=connection.alias, update_fields=frozenset(['clock_out', 'updated_at'] + CLOCK_OUT_FIELDS)
+            )
+        return session
+
+    @staticmethod
+    def as_dict(session):
+        """JSON-ready view of a clock session"""
+        if session is None:
+            return None
+        return {
+            'id': session.pk,
+            'teacher': session.teacher_id,
+            'task': session.task_id,
+            'student': session.student_id,
+            'clock_in': session.clock_in.isoformat() if session.clock_in else None,
+            'clock_out': session.clock_out.isoformat() if session.clock_out else None,
+            'hours': str(session.stored_hours) if session.stored_hours is not None else None,
+            'teacher_payment': str(session.teacher_payment_amount) if session.teacher_payment_amount is not None else None,
+            'total_amount': str(session.total_amount) if session.total_amount is not None else None,
+        }
@@ -0,0 +1,253 @@
+import json
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.http import JsonResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import require_http_methods, require_POST
+from .clock_services import AlreadyClockedIn, ClockService
+from .models import Task, Teacher, Student
+
+# Events accepted by one batch request
+MAX_BATCH_EVENTS = 500
+# How far ahead of the server clock a device's timestamps may run
+CLOCK_SKEW = timedelta(minutes=5)
+
+
+def _error(message, status):
+    return JsonResponse({'error': message}, status=status)
+
+
+def _request_data(request):
+    """JSON object bodies, or regular form posts; None when the body is not a JSON object"""
+    if request.content_type != 'application/json':
+        return request.POST
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _int_or_none(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+@require_http_methods(['GET', 'POST'])
+def clock_api(request, teacher_id=None):
+    """
+    JSON clock for teachers (and superusers acting for a teacher).
+
+    GET returns the open session, or null. POST with action=in and a task (optionally
+    a student) opens a session: 201, or 409 with the open session when there already
+    is one. POST with action=out closes the open session: 200, or 409 when there is none.
+    """
+    user = request.user
+    if not user.is_authenticated:
+        return _error('Autenticação necessária.', 401)
+    if user.is_superuser:
+        if teacher_id is None:
+            return _error('Superusuários devem informar o professor.', 400)
+        if not Teacher.objects.filter(pk=teacher_id).exists():
+            return _error('Professor não encontrado.', 404)
+    elif user.is_teacher:
+        own_id = Teacher.objects.filter(user=user).values_list('id', flat=True).first()
+        if own_id is None or teacher_id not in (None, own_id):
+            return _error('Você só pode registrar o seu próprio ponto.', 403)
+        teacher_id = own_id
+    else:
+        return _error('Sem permissão para registrar ponto.', 403)
+
+    if request.method == 'GET':
+        return JsonResponse({'active': ClockService.as_dict(ClockService.active_session(teacher_id))})
+
+    data = _request_data(request)
+    if data is None:
+        return _error('Corpo JSON inválido.', 400)
+    action = data.get('action')
+
+    if action == 'in':
+        task = Task.objects.filter(pk=_int_or_none(data.get('task'))).first()
+        if task is None:
+            return _error('Tarefa não encontrada.', 400)
+        student_id = None
+        if data.get('student') not in (None, ''):
+            student_id = _int_or_none(data.get('student'))
+            if student_id is None or not Student.objects.filter(pk=student_id).exists():
+                return _error('Cliente não encontrado.', 400)
+        try:
+            session = ClockService.clock_in(teacher_id, task, student_id)
+        except AlreadyClockedIn as e:
+            return JsonResponse(
+                {'error': 'Já existe um ponto de entrada em aberto.', 'active': ClockService.as_dict(e.session)},
+                status=409
+            )
+        if student_id:
+            from .billing_services import StudentBillingService
+            StudentBillingService.create_bill_item_for_work_session(session)
+        return JsonResponse({'session': ClockService.as_dict(session)}, status=201)
+
+    if action == 'out':
+        session = ClockService.clock_out(teacher_id)
+        if session is None:
+            return _error('Nenhum ponto de entrada em aberto.', 409)
+        if session.student_id:
+            from .billing_services import StudentBillingService
+            StudentBillingService.create_bill_item_for_work_session(session)
+        return JsonResponse({'session': ClockService.as_dict(session)})
+
+    return _error("action deve ser 'in' ou 'out'.", 400)
+
+
+def _event_time(value, now, earliest):
+    """
+    The event's ISO 8601 'at' timestamp (naive ones are local time), or now. Raises
+    ValueError for timestamps in the future or before `earliest`.
+    """
+    if value in (None, ''):
+        return now
+    parsed = parse_datetime(value) if isinstance(value, str) else None
+    if parsed is None:
+        raise ValueError('at deve ser uma data/hora ISO 8601.')
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    if parsed > now + CLOCK_SKEW:
+        raise ValueError('at está no futuro.')
+    if parsed < earliest:
+        raise ValueError('at é anterior ao permitido para este pedido.')
+    return parsed
+
+
+@require_POST
+def clock_batch(request):
+    """
+    Apply many clock events in one request, for kiosks that queue taps (possibly offline)
+    and sync them later.
+
+    The body is a JSON list of events, or {"events": [...]}. Each event has an action
+    ('in' or 'out'), a teacher id (teachers may leave it out and can only send their
+    own), for 'in' a task and optionally a student, and optionally 'at', the ISO 8601
+    time of the tap (default: now). Only superuser (kiosk) accounts may backdate taps,
+    by up to settings.CLOCK_OFFLINE_WINDOW seconds; teachers' taps must be current.
+    Events are applied in order, in one transaction, with teachers, tasks, students and
+    open sessions loaded up front.
+
+    Returns 200 with one result per event: {"index", "status", "session"} or
+    {"index", "status", "error"}, where status is what clock_api would have answered
+    for that event alone (201, 200, 400, 403 or 409). A failed event does not stop
+    the rest.
+    """
+    user = request.user
+    if not user.is_authenticated:
+        return _error('Autenticação necessária.', 401)
+    own_id = None
+    if not user.is_superuser:
+        own_id = Teacher.objects.filter(user=user).values_list('id', flat=True).first() if user.is_teacher else None
+        if own_id is None:
+            return _error('Sem permissão para registrar ponto.', 403)
+
+    try:
+        events = json.loads(request.body or b'null')
+    except ValueError:
+        return _error('Corpo JSON inválido.', 400)
+    if isinstance(events, dict):
+        events = events.get('events')
+    if not isinstance(events, list) or not events:
+        return _error('Envie uma lista de eventos.', 400)
+    if len(events) > MAX_BATCH_EVENTS:
+        return _error(f'No máximo {MAX_BATCH_EVENTS} eventos por pedido.', 400)
+    events = [event if isinstance(event, dict) else {} for event in events]
+
+    # Everything the events refer to, in one query per model
+    def ids(key):
+        return {_int_or_none(event.get(key)) for event in events} - {None}
+    teacher_ids = set(Teacher.objects.filter(pk__in=ids('teacher')).values_list('id', flat=True))
+    if own_id is not None:
+        teacher_ids.add(own_id)
+    tasks = Task.objects.in_bulk(ids('task'))
+    student_ids = set(Student.objects.filter(pk__in=ids('student')).values_list('id', flat=True))
+    now = timezone.now()
+    # Teachers' own taps are live, so they cannot invent hours in past (reported, paid) months
+    if own_id is None:
+        earliest = now - timedelta(seconds=settings.CLOCK_OFFLINE_WINDOW)
+    else:
+        earliest = now - CLOCK_SKEW
+
+    results, billable = [], {}
+    with transaction.atomic():
+        open_sessions = {
+            session.teacher_id: session for session in ClockService.open_sessions().filter(teacher_id__in=teacher_ids)
+        }
+
+        def fail(index, status, message, **extra):
+            results.append({'index': index, 'status': status, 'error': message, **extra})
+
+        for index, event in enumerate(events):
+            teacher_id = own_id if event.get('teacher') in (None, '') else _int_or_none(event.get('teacher'))
+            if own_id is not None and teacher_id != own_id:
+                fail(index, 403, 'Você só pode registrar o seu próprio ponto.')
+                continue
+            if teacher_id not in teacher_ids:
+                fail(index, 400, 'Professor não encontrado.')
+                continue
+            try:
+                at = _event_time(event.get('at'), now, earliest)
+            except ValueError as e:
+                fail(index, 400, str(e))
+                continue
+            action = event.get('action')
+
+            if action == 'in':
+                task = tasks.get(_int_or_none(event.get('task')))
+                if task is None:
+                    fail(index, 400, 'Tarefa não encontrada.')
+                    continue
+                student_id = None
+                if event.get('student') not in (None, ''):
+                    student_id = _int_or_none(event.get('student'))
+                    if student_id not in student_ids:
+                        fail(index, 400, 'Cliente não encontrado.')
+                        continue
+                if teacher_id in open_sessions:
+                    fail(index, 409, 'Já existe um ponto de entrada em aberto.',
+                         active=ClockService.as_dict(open_sessions[teacher_id]))
+                    continue
+                try:
+                    session = ClockService.clock_in(teacher_id, task, student_id, now=at)
+                except AlreadyClockedIn as e:
+                    # Opened by another device since the sessions were loaded
+                    open_sessions[teacher_id] = e.session
+                    fail(index, 409, 'Já existe um ponto de entrada em aberto.', active=ClockService.as_dict(e.session))
+                    continue
+                open_sessions[teacher_id] = session
+                results.append({'index': index, 'status': 201, 'session': ClockService.as_dict(session)})
+
+            elif action == 'out':
+                active = open_sessions.get(teacher_id)
+                if active is not None and at < active.clock_in:
+                    fail(index, 400, 'A saída não pode ser anterior à entrada.')
+                    continue
+                session = ClockService.clock_out(teacher_id, session_id=active.pk if active else None, now=at)
+                if session is None:
+                    open_sessions.pop(teacher_id, None)
+                    fail(index, 409, 'Nenhum ponto de entrada em aberto.')
+                    continue
+                open_sessions.pop(teacher_id, None)
+                results.append({'index': index, 'status': 200, 'session': ClockService.as_dict(session)})
+
+            else:
+                fail(index, 400, "action deve ser 'in' ou 'out'.")
+                continue
+            if session.student_id:
+                # A session opened and closed in the same batch is billed once, closed
+                billable[session.pk] = session
+
+    if billable:
+        from .billing_services import StudentBillingService
+        for session in billable.values():
+            StudentBillingService.create_bill_item_for_work_session(session)
+    return JsonResponse({'results': results})
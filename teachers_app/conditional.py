@@ -0,0 +1,115 @@
+"""
+Conditional GET (ETag / Last-Modified) for pages that only change with their rows.
+
+A page's state is the newest updated_at and the row count of each source it is rendered
+from, read with one query of scalar subqueries. The ETag hashes that state together with
+the user and their CSRF secret (the page carries both); Last-Modified is the newest
+timestamp. A request whose validators still match gets a 304 before the view runs.
+"""
+import hashlib
+from functools import wraps
+from django.contrib import messages
+from django.middleware.csrf import get_token
+from django.db.models import Count, Max, OuterRef, Q, Subquery
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from .billing_models import Bill, BillItem
+from .models import Teacher, WorkSession, SalaryReport, MonthlyStudentTotals
+from .services import BulkSalaryService
+
+
+def source_state(prefix, queryset, group_by, updated='updated_at', count=True):
+    """
+    Scalar subqueries for the newest `updated` value and the row count of a queryset that is
+    filtered (through OuterRef) on the `group_by` column, named <prefix>_updated / <prefix>_count.
+    The count catches deleted rows, which take their timestamps with them.
+    """
+    grouped = queryset.order_by().values(group_by)
+    state = {f'{prefix}_updated': Subquery(grouped.annotate(value=Max(updated)).values('value')[:1])}
+    if count:
+        state[f'{prefix}_count'] = Subquery(grouped.annotate(value=Count('pk')).values('value')[:1])
+    return state
+
+
+def page_state(queryset, **annotations):
+    """
+    Evaluate the annotations on the single row of `queryset`. Returns (last modified, state),
+    or None when there is no row.
+    """
+    row = queryset.annotate(**annotations).values(*annotations).first()
+    if row is None:
+        return None
+    timestamps = [value for name, value in row.items() if name.endswith('_updated') and value is not None]
+    return (max(timestamps) if timestamps else None), tuple(sorted(row.items()))
+
+
+def salary_report_state(request, teacher_id, year, month):
+    """State of view_salary_report: the teacher-month's sessions (and their tasks) and reports"""
+    teachers = Teacher.objects.filter(pk=teacher_id)
+    if not request.user.is_inspector_effective:
+        # Other teachers are turned away by the view, without validators
+        teachers = teachers.filter(user=request.user)
+    start, end = BulkSalaryService.month_range(year, month)
+    # The view lists the report's sessions by created_at, or by start_time without a report
+    sessions = WorkSession.objects.filter(
+        Q(created_at__gte=start, created_at__lt=end) | Q(start_time__gte=start, start_time__lt=end),
+        teacher=OuterRef('pk'),
+    )
+    return page_state(
+        teachers,
+        **source_state('sessions', sessions, 'teacher'),
+        **source_state('tasks', sessions, 'teacher', updated='task__updated_at', count=False),
+        # Deleted reports too: deleting one changes the page
+        **source_state('reports', SalaryReport.objects.filter(teacher=OuterRef('pk'), start_date=start), 'teacher'),
+    )
+
+
+def bill_state(request, bill_id):
+    """State of bill_detail: the bill, its items, and the sessions and rollup of its student-month"""
+    sessions = WorkSession.objects.filter(student=OuterRef('student'), effective_month=OuterRef('month'))
+    return page_state(
+        Bill.objects.filter(pk=bill_id),
+        **source_state('bill', Bill.objects.filter(pk=OuterRef('pk')), 'pk', count=False),
+        **source_state('items', BillItem.objects.filter(bill=OuterRef('pk')), 'bill'),
+        **source_state('sessions', sessions, 'student'),
+        **source_state('tasks', sessions, 'student', updated='task__updated_at', count=False),
+        **source_state(
+            'totals', MonthlyStudentTotals.objects.filter(student=OuterRef('student'), month=OuterRef('month')), 'student'
+        ),
+    )
+
+
+def conditional_page(state_func):
+    """
+    Answer GET/HEAD requests for a page with 304 Not Modified when the client's ETag or
+    Last-Modified still match state_func(request, *args, **kwargs), without running the view.
+    Responses are marked private and must be revalidated, so browsers always ask.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            # Pending flash messages are shown by the page itself, so it has to be rendered
+            if request.method not in ('GET', 'HEAD') or len(messages.get_messages(request)):
+                return view(request, *args, **kwargs)
+            state = state_func(request, *args, **kwargs)
+            if state is None:
+                return view(request, *args, **kwargs)
+
+            last_modified, rows = state
+            # The CSRF secret the page's forms will use (get_token sets one up on a first visit)
+            get_token(request)
+            fingerprint = repr((request.user.pk, request.META.get('CSRF_COOKIE'), rows))
+            etag = quote_etag(hashlib.md5(fingerprint.encode(), usedforsecurity=False).hexdigest())
+            timestamp = int(last_modified.timestamp()) if last_modified else None
+
+            response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+            if response is None:
+                response = view(request, *args, **kwargs)
+            if response.status_code in (200, 304):
+                response.headers.setdefault('ETag', etag)
+                if timestamp is not None:
+                    response.headers.setdefault('Last-Modified', http_date(timestamp))
+                patch_cache_control(response, private=True, no_cache=True)
+            return response
+        return wrapper
+    return decorator
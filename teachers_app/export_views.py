@@ -0,0 +1,65 @@
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from .models import WorkSession
+from .forms import WorkSessionFilterForm
+from . import exports
+
+
+def _int_param(request, name):
+    try:
+        return int(request.GET.get(name, ''))
+    except ValueError:
+        return None
+
+
+def _period(request):
+    """(year, month) from the query string, or (None, None) when missing or invalid"""
+    year, month = _int_param(request, 'year'), _int_param(request, 'month')
+    if year and month and 1 <= month <= 12:
+        return year, month
+    return None, None
+
+
+def _csv_response(filename, header, rows, name):
+    response = StreamingHttpResponse(
+        exports.csv_lines(header, rows, exports.ExportStats(name)),
+        content_type='text/csv; charset=utf-8'
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+@login_required
+@user_passes_test(lambda u: u.is_superuser)
+def export_work_sessions(request):
+    """Stream work sessions as CSV, filtered with the list_work_sessions filter form"""
+    work_sessions = WorkSession.objects.filter(is_deleted=False)
+    form = WorkSessionFilterForm(request.GET or None)
+    if form.is_valid():
+        work_sessions = form.filter_queryset(work_sessions)
+    header, rows = exports.work_session_rows(work_sessions)
+    filename = f"work_sessions_{timezone.localdate():%Y%m%d}.csv"
+    return _csv_response(filename, header, rows, 'work session')
+
+
+@login_required
+@user_passes_test(lambda u: u.is_inspector_effective, login_url=None)
+def export_salary_reports(request):
+    """Stream salary reports as CSV; optional teacher, year and month filters"""
+    year, month = _period(request)
+    reports = exports.filtered_salary_reports(_int_param(request, 'teacher'), year, month)
+    header, rows = exports.salary_report_rows(reports)
+    period = f"{year}{month:02d}" if year and month else f"{timezone.localdate():%Y%m%d}"
+    return _csv_response(f"salary_reports_{period}.csv", header, rows, 'salary report')
+
+
+@login_required
+@user_passes_test(lambda u: u.is_inspector_effective, login_url=None)
+def export_bills(request):
+    """Stream bills and their items as CSV; optional student, year and month filters"""
+    year, month = _period(request)
+    bills = exports.filtered_bills(_int_param(request, 'student'), year, month)
+    header, rows = exports.bill_rows(bills)
+    period = f"{year}{month:02d}" if year and month else f"{timezone.localdate():%Y%m%d}"
+    return _csv_response(f"bills_{period}.csv", header, rows, 'bill item')
@@ -0,0 +1,124 @@
+import csv
+import logging
+import time
+from datetime import date
+from django.db.models import Q
+from django.utils import timezone
+from .models import SalaryReport
+from .billing_models import Bill
+from .services import BulkSalaryService
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched per database round trip; with PostgreSQL this is a server-side cursor
+CHUNK_SIZE = 2000
+
+
+class Echo:
+    """File-like object whose write() returns the line, so csv.writer can feed a generator"""
+
+    def write(self, value):
+        return value
+
+
+class ExportStats:
+    def __init__(self, name):
+        self.name = name
+        self.rows = 0
+        self.started = time.perf_counter()
+        self.seconds = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+def csv_lines(header, rows, stats=None):
+    """
+    Yield CSV-encoded lines for the header and each row. Only one chunk of rows is
+    held in memory at a time. When the rows are exhausted the throughput is stored
+    on stats and logged.
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+    count = 0
+    for row in rows:
+        count += 1
+        yield writer.writerow(row)
+    if stats is not None:
+        stats.rows = count
+        stats.seconds = time.perf_counter() - stats.started
+        logger.info("Exported %d %s rows in %.2fs (%.0f rows/s)",
+                    count, stats.name, stats.seconds, stats.rows_per_second)
+
+
+def _local(value, fmt='%Y-%m-%d %H:%M'):
+    return timezone.localtime(value).strftime(fmt) if value else ''
+
+
+def work_session_rows(queryset):
+    """(header, rows) for work sessions, filtered like list_work_sessions"""
+    header = ['id', 'date', 'created_at', 'teacher', 'student', 'task', 'entry_type',
+              'hours', 'hourly_rate', 'teacher_payment', 'student_billing']
+    rows = queryset.order_by('created_at', 'id').values_list(
+        'id', 'effective_date', 'created_at', 'teacher__user__username', 'student__user__username',
+        'task__name', 'entry_type', 'stored_hours', 'hourly_rate', 'teacher_payment_amount', 'total_amount'
+    ).iterator(chunk_size=CHUNK_SIZE)
+    return header, (
+        (pk, day or '', _local(created), teacher, student or '', task, entry_type,
+         hours if hours is not None else '', rate if rate is not None else '',
+         payment if payment is not None else '', billing if billing is not None else '')
+        for pk, day, created, teacher, student, task, entry_type, hours, rate, payment, billing in rows
+    )
+
+
+def salary_report_rows(queryset):
+    """(header, rows) for salary reports, filtered like list_salary_reports"""
+    # Stale totals are refreshed first so the export never ships outdated amounts
+    BulkSalaryService.refresh_report_totals(
+        queryset.filter(Q(is_stale=True) | Q(total_amount__isnull=True))
+    )
+    header = ['id', 'teacher', 'month', 'total_hours', 'total_amount', 'created_at', 'created_by', 'notes']
+    rows = queryset.order_by('start_date', 'teacher_id', 'id').values_list(
+        'id', 'teacher__user__username', 'start_date', 'total_hours', 'total_amount',
+        'created_at', 'created_by__username', 'notes'
+    ).iterator(chunk_size=CHUNK_SIZE)
+    return header, (
+        (pk, teacher, _local(start, '%Y-%m'), hours, amount, _local(created), created_by or '', notes)
+        for pk, teacher, start, hours, amount, created, created_by, notes in rows
+    )
+
+
+def bill_rows(queryset):
+    """(header, rows) with one row per bill item; bills without items get one row with empty item columns"""
+    header = ['bill_id', 'student', 'month', 'bill_total', 'is_paid', 'payment_date',
+              'item', 'quantity', 'unit_price', 'amount']
+    rows = queryset.order_by('month', 'student_id', 'id', 'items__id').values_list(
+        'id', 'student__user__username', 'month', 'total_amount', 'is_paid', 'payment_date',
+        'items__service_name', 'items__quantity', 'items__service_price_at_billing', 'items__amount'
+    ).iterator(chunk_size=CHUNK_SIZE)
+    return header, (
+        (pk, student, month.strftime('%Y-%m'), total, 'yes' if paid else 'no', _local(paid_on),
+         item or '', quantity if quantity is not None else '', price if price is not None else '',
+         amount if amount is not None else '')
+        for pk, student, month, total, paid, paid_on, item, quantity, price, amount in rows
+    )
+
+
+def filtered_salary_reports(teacher_id=None, year=None, month=None):
+    reports = SalaryReport.objects.filter(is_deleted=False)
+    if teacher_id:
+        reports = reports.filter(teacher_id=teacher_id)
+    if year and month:
+        start_date, _ = BulkSalaryService.month_range(year, month)
+        reports = reports.filter(start_date=start_date)
+    return reports
+
+
+def filtered_bills(student_id=None, year=None, month=None):
+    bills = Bill.objects.all()
+    if student_id:
+        bills = bills.filter(student_id=student_id)
+    if year and month:
+        bills = bills.filter(month=date(year, month, 1))
+    return bills
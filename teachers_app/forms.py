@@ -1,6 +1,7 @@
 from django import forms
 from django.contrib.auth.forms import PasswordChangeForm, UserCreationForm
 from django.utils import timezone
+from datetime import datetime, time, timedelta
 from .models import Teacher, CustomUser, Task, WorkSession, SalaryReport, Student, Service
 from .billing_models import BillItem
 
@@ -149,11 +150,33 @@ class WorkSessionTimeRangeForm(forms.ModelForm):
 
 class WorkSessionFilterForm(forms.Form):
     """
-    Form for filtering recent work sessions.
+    Form for filtering work session lists.
     """
-    task = forms.ModelChoiceField(queryset=Task.objects.all(), required=False, label="Tarefa")
-    start_date = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}), label="Data Inicial")
-    end_date = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}), label="Data Final")
+    teacher = forms.ModelChoiceField(
+        queryset=Teacher.objects.select_related('user'), required=False, label="Trabalhador",
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    task = forms.ModelChoiceField(
+        queryset=Task.objects.all(), required=False, label="Tarefa",
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    start_date = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}), label="Data Inicial")
+    end_date = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}), label="Data Final")
+
+    def filter_queryset(self, queryset):
+        """Apply the cleaned filters to a WorkSession queryset (call after is_valid())"""
+        if self.cleaned_data.get('teacher'):
+            queryset = queryset.filter(teacher=self.cleaned_data['teacher'])
+        if self.cleaned_data.get('task'):
+            queryset = queryset.filter(task=self.cleaned_data['task'])
+        # Compare against aware datetimes instead of created_at__date so the index can be used
+        if self.cleaned_data.get('start_date'):
+            start = timezone.make_aware(datetime.combine(self.cleaned_data['start_date'], time.min))
+            queryset = queryset.filter(created_at__gte=start)
+        if self.cleaned_data.get('end_date'):
+            end = timezone.make_aware(datetime.combine(self.cleaned_data['end_date'] + timedelta(days=1), time.min))
+            queryset = queryset.filter(created_at__lt=end)
+        return queryset
 
 
 class AddTeacherForm(forms.Form):
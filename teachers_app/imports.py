@@ -0,0 +1,230 @@
+import csv
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from . import calculations
+from .models import Teacher, Student, Task, WorkSession, SalaryReport
+from .services import BulkSalaryService, FragmentCacheService, MonthlyTotalsService, SalaryCacheService
+
+logger = logging.getLogger(__name__)
+
+# Rows validated, inserted and committed together
+BATCH_SIZE = 2000
+
+REQUIRED_COLUMNS = ('teacher', 'task', 'entry_type')
+OPTIONAL_COLUMNS = ('student', 'hours', 'clock_in', 'clock_out', 'start_time', 'end_time',
+                    'created_at', 'hourly_rate')
+ENTRY_TYPES = {choice for choice, _ in WorkSession.ENTRY_TYPE_CHOICES}
+
+
+class ImportFileError(ValueError):
+    """The file itself cannot be imported (missing columns); bad rows are reported instead"""
+
+
+class ImportStats:
+    def __init__(self):
+        self.rows = 0
+        self.imported = 0
+        self.errors = []
+        self.started = time.perf_counter()
+        self.seconds = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.imported / self.seconds if self.seconds else 0.0
+
+
+class Lookups:
+    """Teachers, students and tasks preloaded into dicts, so rows never query for them"""
+
+    def __init__(self):
+        self.teachers = dict(Teacher.objects.values_list('user__username', 'id'))
+        self.students = dict(Student.objects.values_list('user__username', 'id'))
+        self.tasks = {}
+        self.task_names = defaultdict(list)
+        for pk, name, hourly_rate, price in Task.objects.values_list('id', 'name', 'hourly_rate', 'price'):
+            self.tasks[pk] = (hourly_rate, price)
+            self.task_names[name].append(pk)
+
+    def task_id(self, value):
+        if value.isdigit() and int(value) in self.tasks:
+            return int(value)
+        ids = self.task_names.get(value, [])
+        if len(ids) != 1:
+            raise ValueError(f"task {value!r} {'is ambiguous' if ids else 'not found'}")
+        return ids[0]
+
+
+def _datetime(value, column):
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"{column}: invalid date/time {value!r}")
+        parsed = datetime(day.year, day.month, day.day)
+    return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
+
+
+def _decimal(value, column):
+    try:
+        number = Decimal(value)
+    except InvalidOperation:
+        raise ValueError(f"{column}: invalid number {value!r}") from None
+    if not number.is_finite() or number < 0 or number.as_tuple().exponent < -2:
+        raise ValueError(f"{column}: expected a non-negative number with at most 2 decimals, got {value!r}")
+    return number
+
+
+def compute_amounts(entries, tasks):
+    """
+    Fill stored_hours, hourly_rate, total_amount and teacher_payment_amount for a batch
+    of new sessions with the rules of WorkSession.save() (see calculations.py). An
+    hourly_rate already set (a historical rate from the file) is kept; otherwise the
+    task's current rate is used, as save() does. `tasks` maps task ids to (hourly_rate, price).
+    """
+    for entry in entries:
+        if entry.hourly_rate is None:
+            entry.hourly_rate = tasks[entry.task_id][0]
+    calculations.apply_to_sessions(entries, {task_id: price for task_id, (_, price) in tasks.items()})
+    for entry in entries:
+        entry.set_effective_date()
+    return entries
+
+
+def parse_row(row, lookups):
+    """Build an unsaved WorkSession from a CSV row, raising ValueError with a readable message"""
+    def get(column):
+        return (row.get(column) or '').strip()
+
+    teacher_id = lookups.teachers.get(get('teacher'))
+    if teacher_id is None:
+        raise ValueError(f"teacher {get('teacher')!r} not found")
+    task_id = lookups.task_id(get('task'))
+    student_id = None
+    if get('student'):
+        student_id = lookups.students.get(get('student'))
+        if student_id is None:
+            raise ValueError(f"student {get('student')!r} not found")
+    entry_type = get('entry_type')
+    if entry_type not in ENTRY_TYPES:
+        raise ValueError(f"entry_type must be one of {', '.join(sorted(ENTRY_TYPES))}, got {entry_type!r}")
+
+    entry = WorkSession(
+        teacher_id=teacher_id, task_id=task_id, student_id=student_id, entry_type=entry_type,
+        hourly_rate=_decimal(get('hourly_rate'), 'hourly_rate') if get('hourly_rate') else None,
+    )
+    # Same requirements as WorkSession.clean(); imported clock sessions must be closed
+    if entry_type == 'manual':
+        if not get('hours'):
+            raise ValueError("manual entries require hours")
+        entry.manual_hours = _decimal(get('hours'), 'hours')
+        if entry.manual_hours >= 1000:
+            raise ValueError(f"hours: {entry.manual_hours} is too large")
+        start = None
+    elif entry_type == 'clock':
+        entry.clock_in, entry.clock_out = _datetime(get('clock_in'), 'clock_in'), _datetime(get('clock_out'), 'clock_out')
+        if not entry.clock_in or not entry.clock_out or entry.clock_in >= entry.clock_out:
+            raise ValueError("clock entries require clock_in before clock_out")
+        start = entry.clock_in
+    else:
+        entry.start_time, entry.end_time = _datetime(get('start_time'), 'start_time'), _datetime(get('end_time'), 'end_time')
+        if not entry.start_time or not entry.end_time or entry.start_time >= entry.end_time:
+            raise ValueError("time_range entries require start_time before end_time")
+        start = entry.start_time
+    # Salary months follow created_at: default to when the work started, or now for manual entries
+    entry.created_at = _datetime(get('created_at'), 'created_at') or start or timezone.now()
+    return entry
+
+
+def _insert(entries, rollups):
+    """
+    bulk_create a batch in its own transaction and do the work the WorkSession signals
+    would have done: flag the salary reports of the touched teacher-months as stale and
+    drop their cached salary calculations. The batch's rollup contributions are summed
+    into `rollups`, which the caller applies once for the whole import.
+    """
+    teacher_months = {SalaryCacheService.session_month(entry) for entry in entries}
+    stale = Q()
+    for teacher_id, year, month in teacher_months:
+        stale |= Q(teacher_id=teacher_id, start_date=BulkSalaryService.month_range(year, month)[0])
+    with transaction.atomic():
+        WorkSession.objects.bulk_create(entries)
+        SalaryReport.objects.filter(stale, is_stale=False).update(is_stale=True)
+    SalaryCacheService.invalidate_many(teacher_months)
+    FragmentCacheService.touch_many(FragmentCacheService.STUDENT, {entry.student_id for entry in entries})
+
+    # Only committed batches count towards the rollups
+    for entry in entries:
+        for key, values in MonthlyTotalsService.session_contributions(entry).items():
+            for field, value in values.items():
+                rollups[key][field] += value
+
+
+def insert_work_sessions(entries, lookups):
+    """
+    Compute and insert sessions built by parse_row() as one batch: one bulk_create, the
+    signal side effects of _insert() and the rollup increments, all in one transaction.
+    Returns the entries, with their ids.
+    """
+    rollups = defaultdict(lambda: defaultdict(Decimal))
+    compute_amounts(entries, lookups.tasks)
+    with transaction.atomic():
+        _insert(entries, rollups)
+        MonthlyTotalsService.apply_many(rollups)
+    return entries
+
+
+def import_work_sessions(lines, batch_size=BATCH_SIZE, dry_run=False, stats=None):
+    """
+    Import work sessions from CSV lines (any iterable of strings, e.g. an open file).
+    Rows are streamed: each batch is validated, computed with compute_amounts() and
+    inserted with bulk_create in its own transaction. Invalid rows are skipped and
+    collected in stats.errors as (line number, message). Returns the stats.
+
+    The monthly rollups are updated once at the end (also when a later batch fails),
+    since a batch usually touches most of the same teacher- and student-months.
+    """
+    stats = stats or ImportStats()
+    reader = csv.DictReader(lines)
+    missing = [column for column in REQUIRED_COLUMNS if column not in (reader.fieldnames or [])]
+    if missing:
+        raise ImportFileError(f"Missing required columns: {', '.join(missing)}")
+
+    lookups = Lookups()
+    batch = []
+    rollups = defaultdict(lambda: defaultdict(Decimal))
+
+    def flush():
+        compute_amounts(batch, lookups.tasks)
+        if not dry_run:
+            _insert(batch, rollups)
+        stats.imported += len(batch)
+        batch.clear()
+
+    try:
+        for row in reader:
+            stats.rows += 1
+            try:
+                batch.append(parse_row(row, lookups))
+            except ValueError as e:
+                stats.errors.append((reader.line_num, str(e)))
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+    finally:
+        with transaction.atomic():
+            MonthlyTotalsService.apply_many(rollups)
+
+    stats.seconds = time.perf_counter() - stats.started
+    logger.info("Imported %d of %d work session rows in %.2fs (%.0f rows/s), %d errors",
+                stats.imported, stats.rows, stats.seconds, stats.rows_per_second, len(stats.errors))
+    return stats
@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.db import models
+
+
+# BackgroundJob Model - database queue for long-running month-end work
+class BackgroundJob(models.Model):
+    KIND_CHOICES = [
+        ('salary_reports', 'Relatórios de salário em lote'),
+        ('bill_students', 'Faturação em lote'),
+    ]
+    STATUS_CHOICES = [
+        ('queued', 'Em fila'),
+        ('running', 'Em execução'),
+        ('succeeded', 'Concluído'),
+        ('failed', 'Falhou'),
+    ]
+
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    progress_done = models.PositiveIntegerField(default=0)
+    progress_total = models.PositiveIntegerField(default=0)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_after = models.DateTimeField(help_text="The job is not picked up before this time (used for retry backoff)")
+    locked_by = models.CharField(max_length=100, blank=True)
+    result = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='background_jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(
+        null=True, blank=True,
+        help_text="Refreshed by the worker with each progress update; running jobs without one for too long are requeued"
+    )
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Workers poll for the oldest due job in the queue
+            models.Index(fields=['status', 'run_after'], name='job_status_run_after_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.pk} ({self.get_status_display()})"
+
+    @property
+    def progress_percent(self):
+        if not self.progress_total:
+            return 100 if self.status == 'succeeded' else 0
+        return int(self.progress_done * 100 / self.progress_total)
+
+    @property
+    def is_finished(self):
+        return self.status in ('succeeded', 'failed')
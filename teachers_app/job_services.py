@@ -0,0 +1,166 @@
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, timedelta
+from django.db import connections
+from django.db.models import F, Q
+from django.utils import timezone
+from .job_models import BackgroundJob
+import traceback
+
+RETRY_BACKOFF = timedelta(seconds=30)
+
+
+def _init_pool_worker():
+    """Make sure Django is set up in pool processes started with spawn/forkserver"""
+    import django
+    django.setup()
+
+
+def run_job_chunk(kind, params, items):
+    """
+    Process one chunk of a job's (owner_id, action) items and return a Counter of
+    results: one count per action ('created', 'updated', 'skipped') plus row counts.
+    Module level so it can be sent to a process pool.
+    """
+    from .services import BulkSalaryService
+    from .billing_services import BulkBillingService
+    from .models import CustomUser
+
+    actions = dict(items)
+    counts = Counter()
+    if kind == 'salary_reports':
+        created_by = CustomUser.objects.filter(pk=params.get('created_by')).first()
+        results = BulkSalaryService.apply(params['year'], params['month'], actions, created_by=created_by)
+    elif kind == 'bill_students':
+        results, stats = BulkBillingService.apply(date(params['year'], params['month'], 1), actions)
+        counts.update({key: value for key, value in stats.items() if key != 'elapsed_ms'})
+    else:
+        raise ValueError(f"Unknown job kind: {kind}")
+    counts.update(action for _, action in results)
+    return counts
+
+
+class JobService:
+    @staticmethod
+    def enqueue(kind, year, month, actions, created_by=None, max_attempts=3):
+        """
+        Queue a bulk month-end job. actions maps teacher/student id to 'create', 'update'
+        or 'skip', as in BulkSalaryService.apply and BulkBillingService.apply.
+        """
+        return BackgroundJob.objects.create(
+            kind=kind,
+            params={
+                'year': year,
+                'month': month,
+                'actions': {str(owner_id): action for owner_id, action in actions.items()},
+                'created_by': created_by.pk if created_by else None,
+            },
+            progress_total=len(actions),
+            max_attempts=max_attempts,
+            run_after=timezone.now(),
+            created_by=created_by,
+        )
+
+    @staticmethod
+    def claim_next(worker_name):
+        """
+        Atomically take the oldest due queued job. The conditional UPDATE makes sure only
+        one worker gets a job even on backends without SELECT ... FOR UPDATE SKIP LOCKED.
+        """
+        while True:
+            job_id = BackgroundJob.objects.filter(
+                status='queued', run_after__lte=timezone.now()
+            ).order_by('run_after', 'id').values_list('id', flat=True).first()
+            if job_id is None:
+                return None
+            claimed = BackgroundJob.objects.filter(pk=job_id, status='queued').update(
+                status='running',
+                locked_by=worker_name,
+                started_at=timezone.now(),
+                heartbeat_at=timezone.now(),
+                attempts=F('attempts') + 1,
+                progress_done=0,
+            )
+            if claimed:
+                return BackgroundJob.objects.get(pk=job_id)
+
+    @staticmethod
+    def requeue_stale(older_than):
+        """
+        Put back running jobs whose worker died, i.e. whose heartbeat is older than older_than.
+        Jobs that have used up their attempts are marked failed instead, so a job that kills
+        its worker every time is not retried forever. Returns (requeued, failed).
+        """
+        now = timezone.now()
+        cutoff = now - older_than
+        stale = BackgroundJob.objects.filter(
+            Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff), status='running'
+        )
+        failed = stale.filter(attempts__gte=F('max_attempts')).update(
+            status='failed', locked_by='', finished_at=now,
+            error=f"O worker deixou de responder (sem sinal desde antes de {timezone.localtime(cutoff):%Y-%m-%d %H:%M})."
+        )
+        requeued = stale.update(status='queued', locked_by='', run_after=now)
+        return requeued, failed
+
+    @staticmethod
+    def heartbeat(job, progress_done):
+        """Record progress, which also tells requeue_stale the worker is alive"""
+        BackgroundJob.objects.filter(pk=job.pk).update(progress_done=progress_done, heartbeat_at=timezone.now())
+
+    @staticmethod
+    def chunks(job, chunk_size):
+        items = sorted((int(owner_id), action) for owner_id, action in job.params.get('actions', {}).items())
+        return [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+    @staticmethod
+    def run(job, chunk_size=200, processes=1):
+        """
+        Run a claimed job chunk by chunk, recording progress (and a heartbeat) after each
+        chunk, so the stale timeout of run_jobs must be longer than one chunk takes.
+        Chunks commit separately. Re-running a chunk is harmless ('create' skips owners
+        that already have a row), so a retry simply starts over.
+        """
+        counts = Counter()
+        done = 0
+        try:
+            chunks = JobService.chunks(job, chunk_size)
+            if processes > 1 and len(chunks) > 1:
+                # Children must not share the parent's database connection
+                connections.close_all()
+                with ProcessPoolExecutor(max_workers=processes, initializer=_init_pool_worker) as pool:
+                    futures = {pool.submit(run_job_chunk, job.kind, job.params, chunk): len(chunk) for chunk in chunks}
+                    for future in as_completed(futures):
+                        counts.update(future.result())
+                        done += futures[future]
+                        JobService.heartbeat(job, done)
+            else:
+                for chunk in chunks:
+                    counts.update(run_job_chunk(job.kind, job.params, chunk))
+                    done += len(chunk)
+                    JobService.heartbeat(job, done)
+        except Exception:
+            JobService.fail(job, traceback.format_exc())
+            return job
+
+        job.status = 'succeeded'
+        job.progress_done = done
+        job.result = dict(counts)
+        job.error = ''
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'progress_done', 'result', 'error', 'finished_at'])
+        return job
+
+    @staticmethod
+    def fail(job, error):
+        """Schedule a retry with exponential backoff, or mark the job failed after max_attempts"""
+        job.refresh_from_db(fields=['attempts', 'max_attempts', 'progress_done'])
+        job.error = error
+        if job.attempts < job.max_attempts:
+            job.status = 'queued'
+            job.locked_by = ''
+            job.run_after = timezone.now() + RETRY_BACKOFF * (2 ** (job.attempts - 1))
+        else:
+            job.status = 'failed'
+            job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'locked_by', 'run_after', 'error', 'finished_at'])
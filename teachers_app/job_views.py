@@ -0,0 +1,19 @@
+from django.shortcuts import render, get_object_or_404
+from django.contrib.auth.decorators import login_required, user_passes_test
+from .job_models import BackgroundJob
+
+
+@login_required
+@user_passes_test(lambda u: u.is_superuser or u.is_inspector, login_url=None)
+def list_jobs(request):
+    """Recent background jobs"""
+    jobs = BackgroundJob.objects.select_related('created_by')[:50]
+    return render(request, 'superuser/list_jobs.html', {'jobs': jobs})
+
+
+@login_required
+@user_passes_test(lambda u: u.is_superuser or u.is_inspector, login_url=None)
+def job_detail(request, job_id):
+    """Status and progress of one background job; the page refreshes itself until the job finishes"""
+    job = get_object_or_404(BackgroundJob.objects.select_related('created_by'), pk=job_id)
+    return render(request, 'superuser/job_detail.html', {'job': job})
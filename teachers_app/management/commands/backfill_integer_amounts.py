@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from teachers_app.services import IntegerColumnsService
+
+
+class Command(BaseCommand):
+    help = (
+        'Fill the integer hours/cents columns of work sessions and bill items from their Decimal columns. '
+        'Needed after rows were written with bulk_create() or update(), which skip save().'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Recompute every row instead of only rows with empty integer columns')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Bill items per batch (default: 2000)')
+
+    def handle(self, *args, **options):
+        sessions, items = IntegerColumnsService.backfill(
+            only_missing=not options['all'], batch_size=options['batch_size']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Backfilled {sessions} work session columns and {items} bill items."
+        ))
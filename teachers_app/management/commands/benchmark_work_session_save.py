@@ -0,0 +1,69 @@
+import logging
+import os
+import time
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from teachers_app.models import CustomUser, Teacher, Task, WorkSession
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure WorkSession.save() throughput with the app logger at DEBUG (development profile) '
+        'and at INFO (production profile). Everything is written inside a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=500, help='Sessions saved per run (default: 500)')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per level; the best one is reported (default: 3)')
+
+    def run_saves(self, count):
+        """Save `count` manual sessions and return the elapsed seconds; nothing is kept"""
+        elapsed = 0.0
+        try:
+            with transaction.atomic():
+                user = CustomUser.objects.create_user(username='benchmark_save_teacher', password=None, is_teacher=True)
+                teacher = Teacher.objects.create(user=user)
+                task = Task.objects.create(name="Benchmark", hourly_rate=Decimal('10.00'), price=Decimal('20.00'))
+                started = time.perf_counter()
+                for i in range(count):
+                    WorkSession(
+                        teacher=teacher, task=task, entry_type='manual', manual_hours=Decimal(i % 4 + 1)
+                    ).save()
+                elapsed = time.perf_counter() - started
+                raise Rollback
+        except Rollback:
+            pass
+        return elapsed
+
+    def handle(self, *args, **options):
+        count, repeat = options['count'], options['repeat']
+        app_logger = logging.getLogger('teachers_app')
+        saved_level, saved_handlers, saved_propagate = app_logger.level, app_logger.handlers, app_logger.propagate
+
+        # Log records are formatted and written to /dev/null, so DEBUG pays the full
+        # formatting and I/O cost without flooding the terminal
+        with open(os.devnull, 'w') as sink:
+            handler = logging.StreamHandler(sink)
+            handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s %(process)d %(message)s'))
+            app_logger.handlers, app_logger.propagate = [handler], False
+            try:
+                results = {}
+                for name, level in (('development (DEBUG)', logging.DEBUG), ('production (INFO)', logging.INFO)):
+                    app_logger.setLevel(level)
+                    best = min(self.run_saves(count) for _ in range(repeat))
+                    results[name] = count / best if best else 0.0
+                    self.stdout.write(f"{name}: {count} saves in {best:.4f}s ({results[name]:.0f} saves/s)")
+            finally:
+                app_logger.setLevel(saved_level)
+                app_logger.handlers, app_logger.propagate = saved_handlers, saved_propagate
+
+        debug_rate, production_rate = results.values()
+        if debug_rate:
+            self.stdout.write(self.style.SUCCESS(
+                f"Production logging profile: {production_rate / debug_rate:.2f}x the save throughput of DEBUG."
+            ))
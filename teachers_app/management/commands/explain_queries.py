@@ -0,0 +1,96 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from teachers_app.models import Teacher, Student, WorkSession, SalaryReport
+from teachers_app.services import SalaryCalculationService, BulkSalaryService
+from teachers_app.billing_services import StudentBillingService, BulkBillingService
+import re
+
+SQLITE_INDEX = re.compile(r'USING (?:COVERING )?INDEX (\w+)')
+SQLITE_SCAN = re.compile(r'\bSCAN (\w+)(?! USING)')
+POSTGRES_INDEX = re.compile(r'(?:Index Scan|Index Only Scan|Bitmap Index Scan) (?:using|on) (\w+)')
+POSTGRES_SCAN = re.compile(r'Seq Scan on (\w+)')
+
+
+class Command(BaseCommand):
+    help = (
+        'Run EXPLAIN on the hot WorkSession/SalaryReport queries and report index usage. '
+        'On PostgreSQL run ANALYZE first; small tables are sequentially scanned regardless of indexes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--teacher', type=int, help='Teacher id to plug into the queries (default: first teacher)')
+        parser.add_argument('--student', type=int, help='Student id to plug into the queries (default: first student)')
+        parser.add_argument('--year', type=int, help='Year to query (default: current year)')
+        parser.add_argument('--month', type=int, help='Month to query (default: current month)')
+        parser.add_argument('--verbose-plan', action='store_true', help='Print the full query plan for each query')
+        parser.add_argument('--fail-on-scan', action='store_true', help='Fail (exit status 1) if any query scans a whole table')
+
+    def hot_queries(self, teacher_id, student_id, year, month):
+        """Return (name, queryset) pairs for the access paths the indexes are designed for"""
+        start_date, end_date = BulkSalaryService.month_range(year, month)
+        return [
+            ('calculate_salary / get_work_sessions',
+             SalaryCalculationService.get_work_sessions(teacher_id, year, month)),
+            ('SalaryReport.create_for_month',
+             WorkSession.objects.filter(
+                 teacher_id=teacher_id,
+                 created_at__gte=start_date,
+                 created_at__lt=end_date,
+                 is_deleted=False
+             )),
+            ('bill_all_students (grouped by student)',
+             BulkBillingService.month_sessions(start_date.date()).filter(student__isnull=False)),
+            ('bill_detail / create_bill',
+             StudentBillingService.get_month_work_sessions(student_id, start_date.date())),
+            ('list_work_sessions (keyset page)',
+             WorkSession.objects.filter(is_deleted=False).order_by('-created_at', '-id')[:51]),
+            ('list_salary_reports (per teacher)',
+             SalaryReport.objects.filter(teacher_id=teacher_id, is_deleted=False).order_by('-start_date')),
+        ]
+
+    def analyze_plan(self, plan):
+        """Return (indexes used, tables scanned without an index) for an EXPLAIN output"""
+        if connection.vendor == 'postgresql':
+            return POSTGRES_INDEX.findall(plan), POSTGRES_SCAN.findall(plan)
+        indexes = SQLITE_INDEX.findall(plan)
+        scans = [
+            table for line in plan.splitlines()
+            for table in SQLITE_SCAN.findall(line)
+            if 'USING' not in line
+        ]
+        return indexes, scans
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        year = options['year'] or now.year
+        month = options['month'] or now.month
+        teacher_id = options['teacher'] or Teacher.objects.order_by('id').values_list('id', flat=True).first() or 0
+        student_id = options['student'] or Student.objects.order_by('id').values_list('id', flat=True).first() or 0
+
+        self.stdout.write(f"\nQuery plans on {connection.vendor} for {month:02d}/{year} "
+                          f"(teacher {teacher_id}, student {student_id}):")
+
+        has_scans = False
+        for name, queryset in self.hot_queries(teacher_id, student_id, year, month):
+            plan = queryset.explain()
+            indexes, scans = self.analyze_plan(plan)
+
+            self.stdout.write(f"\n{name}")
+            if options['verbose_plan']:
+                for line in plan.splitlines():
+                    self.stdout.write(f"    {line}")
+            if indexes:
+                self.stdout.write(self.style.SUCCESS(f"  Uses index: {', '.join(sorted(set(indexes)))}"))
+            if scans:
+                has_scans = True
+                self.stdout.write(self.style.ERROR(f"  Full scan of: {', '.join(sorted(set(scans)))}"))
+            if not indexes and not scans:
+                self.stdout.write(self.style.WARNING("  Could not determine index usage from the plan"))
+
+        if has_scans:
+            if options['fail_on_scan']:
+                raise CommandError("Some hot queries scan whole tables.")
+            self.stdout.write(self.style.ERROR("\nSome hot queries scan whole tables."))
+        else:
+            self.stdout.write(self.style.SUCCESS("\nAll hot queries use an index."))
@@ -0,0 +1,38 @@
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from teachers_app import imports
+
+
+class Command(BaseCommand):
+    help = (
+        'Import work sessions from a CSV file with bulk inserts. Required columns: '
+        f"{', '.join(imports.REQUIRED_COLUMNS)}; optional: {', '.join(imports.OPTIONAL_COLUMNS)}. "
+        'Teachers and students are matched by username, tasks by id or unique name.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV file to import, or '-' for standard input")
+        parser.add_argument('--batch-size', type=int, default=imports.BATCH_SIZE,
+                            help=f'Rows inserted per transaction (default: {imports.BATCH_SIZE})')
+        parser.add_argument('--dry-run', action='store_true', help='Validate and compute the rows without writing them')
+        parser.add_argument('--max-errors', type=int, default=20, help='Invalid rows to print (default: 20)')
+
+    def handle(self, *args, **options):
+        try:
+            if options['path'] == '-':
+                stats = imports.import_work_sessions(sys.stdin, options['batch_size'], options['dry_run'])
+            else:
+                with open(options['path'], newline='', encoding='utf-8-sig') as f:
+                    stats = imports.import_work_sessions(f, options['batch_size'], options['dry_run'])
+        except (OSError, imports.ImportFileError) as e:
+            raise CommandError(str(e))
+
+        for line, message in stats.errors[:options['max_errors']]:
+            self.stderr.write(f"Line {line}: {message}")
+        if len(stats.errors) > options['max_errors']:
+            self.stderr.write(f"... and {len(stats.errors) - options['max_errors']} more invalid rows")
+
+        verb = 'Validated' if options['dry_run'] else 'Imported'
+        summary = (f"{verb} {stats.imported} of {stats.rows} rows in {stats.seconds:.2f}s "
+                   f"({stats.rows_per_second:.0f} rows/s), {len(stats.errors)} invalid.")
+        self.stdout.write(self.style.WARNING(summary) if stats.errors else self.style.SUCCESS(summary))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from teachers_app.services import MonthlyTotalsService
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the monthly teacher/student rollup tables from the work sessions'
+
+    def handle(self, *args, **options):
+        teacher_rows, student_rows = MonthlyTotalsService.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt monthly totals: {teacher_rows} teacher-month rows, {student_rows} student-month rows."
+        ))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from teachers_app.billing_services import BillTotalsService
+from teachers_app.services import cents_to_decimal
+
+
+class Command(BaseCommand):
+    help = ('Compare every bill total with the sum of its counted items and report the bills that '
+            'drifted; with --fix, rewrite those totals from their items')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help='Rewrite the drifted totals')
+        parser.add_argument('--max-lines', type=int, default=50, help='Drifted bills to print (default: 50)')
+
+    def handle(self, *args, **options):
+        drift = BillTotalsService.find_drift()
+        if options['fix'] and drift:
+            drift = BillTotalsService.reconcile([bill_id for bill_id, _, _ in drift])
+
+        for bill_id, stored, expected in drift[:options['max_lines']]:
+            self.stdout.write(
+                f"Bill {bill_id}: total {cents_to_decimal(stored)}, items add up to {cents_to_decimal(expected)}"
+            )
+        if len(drift) > options['max_lines']:
+            self.stdout.write(f"... and {len(drift) - options['max_lines']} more")
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('All bill totals match their items.'))
+        elif options['fix']:
+            self.stdout.write(self.style.SUCCESS(f"Fixed {len(drift)} bill totals."))
+        else:
+            self.stdout.write(self.style.WARNING(f"{len(drift)} bill totals drifted; run with --fix to rewrite them."))
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from teachers_app.billing_services import LedgerService
+from teachers_app.services import cents_to_decimal
+
+
+class Command(BaseCommand):
+    help = ('Check that every student balance matches the sum of their ledger entries (--fix rewrites the '
+            'balances that do not) and compare balances with unpaid bills (--sync-bills appends adjustment '
+            'entries so they match, e.g. after bills were edited in the admin)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help='Rewrite balances from their ledger entries')
+        parser.add_argument('--sync-bills', action='store_true',
+                            help='Append adjustment entries so balances equal the unpaid bill totals')
+        parser.add_argument('--max-lines', type=int, default=50, help='Students to print per check (default: 50)')
+
+    def _print(self, rows, label):
+        for student_id, stored, expected in rows[:self.max_lines]:
+            self.stdout.write(f"Student {student_id}: balance {cents_to_decimal(stored)}, {label} {cents_to_decimal(expected)}")
+        if len(rows) > self.max_lines:
+            self.stdout.write(f"... and {len(rows) - self.max_lines} more")
+
+    def handle(self, *args, **options):
+        self.max_lines = options['max_lines']
+
+        drift = LedgerService.find_drift()
+        self._print(drift, 'ledger entries add up to')
+        if drift and options['fix']:
+            LedgerService.rebuild_balances([student_id for student_id, _, _ in drift])
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(drift)} balances from their ledger entries."))
+        elif drift:
+            self.stdout.write(self.style.WARNING(f"{len(drift)} balances do not match their ledger; run with --fix."))
+        else:
+            self.stdout.write(self.style.SUCCESS('All balances match their ledger entries.'))
+
+        differences = LedgerService.bill_differences()
+        self._print(differences, 'unpaid bills')
+        if differences and options['sync_bills']:
+            LedgerService.record_many(
+                [(student_id, None, owed - balance) for student_id, balance, owed in differences],
+                kind='adjustment', note='Acerto com as faturas por pagar'
+            )
+            self.stdout.write(self.style.SUCCESS(f"Adjusted {len(differences)} balances to their unpaid bills."))
+        elif differences:
+            self.stdout.write(self.style.WARNING(
+                f"{len(differences)} balances differ from the unpaid bills; run with --sync-bills to adjust them."
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS('All balances match the unpaid bills.'))
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from datetime import timedelta
+from teachers_app.job_services import JobService
+import os
+import socket
+import time
+
+
+class Command(BaseCommand):
+    help = 'Process queued background jobs (bulk salary reports, bulk billing) outside the request cycle'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit when the queue is empty instead of polling')
+        parser.add_argument('--sleep', type=float, default=5, help='Seconds to wait between polls when the queue is empty')
+        parser.add_argument('--chunk-size', type=int, default=200, help='Teachers/students processed per transaction')
+        parser.add_argument('--processes', type=int, default=1, help='Run chunks in a pool of this many processes')
+        parser.add_argument('--stale-after', type=int, default=60,
+                            help='Requeue running jobs without a heartbeat for this many minutes (crashed workers)')
+
+    def handle(self, *args, **options):
+        worker_name = f"{socket.gethostname()}:{os.getpid()}"
+        self.stdout.write(f"Worker {worker_name} started")
+
+        while True:
+            requeued, failed = JobService.requeue_stale(timedelta(minutes=options['stale_after']))
+            if requeued:
+                self.stdout.write(self.style.WARNING(f"Requeued {requeued} stale job(s)"))
+            if failed:
+                self.stdout.write(self.style.ERROR(f"Marked {failed} stale job(s) failed after their last attempt"))
+
+            job = JobService.claim_next(worker_name)
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+                continue
+
+            self.stdout.write(f"Running {job} (attempt {job.attempts}/{job.max_attempts}, {job.progress_total} items)")
+            job = JobService.run(job, chunk_size=options['chunk_size'], processes=options['processes'])
+            if job.status == 'succeeded':
+                self.stdout.write(self.style.SUCCESS(f"  Done: {job.result}"))
+            elif job.status == 'queued':
+                self.stdout.write(self.style.WARNING(f"  Failed, retrying after {job.run_after:%H:%M:%S}"))
+            else:
+                self.stdout.write(self.style.ERROR(f"  Failed after {job.attempts} attempts"))
+                self.stdout.write(job.error)
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from teachers_app.services import SalaryCacheService
+
+
+class Command(BaseCommand):
+    help = 'Show the salary cache hit/miss counters (use a shared cache backend to see all workers)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Reset the counters after printing them')
+
+    def handle(self, *args, **options):
+        stats = SalaryCacheService.stats()
+        self.stdout.write(
+            f"Salary cache: {stats['hits']} hits, {stats['misses']} misses, "
+            f"hit rate {stats['hit_rate']:.1%}"
+        )
+        if options['reset']:
+            SalaryCacheService.reset_stats()
+            self.stdout.write(self.style.SUCCESS("Counters reset."))
@@ -1,7 +1,6 @@
 from django.core.management.base import BaseCommand
+from teachers_app import calculations
 from teachers_app.models import SalaryReport, WorkSession
-from django.utils import timezone
-from decimal import Decimal
 
 class Command(BaseCommand):
     help = 'Verify salary reports and their calculations'
@@ -17,34 +16,26 @@ class Command(BaseCommand):
             self.stdout.write(f"Total Hours: {report.total_hours}")
             self.stdout.write(f"Total Amount: {report.total_amount}")
             
-            work_sessions = WorkSession.objects.filter(
+            work_sessions = list(WorkSession.objects.filter(
                 teacher=report.teacher,
                 created_at__gte=report.start_date,
-                created_at__lt=report.end_date
+                created_at__lt=report.end_date,
+                is_deleted=False
+            ).select_related('task'))
+            # Recompute hours and pay from the entered times with the rules save() uses
+            results = calculations.compute_sessions(
+                work_sessions, {session.task_id: session.task.price for session in work_sessions}
             )
-            
-            calculated_hours = Decimal(0)
-            calculated_amount = Decimal(0)
-            
+
+            calculated_hours = calculations.from_hundredths(sum(r.hours or 0 for r in results))
+            calculated_amount = calculations.from_hundredths(sum(r.teacher_payment or 0 for r in results))
+
             self.stdout.write("\nWork Sessions:")
-            for session in work_sessions:
-                hours = Decimal(0)
-                if session.entry_type == 'manual' and session.manual_hours:
-                    hours = session.manual_hours
-                elif session.entry_type == 'clock' and session.clock_in and session.clock_out:
-                    duration = session.clock_out - session.clock_in
-                    hours = Decimal(str(duration.total_seconds() / 3600))
-                elif session.entry_type == 'time_range' and session.start_time and session.end_time:
-                    duration = session.end_time - session.start_time
-                    hours = Decimal(str(duration.total_seconds() / 3600))
-                
-                calculated_hours += hours
-                calculated_amount += session.total_amount
-                
+            for session, result in zip(work_sessions, results):
                 self.stdout.write(f"  - Session: {session.entry_type}")
-                self.stdout.write(f"    Hours: {hours}")
-                self.stdout.write(f"    Amount: {session.total_amount}")
-            
+                self.stdout.write(f"    Hours: {calculations.from_hundredths(result.hours)} (stored: {session.stored_hours})")
+                self.stdout.write(f"    Amount: {calculations.from_hundredths(result.teacher_payment)} (stored: {session.teacher_payment_amount})")
+
             self.stdout.write("\nCalculated Totals:")
             self.stdout.write(f"Total Hours (stored): {report.total_hours}")
             self.stdout.write(f"Total Hours (calculated): {calculated_hours}")
@@ -1,4 +1,5 @@
 from django.core.management.base import BaseCommand
+from teachers_app import calculations
 from teachers_app.models import WorkSession
 from django.utils import timezone
 from datetime import timedelta
@@ -8,7 +9,12 @@ class Command(BaseCommand):
     help = 'Verify work session consistency and integrity'
 
     def handle(self, *args, **options):
-        sessions = WorkSession.objects.filter(is_deleted=False)
+        sessions = list(WorkSession.objects.filter(is_deleted=False).select_related('task', 'teacher__user'))
+        # Expected hours and amounts for every session, computed in one batch
+        expected = dict(zip(
+            (session.id for session in sessions),
+            calculations.compute_sessions(sessions, {session.task_id: session.task.price for session in sessions})
+        ))
         has_errors = False
         
         self.stdout.write("\nVerifying Work Sessions:")
@@ -34,9 +40,13 @@ class Command(BaseCommand):
                     has_errors = True
             
             # Check hours calculation
+            result = expected[session.id]
             if session.stored_hours is None:
                 self.stdout.write(self.style.ERROR("Stored hours is None"))
                 has_errors = True
+            elif session.stored_hours != calculations.from_hundredths(result.hours):
+                self.stdout.write(self.style.ERROR("Stored hours don't match the entered hours/times"))
+                has_errors = True
             
             # Check hourly rate
             if session.hourly_rate is None:
@@ -47,8 +57,11 @@ class Command(BaseCommand):
             if session.total_amount is None:
                 self.stdout.write(self.style.ERROR("Total amount is None"))
                 has_errors = True
-            elif session.total_amount != session.stored_hours * session.hourly_rate:
-                self.stdout.write(self.style.ERROR("Total amount doesn't match hours * rate"))
+            elif session.total_amount != calculations.from_hundredths(result.student_billing):
+                self.stdout.write(self.style.ERROR("Total amount doesn't match hours * task price"))
+                has_errors = True
+            if session.teacher_payment_amount != calculations.from_hundredths(result.teacher_payment):
+                self.stdout.write(self.style.ERROR("Teacher payment doesn't match hours * rate"))
                 has_errors = True
             
             # Check for overlapping sessions
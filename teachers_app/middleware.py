@@ -0,0 +1,15 @@
+from .billing_services import BillingPipeline
+
+
+class BillingPipelineMiddleware:
+    """
+    Collect the work sessions a request bills and bill them together once the view has
+    returned (see BillingPipeline and settings.BILLING_FLUSH)
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with BillingPipeline.collect():
+            return self.get_response(request)
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.6 on 2026-10-18 15:30
+
+from django.db import migrations, models
+
+
+def mark_existing_reports_stale(apps, schema_editor):
+    # Totals of reports created before the marker existed may be out of date
+    SalaryReport = apps.get_model('teachers_app', 'SalaryReport')
+    SalaryReport.objects.update(is_stale=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teachers_app', '0015_auto_20250528_0423'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='salaryreport',
+            name='is_stale',
+            field=models.BooleanField(default=False, help_text='Set when work sessions in this period changed after the totals were stored'),
+        ),
+        migrations.RunPython(mark_existing_reports_stale, migrations.RunPython.noop),
+    ]
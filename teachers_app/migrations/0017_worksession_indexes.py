@@ -0,0 +1,33 @@
+# Generated by Django 5.1.6 on 2026-10-18 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teachers_app', '0016_salaryreport_is_stale'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='worksession',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['teacher', 'created_at'], name='ws_teacher_created_live_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='worksession',
+            index=models.Index(fields=['student', 'created_at'], name='ws_student_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='worksession',
+            index=models.Index(fields=['student', 'start_time'], name='ws_student_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='worksession',
+            index=models.Index(fields=['student', 'clock_in'], name='ws_student_clock_in_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salaryreport',
+            index=models.Index(fields=['teacher', 'start_date'], name='salaryreport_teacher_start_idx'),
+        ),
+    ]
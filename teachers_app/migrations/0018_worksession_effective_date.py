@@ -0,0 +1,63 @@
+# Generated by Django 5.1.6 on 2026-10-18 16:40
+
+from django.db import migrations, models
+from django.utils import timezone
+
+BACKFILL_CHUNK_SIZE = 2000
+
+
+def backfill_effective_date(apps, schema_editor):
+    WorkSession = apps.get_model('teachers_app', 'WorkSession')
+    last_pk = 0
+    while True:
+        chunk = list(
+            WorkSession.objects.filter(pk__gt=last_pk).order_by('pk').only(
+                'pk', 'entry_type', 'created_at', 'clock_in', 'start_time'
+            )[:BACKFILL_CHUNK_SIZE]
+        )
+        if not chunk:
+            break
+        for session in chunk:
+            if session.entry_type == 'clock':
+                timestamp = session.clock_in
+            elif session.entry_type == 'time_range':
+                timestamp = session.start_time
+            else:
+                timestamp = session.created_at
+            if timestamp is None:
+                continue
+            if timezone.is_aware(timestamp):
+                timestamp = timezone.localtime(timestamp)
+            session.effective_date = timestamp.date()
+            session.effective_month = session.effective_date.replace(day=1)
+        WorkSession.objects.bulk_update(chunk, ['effective_date', 'effective_month'])
+        last_pk = chunk[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teachers_app', '0017_worksession_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='worksession',
+            name='effective_date',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='worksession',
+            name='effective_month',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_effective_date, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='worksession',
+            index=models.Index(fields=['student', 'effective_date'], name='ws_student_effective_idx'),
+        ),
+        # Billing filters on effective_date now; the per-entry-type indexes only slow down writes
+        migrations.RemoveIndex(model_name='worksession', name='ws_student_created_idx'),
+        migrations.RemoveIndex(model_name='worksession', name='ws_student_start_idx'),
+        migrations.RemoveIndex(model_name='worksession', name='ws_student_clock_in_idx'),
+    ]
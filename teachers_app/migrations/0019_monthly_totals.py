@@ -0,0 +1,97 @@
+# Generated by Django 5.1.6 on 2026-10-18 17:20
+
+from collections import defaultdict
+from decimal import Decimal, ROUND_HALF_UP
+from django.db import migrations, models
+import django.db.models.deletion
+from django.utils import timezone
+
+CHUNK_SIZE = 2000
+
+
+def populate_monthly_totals(apps, schema_editor):
+    WorkSession = apps.get_model('teachers_app', 'WorkSession')
+    MonthlyTeacherTotals = apps.get_model('teachers_app', 'MonthlyTeacherTotals')
+    MonthlyStudentTotals = apps.get_model('teachers_app', 'MonthlyStudentTotals')
+
+    def empty():
+        return {'session_count': 0, 'hours': Decimal('0.00'), 'teacher_payment': Decimal('0.00'), 'student_billing': Decimal('0.00')}
+
+    teacher_totals = defaultdict(empty)
+    student_totals = defaultdict(empty)
+    last_pk = 0
+    while True:
+        chunk = list(WorkSession.objects.filter(pk__gt=last_pk, is_deleted=False).order_by('pk')[:CHUNK_SIZE])
+        if not chunk:
+            break
+        for session in chunk:
+            hours = session.stored_hours or Decimal('0.00')
+            payment = (hours * (session.hourly_rate or Decimal('0.00'))).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+            billing = (session.total_amount or Decimal('0.00')).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+            keys = []
+            if session.created_at is not None:
+                keys.append(teacher_totals[(session.teacher_id, timezone.localtime(session.created_at).date().replace(day=1))])
+            if session.student_id and session.effective_month:
+                keys.append(student_totals[(session.student_id, session.effective_month)])
+            for totals in keys:
+                totals['session_count'] += 1
+                totals['hours'] += hours
+                totals['teacher_payment'] += payment
+                totals['student_billing'] += billing
+        last_pk = chunk[-1].pk
+
+    MonthlyTeacherTotals.objects.bulk_create(
+        [MonthlyTeacherTotals(teacher_id=tid, month=month, **values) for (tid, month), values in teacher_totals.items()],
+        batch_size=1000
+    )
+    MonthlyStudentTotals.objects.bulk_create(
+        [MonthlyStudentTotals(student_id=sid, month=month, **values) for (sid, month), values in student_totals.items()],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teachers_app', '0018_worksession_effective_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyTeacherTotals',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month')),
+                ('session_count', models.IntegerField(default=0)),
+                ('hours', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('teacher_payment', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('student_billing', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('teacher', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_totals', to='teachers_app.teacher')),
+            ],
+            options={
+                'verbose_name': 'Monthly Teacher Totals',
+                'verbose_name_plural': 'Monthly Teacher Totals',
+                'unique_together': {('teacher', 'month')},
+            },
+        ),
+        migrations.CreateModel(
+            name='MonthlyStudentTotals',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month')),
+                ('session_count', models.IntegerField(default=0)),
+                ('hours', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('teacher_payment', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('student_billing', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_totals', to='teachers_app.student')),
+            ],
+            options={
+                'verbose_name': 'Monthly Student Totals',
+                'verbose_name_plural': 'Monthly Student Totals',
+                'unique_together': {('student', 'month')},
+            },
+        ),
+        migrations.RunPython(populate_monthly_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-18 18:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teachers_app', '0019_monthly_totals'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='billitem',
+            name='task',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bill_items', to='teachers_app.task'),
+        ),
+        migrations.AddIndex(
+            model_name='worksession',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['effective_date', 'student'], name='ws_effective_live_idx'),
+        ),
+    ]
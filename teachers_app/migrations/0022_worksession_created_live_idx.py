@@ -0,0 +1,17 @@
+# Generated by Django 5.1.6 on 2026-10-18 20:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teachers_app', '0021_backgroundjob'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='worksession',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['created_at', 'id'], name='ws_created_live_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.6 on 2026-10-18 21:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teachers_app', '0022_worksession_created_live_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='worksession',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.1.6 on 2026-10-18 22:05
+
+from decimal import Decimal, ROUND_HALF_UP
+from django.db import migrations, models
+from django.db.models import F
+from django.db.models.functions import Cast, Round
+
+CHUNK_SIZE = 2000
+
+SESSION_COLUMNS = {
+    'hours_hundredths': 'stored_hours',
+    'hourly_rate_cents': 'hourly_rate',
+    'total_amount_cents': 'total_amount',
+    'teacher_payment_cents': 'teacher_payment_amount',
+}
+
+
+def populate_integer_columns(apps, schema_editor):
+    WorkSession = apps.get_model('teachers_app', 'WorkSession')
+    BillItem = apps.get_model('teachers_app', 'BillItem')
+
+    # Two decimal places: exact in SQL
+    for integer_field, decimal_field in SESSION_COLUMNS.items():
+        WorkSession.objects.filter(**{f'{decimal_field}__isnull': False}).update(**{
+            integer_field: Cast(Round(F(decimal_field) * 100), models.BigIntegerField())
+        })
+
+    # Four decimal places: round half up in Python, like BillItem.save()
+    last_pk = 0
+    while True:
+        chunk = list(BillItem.objects.filter(pk__gt=last_pk).order_by('pk').only('pk', 'amount')[:CHUNK_SIZE])
+        if not chunk:
+            break
+        for item in chunk:
+            item.amount_cents = int(item.amount.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP).scaleb(2))
+        BillItem.objects.bulk_update(chunk, ['amount_cents'], batch_size=500)
+        last_pk = chunk[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teachers_app', '0023_worksession_created_at_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='worksession',
+            name='hours_hundredths',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='worksession',
+            name='hourly_rate_cents',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='worksession',
+            name='total_amount_cents',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='worksession',
+            name='teacher_payment_cents',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='billitem',
+            name='amount_cents',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(populate_integer_columns, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.1.6 on 2026-10-18 23:10
+
+import logging
+
+from django.db import migrations, models
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def close_duplicate_open_clocks(apps, schema_editor):
+    """
+    Make room for the constraint: for each teacher with several open clock sessions (entry_type
+    'clock', no clock_out, not deleted) keep the one with the newest clock_in, the session the
+    teacher is working in, and soft-delete the older ones (is_deleted, deleted_at), which are
+    forgotten clock-outs. Their ids are logged as a warning (teachers_app logger) so they can be
+    reviewed and restored with a clock_out. No other rows are touched.
+
+    The queryset update() skips the WorkSession signals and services, so the monthly rollups,
+    stale salary report flags, the salary cache and page fragments are not updated. None of them
+    depends on these rows: an open clock session has no hours or amounts, so it contributes
+    nothing to any of them. Restoring one goes through the normal save path.
+    """
+    WorkSession = apps.get_model('teachers_app', 'WorkSession')
+    open_sessions = WorkSession.objects.filter(entry_type='clock', clock_out__isnull=True, is_deleted=False)
+    seen = set()
+    duplicates = []
+    for pk, teacher_id in open_sessions.order_by('teacher_id', '-clock_in', '-id').values_list('id', 'teacher_id'):
+        if teacher_id in seen:
+            duplicates.append(pk)
+        seen.add(teacher_id)
+    if duplicates:
+        WorkSession.objects.filter(pk__in=duplicates).update(is_deleted=True, deleted_at=timezone.now())
+        logger.warning(
+            "Soft-deleted %d older open clock sessions: %s", len(duplicates), ', '.join(map(str, duplicates))
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teachers_app', '0024_integer_amounts'),
+    ]
+
+    operations = [
+        migrations.RunPython(close_duplicate_open_clocks, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='worksession',
+            constraint=models.UniqueConstraint(condition=models.Q(('entry_type', 'clock'), ('clock_out__isnull', True), ('is_deleted', False)), fields=('teacher',), name='ws_one_open_clock_per_teacher'),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.1.6 on 2026-10-18 23:40
+
+import django.db.models.deletion
+import django.utils.timezone
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def open_student_balances(apps, schema_editor):
+    """Start each student's ledger with one adjustment entry for what their unpaid bills add up to"""
+    Bill = apps.get_model('teachers_app', 'Bill')
+    LedgerEntry = apps.get_model('teachers_app', 'LedgerEntry')
+    StudentBalance = apps.get_model('teachers_app', 'StudentBalance')
+
+    unpaid = Bill.objects.filter(is_paid=False).values('student_id').annotate(total=Sum('total_amount')).order_by()
+    now = django.utils.timezone.now()
+    entries, balances = [], []
+    for row in unpaid:
+        total = Decimal(row['total'] or 0).quantize(Decimal('0.01'))
+        if not total:
+            continue
+        entries.append(LedgerEntry(
+            student_id=row['student_id'], kind='adjustment', amount=total, balance_after=total,
+            note='Saldo inicial (faturas por pagar)', created_at=now,
+        ))
+        balances.append(StudentBalance(student_id=row['student_id'], balance=total))
+    LedgerEntry.objects.bulk_create(entries, batch_size=1000)
+    StudentBalance.objects.bulk_create(balances, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teachers_app', '0025_worksession_one_open_clock'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('charge', 'Cobrança'), ('payment', 'Pagamento'), ('adjustment', 'Ajuste')], max_length=10)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('balance_after', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('note', models.CharField(blank=True, max_length=200)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('bill', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ledger_entries', to='teachers_app.bill')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='teachers_app.student')),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['student', 'id'], name='ledger_student_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StudentBalance',
+            fields=[
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ledger_balance', serialize=False, to='teachers_app.student')),
+                ('balance', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['balance'], name='studentbalance_balance_idx')],
+            },
+        ),
+        migrations.RunPython(open_student_balances, migrations.RunPython.noop),
+    ]
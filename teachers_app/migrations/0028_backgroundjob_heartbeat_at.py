@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 23:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teachers_app', '0027_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='backgroundjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, help_text='Refreshed by the worker with each progress update; running jobs without one for too long are requeued', null=True),
+        ),
+    ]
@@ -1,11 +1,15 @@
+import logging
 from django.db import models
 from django.contrib.auth.models import AbstractUser, Permission
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
 from django.utils import timezone
-from decimal import Decimal, ROUND_HALF_UP
+from decimal import Decimal
 from django.db.models import Sum
 from datetime import datetime
+from . import calculations
+
+logger = logging.getLogger(__name__)
 
 
 # Custom User Model
@@ -83,80 +87,94 @@ class WorkSession(models.Model):
     start_time = models.DateTimeField(null=True, blank=True)
     end_time = models.DateTimeField(null=True, blank=True)
 
-    created_at = models.DateTimeField(auto_now_add=True)
+    # A default rather than auto_now_add, so imports and corrections can set historical values
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+    # Last write, for conditional GET of the pages that show the session; bulk updates set it themselves
+    updated_at = models.DateTimeField(auto_now=True)
     total_amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)  # Student billing amount
     teacher_payment_amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)  # Teacher's payment amount
 
+    # Integer copies of the columns above (hundredths of an hour, cents), kept in sync by save()
+    # so sums run on native integers; backfill_integer_amounts repairs rows written in bulk
+    hours_hundredths = models.IntegerField(null=True, blank=True, editable=False)
+    hourly_rate_cents = models.BigIntegerField(null=True, blank=True, editable=False)
+    total_amount_cents = models.BigIntegerField(null=True, blank=True, editable=False)
+    teacher_payment_cents = models.BigIntegerField(null=True, blank=True, editable=False)
+
+    # Local date the session counts towards for billing, set in save() from the entry type
+    effective_date = models.DateField(null=True, blank=True, editable=False)
+    effective_month = models.DateField(null=True, blank=True, editable=False)  # First day of effective_date's month
+
+    class Meta:
+        indexes = [
+            # Salary queries: a teacher's live sessions in a created_at range
+            models.Index(fields=['teacher', 'created_at'], condition=models.Q(is_deleted=False), name='ws_teacher_created_live_idx'),
+            # Billing queries: a student's sessions in a billing month
+            models.Index(fields=['student', 'effective_date'], name='ws_student_effective_idx'),
+            # Work session list: live sessions newest first, paginated by (created_at, id)
+            models.Index(fields=['created_at', 'id'], condition=models.Q(is_deleted=False), name='ws_created_live_idx'),
+            # Bulk billing: every student's live sessions in a billing month
+            models.Index(fields=['effective_date', 'student'], condition=models.Q(is_deleted=False), name='ws_effective_live_idx'),
+        ]
+        constraints = [
+            # Clock-in/out: at most one open clock session per teacher, also the index the clock lookups use
+            models.UniqueConstraint(
+                fields=['teacher'],
+                condition=models.Q(entry_type='clock', clock_out__isnull=True, is_deleted=False),
+                name='ws_one_open_clock_per_teacher'
+            ),
+        ]
+
     def save(self, *args, **kwargs):
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.debug("=== WorkSession save method started ===")
-        logger.debug(f"Initial state: hourly_rate={self.hourly_rate}, stored_hours={self.stored_hours}, task={self.task}")
-        logger.debug(f"Task price: {self.task.price}, Task hourly_rate: {self.task.hourly_rate}")
-        
         # Store the hourly rate at creation time if it's a new record
         if not self.pk:  # Only set on creation
-            logger.debug("New record - setting hourly rate from task")
             self.hourly_rate = self.task.hourly_rate
-            logger.debug(f"Task hourly rate set to: {self.hourly_rate}")
-        
-        # Store hours based on entry type
-        logger.debug(f"Entry type: {self.entry_type}")
-        if self.entry_type == 'manual':
-            if self.manual_hours is not None:
-                self.stored_hours = self.manual_hours
-                logger.debug(f"Manual hours set to: {self.stored_hours}")
-            else:
-                raise ValueError("Manual entry type requires manual_hours")
-        elif self.entry_type == 'clock':
-            # For clock entry type, we only calculate hours when clocking out
-            if self.clock_in and self.clock_out:
-                hours = (self.clock_out - self.clock_in).total_seconds() / 3600
-                # Round clock-in/out hours to nearest hour
-                self.stored_hours = Decimal(str(hours)).quantize(Decimal('1'), rounding=ROUND_HALF_UP)
-                logger.debug(f"Clock hours calculated: {self.stored_hours}")
-            # When clocking in, just set clock_in and don't calculate hours yet
-            elif self.clock_in and not self.clock_out:
-                logger.debug("Clocking in - storing clock_in time only")
-            else:
-                raise ValueError("Clock entry type requires clock_in")
-        elif self.entry_type == 'time_range':
-            if self.start_time and self.end_time:
-                duration = self.end_time - self.start_time
-                hours = Decimal(str(duration.total_seconds() / 3600))
-                # Round time-range hours to nearest hour
-                self.stored_hours = hours.quantize(Decimal('1'), rounding=ROUND_HALF_UP)
-                logger.debug(f"Time range hours calculated: {self.stored_hours}")
-            else:
-                raise ValueError("Time range entry type requires start_time and end_time")
-        
-        # Calculate amounts for both student and teacher
-        logger.debug(f"Final hourly rate: {self.hourly_rate}")
-        logger.debug(f"Final stored hours: {self.stored_hours}")
-        logger.debug(f"Task price: {self.task.price}, Task hourly_rate: {self.task.hourly_rate}")
-        
-        # Only calculate amounts if we have stored hours (which means we've clocked out)
-        if self.stored_hours is not None and self.stored_hours > 0:
-            # Calculate student billing amount (0 for free tasks)
-            if self.task.price == 0 or self.task.price == Decimal('0.00'):
-                logger.debug("Free task for student - setting student total_amount to 0")
-                self.total_amount = Decimal('0.00')
-            else:
-                # Calculate total amount for paid tasks (student billing)
-                self.total_amount = self.stored_hours * self.task.price  # Use hourly_rate for student billing
-                logger.debug(f"Calculated student total amount: {self.total_amount}")
-            
-            # Calculate teacher payment amount (always based on hourly_rate)
-            if self.hourly_rate is not None:
-                self.teacher_payment_amount = self.stored_hours * self.hourly_rate
-                logger.debug(f"Calculated teacher payment amount: {self.teacher_payment_amount}")
-        else:
-            logger.debug("Not calculating amounts - either no hours stored or hours not positive")
-            self.total_amount = None
-            self.teacher_payment_amount = None
-        
+
+        # Validate the fields the entry type needs; open clock sessions have no hours yet
+        if self.entry_type == 'manual' and self.manual_hours is None:
+            raise ValueError("Manual entry type requires manual_hours")
+        if self.entry_type == 'clock' and not self.clock_in:
+            raise ValueError("Clock entry type requires clock_in")
+        if self.entry_type == 'time_range' and not (self.start_time and self.end_time):
+            raise ValueError("Time range entry type requires start_time and end_time")
+
+        # Hours (whole hours for clock and time ranges) and both amounts, see calculations.py
+        calculations.apply_to_sessions([self], {self.task_id: self.task.price})
+
+        self.set_effective_date()
+
         super().save(*args, **kwargs)
-        logger.debug("=== WorkSession save method completed ===")
+        # One line per save, formatted only when DEBUG is enabled for this logger
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "WorkSession %s saved: entry_type=%s task=%s hours=%s rate=%s teacher_payment=%s total_amount=%s",
+                self.pk, self.entry_type, self.task_id, self.stored_hours, self.hourly_rate,
+                self.teacher_payment_amount, self.total_amount
+            )
+
+    def effective_timestamp(self):
+        """
+        The timestamp a session is billed by: created_at for manual entries,
+        clock_in for clock entries and start_time for time ranges.
+        """
+        if self.entry_type == 'clock':
+            return self.clock_in
+        if self.entry_type == 'time_range':
+            return self.start_time
+        # created_at defaults to the instantiation time, but may have been cleared explicitly
+        return self.created_at or timezone.now()
+
+    def set_effective_date(self):
+        """Denormalize the local date (and month) of effective_timestamp for indexed month filters"""
+        timestamp = self.effective_timestamp()
+        if timestamp is None:
+            self.effective_date = None
+            self.effective_month = None
+            return
+        if timezone.is_aware(timestamp):
+            timestamp = timezone.localtime(timestamp)
+        self.effective_date = timestamp.date()
+        self.effective_month = self.effective_date.replace(day=1)
 
     def clean(self):
         """Validate the entry type requirements"""
@@ -185,11 +203,6 @@ class WorkSession(models.Model):
                     'end_time': 'End time must be after start time'
                 })
 
-    @property
-    def calculated_hours(self):
-        """Return stored hours"""
-        return self.stored_hours or Decimal(0)
-
     @property
     def calculated_amount(self):
         """Calculate amount using stored values"""
@@ -199,20 +212,13 @@ class WorkSession(models.Model):
 
     def calculated_hours(self):
         """
-        Calculate the total hours worked based on the entry type.
-        - Manual: Use `manual_hours`.
-        - Clock: Use `clock_in` and `clock_out`.
-        - Time Range: Use `start_time` and `end_time`.
+        Hours worked according to the entry type, with the rounding save() stores:
+        manual_hours as entered, clock in/out and time ranges rounded to whole hours.
+        None while the times are incomplete.
         """
-        if self.entry_type == 'manual' and self.manual_hours:
-            return self.manual_hours
-        elif self.entry_type == 'clock' and self.clock_in and self.clock_out:
-            duration = self.clock_out - self.clock_in
-            return duration.total_seconds() / 3600  # Return hours
-        elif self.entry_type == 'time_range' and self.start_time and self.end_time:
-            duration = self.end_time - self.start_time
-            return duration.total_seconds() / 3600  # Return hours
-        return None  # Return None if no valid data
+        return calculations.from_hundredths(calculations.session_hours(
+            self.entry_type, self.manual_hours, self.clock_in, self.clock_out, self.start_time, self.end_time
+        ))
 
     def __str__(self):
         if self.entry_type == 'manual':
@@ -325,10 +331,17 @@ class SalaryReport(models.Model):
     total_hours = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     total_amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     created_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True)
     notes = models.TextField(blank=True)
     is_deleted = models.BooleanField(default=False)
     deleted_at = models.DateTimeField(null=True, blank=True)
+    is_stale = models.BooleanField(default=False, help_text="Set when work sessions in this period changed after the totals were stored")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['teacher', 'start_date'], name='salaryreport_teacher_start_idx'),
+        ]
 
     def __str__(self):
         return f"Salary Report - {self.teacher} ({self.start_date.strftime('%B %Y')})"
@@ -373,7 +386,7 @@ class SalaryReport(models.Model):
         """Soft delete the report"""
         self.is_deleted = True
         self.deleted_at = timezone.now()
-        self.save(update_fields=['is_deleted', 'deleted_at'])
+        self.save(update_fields=['is_deleted', 'deleted_at', 'updated_at'])
 
     def get_work_sessions(self):
         """Get all work sessions for this report"""
@@ -382,4 +395,51 @@ class SalaryReport(models.Model):
             created_at__gte=self.start_date,
             created_at__lt=self.end_date,
             is_deleted=False
-        )
\ No newline at end of file
+        )
+
+# Monthly rollups of WorkSession totals, maintained by signals (see signals.py)
+class MonthlyTotalsBase(models.Model):
+    month = models.DateField(help_text="First day of the month")
+    session_count = models.IntegerField(default=0)
+    hours = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    teacher_payment = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    student_billing = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def for_month(cls, owner, year, month):
+        """Return the stored row for an owner's month, or an unsaved all-zero row"""
+        month_start = datetime(year, month, 1).date()
+        row = cls.objects.filter(**{cls.owner_field: owner}, month=month_start).first()
+        return row or cls(**{cls.owner_field: owner}, month=month_start)
+
+
+class MonthlyTeacherTotals(MonthlyTotalsBase):
+    """A teacher's live (not deleted) sessions per month of created_at, as used by salary reports"""
+    owner_field = 'teacher'
+    teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE, related_name='monthly_totals')
+
+    class Meta:
+        unique_together = ('teacher', 'month')
+        verbose_name = 'Monthly Teacher Totals'
+        verbose_name_plural = 'Monthly Teacher Totals'
+
+    def __str__(self):
+        return f"{self.teacher} - {self.month.strftime('%m/%Y')}: {self.hours}h"
+
+
+class MonthlyStudentTotals(MonthlyTotalsBase):
+    """A student's live (not deleted) sessions per effective_month, as used by billing"""
+    owner_field = 'student'
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='monthly_totals')
+
+    class Meta:
+        unique_together = ('student', 'month')
+        verbose_name = 'Monthly Student Totals'
+        verbose_name_plural = 'Monthly Student Totals'
+
+    def __str__(self):
+        return f"{self.student} - {self.month.strftime('%m/%Y')}: {self.hours}h"
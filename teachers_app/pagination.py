@@ -0,0 +1,116 @@
+import base64
+import datetime
+import json
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder rounds datetimes to milliseconds; cursors need them exact"""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class KeysetPage:
+    def __init__(self, items, next_cursor=None, previous_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+class KeysetPaginator:
+    """
+    Cursor pagination on an indexed ordering. Every page is one query that seeks
+    past the cursor (WHERE (a, id) < (x, y) ORDER BY a, id LIMIT n), so deep pages
+    cost the same as the first one, unlike OFFSET.
+
+    The ordering must end with a unique field (normally '-id') so that rows with
+    equal values are never skipped or repeated.
+    """
+
+    def __init__(self, queryset, ordering=('-created_at', '-id'), page_size=50):
+        self.queryset = queryset
+        self.ordering = tuple(ordering)
+        self.fields = [name.lstrip('-') for name in self.ordering]
+        self.page_size = page_size
+
+    def encode_cursor(self, obj):
+        values = [getattr(obj, name) for name in self.fields]
+        data = json.dumps(values, cls=CursorEncoder, separators=(',', ':'))
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            values = json.loads(data)
+            if not isinstance(values, list) or len(values) != len(self.fields):
+                raise ValueError
+            opts = self.queryset.model._meta
+            return [opts.get_field(name).to_python(value) for name, value in zip(self.fields, values)]
+        except (ValueError, TypeError, ValidationError) as e:
+            raise InvalidCursor(f"Invalid cursor: {cursor!r}") from e
+
+    def _seek(self, values, forward):
+        """Q for rows strictly after (forward) or before the cursor values in self.ordering"""
+        condition = Q()
+        for i, name in enumerate(self.ordering):
+            descending = name.startswith('-')
+            field = self.fields[i]
+            lookup = 'lt' if descending == forward else 'gt'
+            step = Q(**{f'{field}__{lookup}': values[i]})
+            for prev_field, prev_value in zip(self.fields[:i], values[:i]):
+                step &= Q(**{prev_field: prev_value})
+            condition |= step
+        return condition
+
+    def page(self, after=None, before=None):
+        """
+        Return the page after the `after` cursor, the page before the `before` cursor,
+        or the first page. Raises InvalidCursor for cursors that cannot be decoded.
+        """
+        if before:
+            reversed_ordering = [name[1:] if name.startswith('-') else f'-{name}' for name in self.ordering]
+            rows = list(
+                self.queryset.filter(self._seek(self.decode_cursor(before), forward=False))
+                .order_by(*reversed_ordering)[:self.page_size + 1]
+            )
+            has_more = len(rows) > self.page_size
+            items = rows[:self.page_size][::-1]
+            return KeysetPage(
+                items,
+                next_cursor=self.encode_cursor(items[-1]) if items else None,
+                previous_cursor=self.encode_cursor(items[0]) if items and has_more else None,
+            )
+
+        queryset = self.queryset.order_by(*self.ordering)
+        if after:
+            queryset = queryset.filter(self._seek(self.decode_cursor(after), forward=True))
+        rows = list(queryset[:self.page_size + 1])
+        items = rows[:self.page_size]
+        return KeysetPage(
+            items,
+            next_cursor=self.encode_cursor(items[-1]) if len(rows) > self.page_size else None,
+            previous_cursor=self.encode_cursor(items[0]) if items and after else None,
+        )
@@ -4,7 +4,8 @@ from django.contrib.auth.decorators import login_required, user_passes_test
 from django.utils import timezone
 from dateutil.relativedelta import relativedelta
 from .models import Teacher, SalaryReport
-from .services import SalaryCalculationService
+from .services import BulkSalaryService, SalaryCacheService
+from .job_services import JobService
 from .forms import SalaryReportForm
 import calendar
 
@@ -18,17 +19,11 @@ def salary_reports_bulk(request):
     default_month = (today.replace(day=1) - relativedelta(months=1))
     month = int(request.GET.get('month', default_month.month))
     year = int(request.GET.get('year', default_month.year))
-    month_start = timezone.make_aware(timezone.datetime(year, month, 1))
-    if month == 12:
-        month_end = timezone.make_aware(timezone.datetime(year + 1, 1, 1))
-    else:
-        month_end = timezone.make_aware(timezone.datetime(year, month + 1, 1))
-    month_end = month_end - timezone.timedelta(microseconds=1)
-
-    teachers = Teacher.objects.all()
+    teachers = Teacher.objects.select_related('user').order_by('user__username')
+    reports = BulkSalaryService.existing_reports(year, month)
     preview_data = []
     for teacher in teachers:
-        report = SalaryReport.objects.filter(teacher=teacher, start_date=month_start, end_date=month_end, is_deleted=False).first()
+        report = reports.get(teacher.id)
         is_paid = getattr(report, 'is_paid', False) if report else False
         preview_data.append({
             'teacher': teacher,
@@ -38,29 +33,17 @@ def salary_reports_bulk(request):
         })
 
     if request.method == 'POST':
-        actions = []
-        for item in preview_data:
-            action = request.POST.get(f'action_{item["teacher"].id}', 'skip')
-            if not item['already_exists'] and action == 'create':
-                # Create salary report
-                SalaryReport.create_for_month(
-                    teacher=item['teacher'],
-                    year=year,
-                    month=month,
-                    created_by=request.user,
-                )
-                actions.append({'teacher': item['teacher'], 'action': 'created'})
-            elif item['already_exists']:
-                if action == 'update' and item['report']:
-                    # Update: Recalculate and update totals (simulate update)
-                    report = item['report']
-                    report_data = SalaryCalculationService.calculate_salary(item['teacher'], year, month)
-                    report.total_hours = report_data.get('total_hours')
-                    report.total_amount = report_data.get('total_salary')
-                    report.save(update_fields=['total_hours', 'total_amount'])
-                    actions.append({'teacher': item['teacher'], 'action': 'updated'})
-                elif action == 'skip':
-                    actions.append({'teacher': item['teacher'], 'action': 'skipped'})
+        requested = {
+            item['teacher'].id: request.POST.get(f'action_{item["teacher"].id}', 'skip')
+            for item in preview_data
+        }
+        if 'background' in request.POST:
+            job = JobService.enqueue('salary_reports', year, month, requested, created_by=request.user)
+            messages.success(request, 'Relatórios colocados em fila. O progresso é atualizado nesta página.')
+            return redirect('job_detail', job_id=job.pk)
+        results = BulkSalaryService.apply(year, month, requested, created_by=request.user, reports=reports)
+        teachers_by_id = {item['teacher'].id: item['teacher'] for item in preview_data}
+        actions = [{'teacher': teachers_by_id[tid], 'action': action} for tid, action in results]
         return render(request, 'superuser/salary_reports_bulk_result.html', {'actions': actions, 'month': month, 'year': year})
 
     # Prepare months list for template (1-based)
@@ -103,7 +86,7 @@ def create_salary_report(request):
                 created_by=request.user,
                 notes=notes
             )
-            report_data = SalaryCalculationService.calculate_salary(teacher, year, month)
+            report_data = SalaryCacheService.get_salary(teacher, year, month)
             
             # Since we're always creating a new report, we don't need to check if it was created
             message = f'Relatório de salário criado para {teacher.user.username} - {report_data["period"]}'
@@ -0,0 +1,187 @@
+"""
+Hand-written JSON serializers for the API views (api_views.py).
+
+Each serializer maps field names to a getter and the select_related/prefetch_related
+paths the getter needs. Clients ask for a sparse fieldset with ?fields=a,b,c; only the
+relations of the requested fields are joined, so compact payloads also mean lighter queries.
+"""
+import datetime
+from decimal import Decimal
+
+
+class UnknownField(ValueError):
+    pass
+
+
+def _json(value):
+    """Decimals as strings (no float rounding), dates and datetimes as ISO 8601"""
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return value
+
+
+def _attr(name):
+    def get(obj):
+        return _json(getattr(obj, name))
+    return get
+
+
+class Field:
+    def __init__(self, getter=None, select=(), prefetch=()):
+        self.getter = getter
+        self.select = select
+        self.prefetch = prefetch
+
+
+class Serializer:
+    """
+    fields: {name: Field}; a Field without a getter reads the attribute of the same name.
+    default_fields: the fieldset when the client does not ask for one (None: all fields).
+    """
+    fields = {}
+    default_fields = None
+
+    def __init__(self, fields=None):
+        names = self.parse_fields(fields) if fields else list(self.default_fields or self.fields)
+        self.selected = {name: self.fields[name] for name in names}
+        self.getters = {name: field.getter or _attr(name) for name, field in self.selected.items()}
+
+    @classmethod
+    def parse_fields(cls, value):
+        """Field names from a comma-separated ?fields= value; raises UnknownField"""
+        names = [name.strip() for name in value.split(',') if name.strip()]
+        unknown = [name for name in names if name not in cls.fields]
+        if unknown:
+            raise UnknownField(f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(cls.fields)}")
+        # 'id' always comes along: clients need it to refer back to the object
+        return ['id'] + [name for name in dict.fromkeys(names) if name != 'id']
+
+    def prepare(self, queryset):
+        """Join and prefetch only what the selected fields read"""
+        select = {path for field in self.selected.values() for path in field.select}
+        prefetch = {path for field in self.selected.values() for path in field.prefetch}
+        if select:
+            queryset = queryset.select_related(*sorted(select))
+        if prefetch:
+            queryset = queryset.prefetch_related(*sorted(prefetch))
+        return queryset
+
+    def to_dict(self, obj):
+        return {name: get(obj) for name, get in self.getters.items()}
+
+    def many(self, objects):
+        return [self.to_dict(obj) for obj in objects]
+
+
+def _username(path):
+    """The username behind a nullable teacher/student relation"""
+    def get(obj):
+        owner = getattr(obj, path)
+        return owner.user.username if owner is not None else None
+    return get
+
+
+class TeacherSerializer(Serializer):
+    fields = {
+        'id': Field(),
+        'username': Field(lambda t: t.user.username, select=('user',)),
+        'first_name': Field(lambda t: t.user.first_name, select=('user',)),
+        'last_name': Field(lambda t: t.user.last_name, select=('user',)),
+        'email': Field(lambda t: t.user.email, select=('user',)),
+        'subjects': Field(),
+        'is_active': Field(lambda t: t.user.is_active, select=('user',)),
+    }
+
+
+class StudentSerializer(Serializer):
+    fields = {
+        'id': Field(),
+        'username': Field(lambda s: s.user.username, select=('user',)),
+        'first_name': Field(lambda s: s.user.first_name, select=('user',)),
+        'last_name': Field(lambda s: s.user.last_name, select=('user',)),
+        'email': Field(lambda s: s.user.email, select=('user',)),
+        'phone': Field(),
+        'is_active': Field(),
+        'balance': Field(
+            lambda s: _json(s.ledger_balance.balance) if hasattr(s, 'ledger_balance') else '0.00',
+            select=('ledger_balance',)
+        ),
+    }
+    default_fields = ('id', 'username', 'first_name', 'last_name', 'is_active')
+
+
+class WorkSessionSerializer(Serializer):
+    fields = {
+        'id': Field(),
+        'teacher': Field(lambda ws: ws.teacher_id),
+        'teacher_username': Field(_username('teacher'), select=('teacher__user',)),
+        'task': Field(lambda ws: ws.task_id),
+        'task_name': Field(lambda ws: ws.task.name, select=('task',)),
+        'student': Field(lambda ws: ws.student_id),
+        'student_username': Field(_username('student'), select=('student__user',)),
+        'entry_type': Field(),
+        'manual_hours': Field(),
+        'clock_in': Field(),
+        'clock_out': Field(),
+        'start_time': Field(),
+        'end_time': Field(),
+        'hours': Field(lambda ws: _json(ws.stored_hours)),
+        'hourly_rate': Field(),
+        'teacher_payment_amount': Field(),
+        'total_amount': Field(),
+        'effective_date': Field(),
+        'created_at': Field(),
+        'updated_at': Field(),
+    }
+    default_fields = (
+        'id', 'teacher', 'task', 'student', 'entry_type', 'hours', 'hourly_rate',
+        'teacher_payment_amount', 'total_amount', 'effective_date', 'created_at',
+    )
+
+
+class SalaryReportSerializer(Serializer):
+    """Report summaries: the stored totals, refreshed by the view when missing or stale"""
+    fields = {
+        'id': Field(),
+        'teacher': Field(lambda r: r.teacher_id),
+        'teacher_username': Field(lambda r: r.teacher.user.username, select=('teacher__user',)),
+        'start_date': Field(),
+        'end_date': Field(),
+        'total_hours': Field(),
+        'total_amount': Field(),
+        'notes': Field(),
+        'created_at': Field(),
+        'created_by': Field(lambda r: r.created_by.username if r.created_by else None, select=('created_by',)),
+    }
+    default_fields = ('id', 'teacher', 'start_date', 'end_date', 'total_hours', 'total_amount', 'created_at')
+
+
+class BillItemSerializer(Serializer):
+    fields = {
+        'id': Field(),
+        'service_name': Field(),
+        'service_description': Field(),
+        'task': Field(lambda item: item.task_id),
+        'price': Field(lambda item: _json(item.service_price_at_billing)),
+        'quantity': Field(),
+        'amount': Field(),
+    }
+
+
+class BillSerializer(Serializer):
+    fields = {
+        'id': Field(),
+        'student': Field(lambda b: b.student_id),
+        'student_username': Field(lambda b: b.student.user.username, select=('student__user',)),
+        'month': Field(),
+        'total_amount': Field(),
+        'is_paid': Field(),
+        'payment_date': Field(),
+        'created_at': Field(),
+        'updated_at': Field(),
+        # The items in one extra query for the whole page, only when asked for
+        'items': Field(lambda b: BillItemSerializer().many(b.items.all()), prefetch=('items',)),
+    }
+    default_fields = ('id', 'student', 'month', 'total_amount', 'is_paid', 'payment_date')
@@ -1,38 +1,108 @@
-from decimal import Decimal, ROUND_HALF_UP
+import time
+from decimal import Decimal
 import django.utils.timezone as timezone
 from datetime import datetime, timedelta
-from .models import Teacher, Task, WorkSession, Student
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Sum, Count, Value, BigIntegerField, DecimalField, ExpressionWrapper
+from django.db.models.functions import Cast, Coalesce, Round, TruncMonth
+from collections import defaultdict
+from . import calculations
+from .models import Teacher, Task, WorkSession, Student, SalaryReport, MonthlyTeacherTotals, MonthlyStudentTotals
+
+
+def cents_to_decimal(cents):
+    """Convert an integer amount of cents (or hundredths of an hour) to a 2-place Decimal"""
+    return Decimal(int(cents or 0)).scaleb(-2)
+
+
+def annotate_session_cents(queryset):
+    """
+    Annotate work sessions with integer hours/rate/amount in hundredths.
+    billing_cents is the student billing amount (total_amount) in cents.
+
+    The stored integer columns (hours_hundredths, hourly_rate_cents, total_amount_cents,
+    teacher_payment_cents) are read directly. Rows written in bulk before they were
+    backfilled fall back to converting the Decimal columns.
+
+    amount_cents is the SQL form of calculations.amount_cents: both inputs have two decimal
+    places, so their product is an integer number of ten-thousandths and adding 50 before
+    the integer division rounds half up.
+    """
+    zero = Value(Decimal('0.00'), output_field=DecimalField(max_digits=10, decimal_places=2))
+
+    def stored_or_converted(integer_field, decimal_field):
+        return Coalesce(
+            F(integer_field),
+            Cast(Round(Coalesce(F(decimal_field), zero) * 100), BigIntegerField()),
+            output_field=BigIntegerField()
+        )
+
+    return queryset.annotate(
+        hours_cents=stored_or_converted('hours_hundredths', 'stored_hours'),
+        rate_cents=stored_or_converted('hourly_rate_cents', 'hourly_rate'),
+        billing_cents=stored_or_converted('total_amount_cents', 'total_amount'),
+    ).annotate(
+        amount_cents=Coalesce(
+            F('teacher_payment_cents'),
+            ExpressionWrapper((F('hours_cents') * F('rate_cents') + 50) / 100, output_field=BigIntegerField()),
+            output_field=BigIntegerField()
+        )
+    )
 
 
 class SalaryCalculationService:
     @staticmethod
-    def calculate_salary(teacher, year, month):
-        """Calculate salary details for a teacher in a specific month"""
-        # Calculate start and end dates for the month with timezone awareness
+    def month_bounds(year, month):
+        """Return timezone-aware (start, end) datetimes covering the month, end inclusive"""
         start_date = timezone.make_aware(datetime(year, month, 1))
         if month == 12:
             end_date = timezone.make_aware(datetime(year + 1, 1, 1))
         else:
             end_date = timezone.make_aware(datetime(year, month + 1, 1))
         end_date = end_date - timedelta(microseconds=1)
+        return start_date, end_date
 
-        work_sessions = WorkSession.objects.filter(
+    @staticmethod
+    def get_work_sessions(teacher, year, month):
+        """Work sessions counted towards a teacher's salary in a specific month"""
+        start_date, end_date = SalaryCalculationService.month_bounds(year, month)
+        return WorkSession.objects.filter(
             teacher=teacher,
             created_at__gte=start_date,
             created_at__lte=end_date,
             is_deleted=False
-        ).select_related('task')
+        )
+
+    @staticmethod
+    def calculate_salary(teacher, year, month, aggregate=False):
+        """
+        Calculate salary details for a teacher in a specific month.
+
+        With aggregate=True the totals are computed by the database (see aggregate_salary)
+        instead of looping over every session in Python.
+        """
+        if aggregate:
+            return SalaryCalculationService.aggregate_salary(teacher, year, month)
+
+        # Calculate start and end dates for the month with timezone awareness
+        start_date, end_date = SalaryCalculationService.month_bounds(year, month)
+
+        work_sessions = annotate_session_cents(
+            SalaryCalculationService.get_work_sessions(teacher, year, month).select_related('task', 'student')
+        )
 
-        total = Decimal('0.00')
+        total_cents = 0
         task_summaries = []
         session_details = []
 
         for session in work_sessions:
-            hours = session.stored_hours or Decimal('0.00')
+            # Integer hours (hundredths) and pay (cents) from the stored integer columns
             rate = session.hourly_rate or Decimal('0.00')
-            task_total = (hours * rate).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-            rounded_hours = hours.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-            total += task_total
+            task_total = cents_to_decimal(session.amount_cents)
+            rounded_hours = cents_to_decimal(session.hours_cents)
+            total_cents += session.amount_cents
 
             task_summaries.append({
                 'task_name': session.task.name,
@@ -55,6 +125,553 @@ class SalaryCalculationService:
         return {
             'task_summaries': task_summaries,
             'session_details': sorted(session_details, key=lambda x: x['date']),
-            'total_salary': str(total),
+            'total_salary': str(cents_to_decimal(total_cents)),
             'period': f"{start_date.strftime('%m/%Y')}"
         }
+
+    @staticmethod
+    def aggregate_salary(teacher, year, month):
+        """
+        Database-side version of calculate_salary.
+
+        The grand total and the per-task totals come from aggregate queries, with the same
+        per-session rounding as calculate_salary. session_details is a lazy iterator over the
+        month's sessions, so display rows are only built when a template actually renders them.
+        """
+        start_date, _ = SalaryCalculationService.month_bounds(year, month)
+        work_sessions = annotate_session_cents(
+            SalaryCalculationService.get_work_sessions(teacher, year, month)
+        )
+
+        totals = work_sessions.aggregate(
+            total_hours_cents=Sum('hours_cents'),
+            total_amount_cents=Sum('amount_cents'),
+        )
+
+        per_task = work_sessions.values('task_id', 'task__name', 'hourly_rate').annotate(
+            task_hours_cents=Sum('hours_cents'),
+            task_amount_cents=Sum('amount_cents'),
+        ).order_by('task__name', 'hourly_rate')
+
+        task_summaries = [
+            {
+                'task_name': row['task__name'],
+                'hours': str(cents_to_decimal(row['task_hours_cents'])),
+                'rate': str(row['hourly_rate'] or Decimal('0.00')),
+                'student': None,
+                'total': str(cents_to_decimal(row['task_amount_cents'])),
+            }
+            for row in per_task
+        ]
+
+        return {
+            'task_summaries': task_summaries,
+            'session_details': SalaryCalculationService.iter_session_details(work_sessions),
+            'total_salary': str(cents_to_decimal(totals['total_amount_cents'])),
+            'total_hours': str(cents_to_decimal(totals['total_hours_cents'])),
+            'period': f"{start_date.strftime('%m/%Y')}"
+        }
+
+    @staticmethod
+    def iter_session_details(work_sessions, chunk_size=500):
+        """
+        Yield session_details rows for sessions annotated by annotate_session_cents.
+
+        Rows are fetched from the database in chunks, so a large month can be streamed
+        without building the whole list in memory.
+        """
+        entry_types = dict(WorkSession.ENTRY_TYPE_CHOICES)
+        rows = work_sessions.order_by('created_at').values(
+            'created_at', 'task__name', 'task__description', 'entry_type',
+            'hourly_rate', 'hours_cents', 'amount_cents',
+        )
+        for row in rows.iterator(chunk_size=chunk_size):
+            yield {
+                'date': row['created_at'],
+                'task': row['task__name'],
+                'hours': str(cents_to_decimal(row['hours_cents'])),
+                'rate': str(row['hourly_rate'] or Decimal('0.00')),
+                'amount': str(cents_to_decimal(row['amount_cents'])),
+                'entry_type': entry_types.get(row['entry_type'], row['entry_type']),
+                'notes': row['task__description'] or ''
+            }
+
+
+class BulkSalaryService:
+    """Salary totals and reports for every teacher in a month, computed set-wise"""
+
+    @staticmethod
+    def month_range(year, month):
+        """Return the [start, end) datetimes SalaryReport.create_for_month uses for a month"""
+        start_date = timezone.make_aware(datetime(year, month, 1))
+        end_date = timezone.make_aware(datetime(year, month + 1, 1)) if month < 12 else \
+                   timezone.make_aware(datetime(year + 1, 1, 1))
+        return start_date, end_date
+
+    @staticmethod
+    def month_totals(year, month, teacher_ids=None):
+        """
+        Return {teacher_id: {'total_hours': Decimal, 'total_amount': Decimal}} for a month
+        using a single query grouped by teacher.
+        """
+        start_date, end_date = BulkSalaryService.month_range(year, month)
+        work_sessions = WorkSession.objects.filter(
+            created_at__gte=start_date,
+            created_at__lt=end_date,
+            is_deleted=False
+        )
+        if teacher_ids is not None:
+            work_sessions = work_sessions.filter(teacher_id__in=teacher_ids)
+
+        rows = annotate_session_cents(work_sessions).values('teacher_id').annotate(
+            teacher_hours_cents=Sum('hours_cents'),
+            teacher_amount_cents=Sum('amount_cents'),
+        ).order_by()
+
+        return {
+            row['teacher_id']: {
+                'total_hours': cents_to_decimal(row['teacher_hours_cents']),
+                'total_amount': cents_to_decimal(row['teacher_amount_cents']),
+            }
+            for row in rows
+        }
+
+    @staticmethod
+    def existing_reports(year, month):
+        """Return {teacher_id: SalaryReport} for the month's non-deleted reports"""
+        start_date, _ = BulkSalaryService.month_range(year, month)
+        reports = SalaryReport.objects.filter(start_date=start_date, is_deleted=False).order_by('-created_at')
+        existing = {}
+        for report in reports:
+            existing.setdefault(report.teacher_id, report)
+        return existing
+
+    @staticmethod
+    def refresh_report_totals(reports):
+        """
+        Fill in the totals of reports that have none or are marked stale.
+
+        All such reports are filled from the MonthlyTeacherTotals rollup in one query and
+        saved back with bulk_update, so list pages can show the persisted totals.
+        Returns the reports as a list.
+        """
+        reports = list(reports)
+        pending = [r for r in reports if r.is_stale or r.total_amount is None]
+        if not pending:
+            return reports
+
+        def month_key(report):
+            start = timezone.localtime(report.start_date)
+            return report.teacher_id, start.date().replace(day=1)
+
+        rows = MonthlyTeacherTotals.objects.filter(
+            teacher_id__in={r.teacher_id for r in pending},
+            month__in={month_key(r)[1] for r in pending}
+        )
+        totals = {(row.teacher_id, row.month): row for row in rows}
+
+        for report in pending:
+            row = totals.get(month_key(report))
+            report.total_hours = row.hours if row else Decimal('0.00')
+            report.total_amount = row.teacher_payment if row else Decimal('0.00')
+            report.is_stale = False
+        SalaryReport.objects.bulk_update(pending, ['total_hours', 'total_amount', 'is_stale'], batch_size=500)
+        return reports
+
+    @staticmethod
+    def apply(year, month, actions, created_by, reports=None):
+        """
+        Create or update the month's salary reports in one transaction.
+
+        actions maps teacher_id to 'create', 'update' or 'skip'. 'create' only applies to
+        teachers without a report and 'update' only to teachers with one. Returns a list of
+        (teacher_id, action) pairs where action is 'created', 'updated' or 'skipped'.
+        """
+        start_date, end_date = BulkSalaryService.month_range(year, month)
+        if reports is None:
+            reports = BulkSalaryService.existing_reports(year, month)
+
+        to_create = [tid for tid, action in actions.items() if action == 'create' and tid not in reports]
+        to_update = [tid for tid, action in actions.items() if action == 'update' and tid in reports]
+        totals = BulkSalaryService.month_totals(year, month, teacher_ids=to_create + to_update)
+        empty = {'total_hours': Decimal('0.00'), 'total_amount': Decimal('0.00')}
+
+        new_reports = [
+            SalaryReport(
+                teacher_id=tid,
+                start_date=start_date,
+                end_date=end_date,
+                total_hours=totals.get(tid, empty)['total_hours'],
+                total_amount=totals.get(tid, empty)['total_amount'],
+                created_by=created_by,
+            )
+            for tid in to_create
+        ]
+        changed_reports = []
+        for tid in to_update:
+            report = reports[tid]
+            report.total_hours = totals.get(tid, empty)['total_hours']
+            report.total_amount = totals.get(tid, empty)['total_amount']
+            report.is_stale = False
+            changed_reports.append(report)
+
+        with transaction.atomic():
+            SalaryReport.objects.bulk_create(new_reports, batch_size=500)
+            SalaryReport.objects.bulk_update(changed_reports, ['total_hours', 'total_amount', 'is_stale'], batch_size=500)
+
+        created, updated = set(to_create), set(to_update)
+        results = []
+        for tid, action in actions.items():
+            if tid in created:
+                results.append((tid, 'created'))
+            elif tid in updated:
+                results.append((tid, 'updated'))
+            elif action == 'skip' and tid in reports:
+                results.append((tid, 'skipped'))
+        return results
+
+
+class MonthlyTotalsService:
+    """Maintains the MonthlyTeacherTotals / MonthlyStudentTotals rollups"""
+
+    @staticmethod
+    def session_contributions(session):
+        """
+        Return {(rollup model, owner id, month): values} for what a session adds to the rollups.
+        Deleted sessions, and open sessions without a month, contribute nothing.
+        """
+        if session is None or session.is_deleted:
+            return {}
+        hours = calculations.to_hundredths(session.stored_hours or 0)
+        values = {
+            'session_count': 1,
+            'hours': cents_to_decimal(hours),
+            'teacher_payment': cents_to_decimal(
+                calculations.amount_cents(hours, calculations.to_hundredths(session.hourly_rate or 0))
+            ),
+            'student_billing': cents_to_decimal(calculations.to_hundredths(session.total_amount or 0)),
+        }
+        contributions = {}
+        if session.created_at is not None:
+            month = timezone.localtime(session.created_at).date().replace(day=1)
+            contributions[(MonthlyTeacherTotals, session.teacher_id, month)] = values
+        if session.student_id and session.effective_month:
+            contributions[(MonthlyStudentTotals, session.student_id, session.effective_month)] = values
+        return contributions
+
+    @staticmethod
+    def apply_change(previous, current):
+        """
+        Move the rollups from a session's previous contributions to its current ones
+        with atomic F() updates, touching only the rows whose values change.
+        """
+        deltas = defaultdict(lambda: defaultdict(Decimal))
+        for key, values in previous.items():
+            for field, value in values.items():
+                deltas[key][field] -= value
+        for key, values in current.items():
+            for field, value in values.items():
+                deltas[key][field] += value
+
+        for (model, owner_id, month), delta in deltas.items():
+            if not any(delta.values()):
+                continue
+            lookup = {f'{model.owner_field}_id': owner_id, 'month': month}
+            changes = {
+                field: F(field) + (int(value) if field == 'session_count' else value)
+                for field, value in delta.items()
+            }
+            if model.objects.filter(**lookup).update(**changes) or delta['session_count'] <= 0:
+                # Nothing to create for removals: the row is gone along with its owner
+                continue
+            row, _ = model.objects.get_or_create(**lookup)
+            model.objects.filter(pk=row.pk).update(**changes)
+
+    @staticmethod
+    def apply_many(contributions):
+        """
+        Add the summed contributions of a batch of new sessions, {(rollup model, owner id,
+        month): values}, with one select, one bulk_update of F() increments and one
+        bulk_create per rollup instead of a query per key.
+        """
+        fields = ['session_count', 'hours', 'teacher_payment', 'student_billing']
+        by_model = defaultdict(dict)
+        for (model, owner_id, month), values in contributions.items():
+            by_model[model][(owner_id, month)] = values
+
+        for model, deltas in by_model.items():
+            owner = f'{model.owner_field}_id'
+            existing = {
+                (getattr(row, owner), row.month): row
+                for row in model.objects.filter(**{
+                    f'{owner}__in': {owner_id for owner_id, _ in deltas},
+                    'month__in': {month for _, month in deltas},
+                })
+            }
+            updated, created = [], []
+            for (owner_id, month), values in deltas.items():
+                values = {field: int(value) if field == 'session_count' else value for field, value in values.items()}
+                row = existing.get((owner_id, month))
+                if row is None:
+                    created.append(model(**{owner: owner_id, 'month': month}, **values))
+                    continue
+                for field, value in values.items():
+                    setattr(row, field, F(field) + value)
+                updated.append(row)
+            model.objects.bulk_update(updated, fields, batch_size=500)
+            model.objects.bulk_create(created, batch_size=1000)
+
+    @staticmethod
+    def rebuild():
+        """Recompute both rollups from scratch. Returns (teacher rows, student rows) written."""
+        live_sessions = annotate_session_cents(WorkSession.objects.filter(is_deleted=False))
+        totals = dict(
+            session_count=Count('id'),
+            hours_total=Sum('hours_cents'),
+            payment_total=Sum('amount_cents'),
+            billing_total=Sum('billing_cents'),
+        )
+
+        def build(model, owner_id, month, row):
+            return model(**{
+                f'{model.owner_field}_id': owner_id,
+                'month': month,
+                'session_count': row['session_count'],
+                'hours': cents_to_decimal(row['hours_total']),
+                'teacher_payment': cents_to_decimal(row['payment_total']),
+                'student_billing': cents_to_decimal(row['billing_total']),
+            })
+
+        teacher_rows = [
+            build(MonthlyTeacherTotals, row['teacher_id'], timezone.localtime(row['created_month']).date(), row)
+            for row in live_sessions.annotate(created_month=TruncMonth('created_at'))
+                                    .values('teacher_id', 'created_month').annotate(**totals).order_by()
+        ]
+        student_rows = [
+            build(MonthlyStudentTotals, row['student_id'], row['effective_month'], row)
+            for row in live_sessions.filter(student__isnull=False, effective_month__isnull=False)
+                                    .values('student_id', 'effective_month').annotate(**totals).order_by()
+        ]
+
+        with transaction.atomic():
+            MonthlyTeacherTotals.objects.all().delete()
+            MonthlyStudentTotals.objects.all().delete()
+            MonthlyTeacherTotals.objects.bulk_create(teacher_rows, batch_size=1000)
+            MonthlyStudentTotals.objects.bulk_create(student_rows, batch_size=1000)
+        return len(teacher_rows), len(student_rows)
+
+
+def delete_cache_keys_on_commit(keys):
+    """
+    Delete cache keys once the current transaction commits (at once outside a transaction).
+    Deleting them inside the writer's transaction lets another request re-cache the old
+    values before the commit, where they would stay until the timeout.
+    """
+    keys = list(keys)
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+class SalaryCacheService:
+    """
+    Read-through cache for calculate_salary, one entry per (teacher, year, month).
+
+    Entries are dropped by the WorkSession and Task signals for exactly the teacher-months
+    they affect (see signals.py), when the transaction commits. Queryset update()/bulk_create() skip those signals, so
+    code that changes sessions in bulk must call invalidate()/invalidate_many() itself.
+    Hit and miss counters live in the cache too, so with a shared backend they cover every worker.
+    """
+    PREFIX = 'salary'
+    HITS_KEY = 'salary:stats:hits'
+    MISSES_KEY = 'salary:stats:misses'
+
+    @staticmethod
+    def key(teacher_id, year, month):
+        return f"{SalaryCacheService.PREFIX}:{teacher_id}:{year}:{month}"
+
+    @staticmethod
+    def timeout():
+        # Invalidation is precise; the timeout only bounds how long a missed one can last
+        return getattr(settings, 'SALARY_CACHE_TIMEOUT', 60 * 60 * 24)
+
+    @staticmethod
+    def _count(key):
+        cache.add(key, 0, timeout=None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Evicted between add() and incr()
+            cache.set(key, 1, timeout=None)
+
+    @staticmethod
+    def get_salary(teacher, year, month):
+        """calculate_salary(teacher, year, month), served from the cache when possible"""
+        key = SalaryCacheService.key(teacher.id, year, month)
+        data = cache.get(key)
+        if data is not None:
+            SalaryCacheService._count(SalaryCacheService.HITS_KEY)
+            return data
+        SalaryCacheService._count(SalaryCacheService.MISSES_KEY)
+        data = SalaryCalculationService.calculate_salary(teacher, year, month)
+        cache.set(key, data, SalaryCacheService.timeout())
+        return data
+
+    @staticmethod
+    def session_month(session):
+        """(teacher_id, year, month) a session counts towards, or None while it has no created_at"""
+        if session is None or session.created_at is None:
+            return None
+        local = timezone.localtime(session.created_at)
+        return session.teacher_id, local.year, local.month
+
+    @staticmethod
+    def invalidate(teacher_id, year, month):
+        SalaryCacheService.invalidate_many([(teacher_id, year, month)])
+
+    @staticmethod
+    def invalidate_many(teacher_months):
+        """
+        Drop the cached salaries of these teacher-months, and the report fragments rendered
+        from them, once the current transaction commits
+        """
+        teacher_months = {teacher_month for teacher_month in teacher_months if teacher_month}
+        if teacher_months:
+            delete_cache_keys_on_commit(SalaryCacheService.key(*teacher_month) for teacher_month in teacher_months)
+            FragmentCacheService.touch_many(FragmentCacheService.SALARY, teacher_months)
+
+    @staticmethod
+    def invalidate_task(task):
+        """Drop the entries of every teacher-month with a session of this task (one grouped query)"""
+        rows = (
+            WorkSession.objects.filter(task=task, created_at__isnull=False)
+            .annotate(created_month=TruncMonth('created_at'))
+            .values_list('teacher_id', 'created_month')
+            .distinct()
+            .order_by()
+        )
+        SalaryCacheService.invalidate_many(
+            (teacher_id, timezone.localtime(month).year, timezone.localtime(month).month)
+            for teacher_id, month in rows
+        )
+
+    @staticmethod
+    def stats():
+        hits = cache.get(SalaryCacheService.HITS_KEY) or 0
+        misses = cache.get(SalaryCacheService.MISSES_KEY) or 0
+        lookups = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / lookups if lookups else 0.0,
+        }
+
+    @staticmethod
+    def reset_stats():
+        cache.delete_many([SalaryCacheService.HITS_KEY, SalaryCacheService.MISSES_KEY])
+
+
+class FragmentCacheService:
+    """
+    Version stamps for the {% cache %} fragments of report pages.
+
+    A fragment is cached under its owner (a teacher-month, a student) and the owner's current
+    stamp. Code that changes what a fragment shows touches the owner, which drops the stamp;
+    the next read stores a new one, so fragments rendered under the old stamp are never used
+    again and expire after FRAGMENT_CACHE_TIMEOUT. Salary fragments are touched with the
+    salary cache (SalaryCacheService.invalidate_many), student fragments by the work session
+    signals and the billing services. Touches take effect when the transaction commits. Like the salary cache, edits that skip both (queryset
+    update() outside the services, the admin) only show once the fragment times out.
+    """
+    PREFIX = 'fragments'
+    SALARY = 'salary'
+    STUDENT = 'student'
+    # Task names, descriptions and prices appear on every student's page
+    TASKS = 'tasks'
+
+    @staticmethod
+    def key(scope, *owner):
+        return ':'.join(str(part) for part in (FragmentCacheService.PREFIX, scope) + owner)
+
+    @staticmethod
+    def timeout():
+        return getattr(settings, 'FRAGMENT_CACHE_TIMEOUT', 60 * 60 * 24)
+
+    @staticmethod
+    def version(scope, *owner):
+        """The owner's current stamp; a new one after each touch (or eviction)"""
+        return cache.get_or_set(FragmentCacheService.key(scope, *owner), time.time_ns, timeout=None)
+
+    @staticmethod
+    def touch(scope, *owner):
+        delete_cache_keys_on_commit([FragmentCacheService.key(scope, *owner)])
+
+    @staticmethod
+    def touch_many(scope, owners):
+        """Touch many owners at once; each owner is a tuple of key parts, or a single id"""
+        keys = {
+            FragmentCacheService.key(scope, *(owner if isinstance(owner, tuple) else (owner,)))
+            for owner in owners if owner is not None
+        }
+        delete_cache_keys_on_commit(keys)
+
+    @staticmethod
+    def salary_version(teacher_id, year, month):
+        return FragmentCacheService.version(FragmentCacheService.SALARY, teacher_id, year, month)
+
+    @staticmethod
+    def student_version(student_id):
+        """The student's stamp combined with the task stamp"""
+        return (f"{FragmentCacheService.version(FragmentCacheService.STUDENT, student_id)}"
+                f".{FragmentCacheService.version(FragmentCacheService.TASKS)}")
+
+
+class IntegerColumnsService:
+    """Backfills the integer hours/cents columns kept next to the Decimal ones"""
+
+    SESSION_COLUMNS = {
+        'hours_hundredths': 'stored_hours',
+        'hourly_rate_cents': 'hourly_rate',
+        'total_amount_cents': 'total_amount',
+        'teacher_payment_cents': 'teacher_payment_amount',
+    }
+
+    @staticmethod
+    def backfill(only_missing=True, batch_size=2000):
+        """
+        Copy the Decimal columns into their integer columns. Returns (sessions, bill items) updated.
+
+        Work session columns have two decimal places, so SQL can convert them exactly in one
+        UPDATE per column. Bill item amounts have four places and are rounded half up in
+        Python, like BillItem.save() does.
+        """
+        from .billing_models import BillItem
+
+        sessions = 0
+        for integer_field, decimal_field in IntegerColumnsService.SESSION_COLUMNS.items():
+            queryset = WorkSession.objects.filter(**{f'{decimal_field}__isnull': False})
+            if only_missing:
+                queryset = queryset.filter(**{f'{integer_field}__isnull': True})
+            sessions += queryset.update(**{
+                integer_field: Cast(Round(F(decimal_field) * 100), BigIntegerField())
+            })
+
+        items = BillItem.objects.order_by('pk')
+        if only_missing:
+            items = items.filter(amount_cents__isnull=True)
+        updated = 0
+        last_pk = 0
+        while True:
+            batch = list(items.filter(pk__gt=last_pk).only('pk', 'amount', 'amount_cents')[:batch_size])
+            if not batch:
+                break
+            changed = []
+            for item in batch:
+                cents = calculations.to_hundredths(item.amount)
+                if item.amount_cents != cents:
+                    item.amount_cents = cents
+                    changed.append(item)
+            with transaction.atomic():
+                BillItem.objects.bulk_update(changed, ['amount_cents'], batch_size=500)
+            updated += len(changed)
+            last_pk = batch[-1].pk
+        return sessions, updated
@@ -0,0 +1,91 @@
+from django.db.models import Q
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from .models import Task, WorkSession, SalaryReport
+from .services import FragmentCacheService, MonthlyTotalsService, SalaryCacheService
+
+# Task fields that show up in calculate_salary results or feed new session rates
+SALARY_TASK_FIELDS = ('name', 'description', 'hourly_rate')
+
+
+@receiver(post_save, sender=WorkSession)
+@receiver(post_delete, sender=WorkSession)
+def mark_salary_reports_stale(sender, instance, **kwargs):
+    """
+    Flag the salary reports whose period contains a changed work session, and the report
+    it moved out of when its teacher or created_at changed
+    """
+    periods = {(instance.teacher_id, instance.created_at), getattr(instance, '_previous_report_period', None)}
+    condition = Q()
+    for teacher_id, created_at in filter(None, periods):
+        if created_at is not None:
+            condition |= Q(teacher_id=teacher_id, start_date__lte=created_at, end_date__gt=created_at)
+    if not condition:
+        return
+    SalaryReport.objects.filter(condition, is_stale=False).update(is_stale=True)
+
+
+@receiver(pre_save, sender=WorkSession)
+def remember_monthly_contributions(sender, instance, raw=False, **kwargs):
+    """Keep what the stored version of the session adds to the monthly rollups, the salary cache and reports"""
+    previous = None
+    if instance.pk and not raw:
+        previous = WorkSession.objects.filter(pk=instance.pk).first()
+    instance._previous_contributions = MonthlyTotalsService.session_contributions(previous)
+    instance._previous_salary_month = SalaryCacheService.session_month(previous)
+    instance._previous_student_id = previous.student_id if previous else None
+    instance._previous_report_period = (previous.teacher_id, previous.created_at) if previous else None
+
+
+@receiver(post_save, sender=WorkSession)
+def update_monthly_totals_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    MonthlyTotalsService.apply_change(
+        getattr(instance, '_previous_contributions', {}),
+        MonthlyTotalsService.session_contributions(instance)
+    )
+
+
+@receiver(post_delete, sender=WorkSession)
+def update_monthly_totals_on_delete(sender, instance, **kwargs):
+    MonthlyTotalsService.apply_change(MonthlyTotalsService.session_contributions(instance), {})
+
+
+@receiver(post_save, sender=WorkSession)
+@receiver(post_delete, sender=WorkSession)
+def invalidate_salary_cache(sender, instance, **kwargs):
+    """Drop the cached salary of the teacher-month the session is in, and the one it moved out of"""
+    SalaryCacheService.invalidate_many([
+        getattr(instance, '_previous_salary_month', None),
+        SalaryCacheService.session_month(instance),
+    ])
+
+
+@receiver(post_save, sender=WorkSession)
+@receiver(post_delete, sender=WorkSession)
+def touch_student_fragments(sender, instance, **kwargs):
+    """Cached fragments of the session's student, and of the student it moved away from"""
+    FragmentCacheService.touch_many(
+        FragmentCacheService.STUDENT, [getattr(instance, '_previous_student_id', None), instance.student_id]
+    )
+
+
+@receiver(pre_save, sender=Task)
+def remember_task_salary_fields(sender, instance, raw=False, **kwargs):
+    instance._previous_salary_fields = None
+    if instance.pk and not raw:
+        instance._previous_salary_fields = (
+            Task.objects.filter(pk=instance.pk).values_list(*SALARY_TASK_FIELDS).first()
+        )
+
+
+@receiver(post_save, sender=Task)
+def invalidate_salary_cache_for_task(sender, instance, created=False, raw=False, **kwargs):
+    """A renamed or re-rated task only affects the teacher-months that have sessions of it"""
+    if created or raw:
+        return
+    FragmentCacheService.touch(FragmentCacheService.TASKS)
+    current = tuple(getattr(instance, field) for field in SALARY_TASK_FIELDS)
+    if getattr(instance, '_previous_salary_fields', None) != current:
+        SalaryCacheService.invalidate_task(instance)
@@ -0,0 +1,177 @@
+import json
+from datetime import date
+from decimal import Decimal
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.utils import timezone
+from teachers_app.billing_models import Bill, BillItem
+from teachers_app.models import CustomUser, Teacher, Student, Task, WorkSession, SalaryReport, MonthlyTeacherTotals
+from teachers_app.services import BulkSalaryService
+
+
+class JsonApiTestCase(TestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_superuser(username='api_admin', password='pass', email='a@example.com')
+        self.teachers = []
+        for i in range(2):
+            user = CustomUser.objects.create_user(username=f'api_teacher_{i}', password='pass', is_teacher=True)
+            self.teachers.append(Teacher.objects.create(user=user))
+        self.teacher = self.teachers[0]
+        student_user = CustomUser.objects.create_user(username='api_student', password='pass', is_student=True)
+        self.student = Student.objects.create(user=student_user)
+        self.task = Task.objects.create(name="Tutoring", hourly_rate=Decimal('12.50'), price=Decimal('20.00'))
+        self.start = timezone.make_aware(timezone.datetime(2025, 3, 10, 10, 0))
+        for i in range(5):
+            WorkSession.objects.create(
+                teacher=self.teachers[i % 2], task=self.task, student=self.student, entry_type='manual',
+                manual_hours=Decimal('1.00'), created_at=self.start + timezone.timedelta(hours=i)
+            )
+
+    def client_for(self, user):
+        client = Client()
+        client.force_login(user)
+        return client
+
+    def get(self, client, name, **params):
+        response = client.get(reverse(name), params)
+        return response.status_code, response.json()
+
+    def post_sessions(self, client, sessions, **params):
+        url = reverse('api_work_sessions')
+        if params:
+            url += '?' + '&'.join(f'{key}={value}' for key, value in params.items())
+        response = client.post(url, json.dumps(sessions), content_type='application/json')
+        return response.status_code, response.json()
+
+    def test_cursor_pagination_walks_every_session_once(self):
+        client = self.client_for(self.admin)
+        seen, cursor = [], None
+        while True:
+            params = {'limit': 2, **({'after': cursor} if cursor else {})}
+            status, body = self.get(client, 'api_work_sessions', **params)
+            self.assertEqual(status, 200)
+            seen += [row['id'] for row in body['results']]
+            cursor = body['next']
+            if cursor is None:
+                break
+        expected = list(WorkSession.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+        status, body = self.get(client, 'api_work_sessions', after='not-a-cursor')
+        self.assertEqual(status, 400)
+
+    def test_sparse_fieldsets(self):
+        client = self.client_for(self.admin)
+        with self.assertNumQueries(3):
+            status, body = self.get(client, 'api_work_sessions', fields='hours,task_name,teacher_username', limit=1)
+        self.assertEqual(status, 200)
+        self.assertEqual(body['results'][0], {
+            'id': body['results'][0]['id'], 'hours': '1.00', 'task_name': 'Tutoring', 'teacher_username': 'api_teacher_0',
+        })
+        status, body = self.get(client, 'api_work_sessions', fields='hours,salary')
+        self.assertEqual((status, 'salary' in body['error']), (400, True))
+
+        status, body = self.get(client, 'api_bills')
+        self.assertEqual((status, body['results']), (200, []))
+
+    def test_teachers_only_see_their_own_sessions(self):
+        client = self.client_for(self.teacher.user)
+        status, body = self.get(client, 'api_work_sessions', fields='teacher')
+        self.assertEqual(status, 200)
+        self.assertEqual({row['teacher'] for row in body['results']}, {self.teacher.id})
+        self.assertEqual(len(body['results']), 3)
+
+        self.assertEqual(self.get(client, 'api_teachers')[0], 403)
+        self.assertEqual(self.get(client, 'api_students')[0], 200)
+        self.assertEqual(self.get(self.client_for(self.student.user), 'api_work_sessions')[0], 403)
+        self.assertEqual(Client().get(reverse('api_bills')).status_code, 401)
+
+    def test_bulk_create(self):
+        client = self.client_for(self.teacher.user)
+        sessions = [
+            {'task': self.task.id, 'entry_type': 'manual', 'hours': 2, 'student': 'api_student'},
+            {'task': 'Tutoring', 'entry_type': 'time_range',
+             'start_time': '2025-03-11T09:00:00', 'end_time': '2025-03-11T12:00:00'},
+        ]
+        before = WorkSession.objects.count()
+        status, body = self.post_sessions(client, {'sessions': sessions}, fields='hours,total_amount,teacher')
+        self.assertEqual(status, 201)
+        self.assertEqual([(row['hours'], row['total_amount'], row['teacher']) for row in body['results']],
+                         [('2.00', '40.00', self.teacher.id), ('3.00', '60.00', self.teacher.id)])
+        self.assertEqual(WorkSession.objects.count(), before + 2)
+        # The new sessions are in the rollups and billed at the end of the request
+        created = WorkSession.objects.get(pk=body['results'][0]['id'])
+        self.assertTrue(MonthlyTeacherTotals.objects.filter(teacher=self.teacher).exists())
+        self.assertEqual(
+            BillItem.objects.filter(bill__student=self.student, bill__month=created.effective_month).count(), 1
+        )
+
+    def test_bulk_create_is_all_or_nothing(self):
+        client = self.client_for(self.teacher.user)
+        before = WorkSession.objects.count()
+        status, body = self.post_sessions(client, [
+            {'task': self.task.id, 'entry_type': 'manual', 'hours': 1},
+            {'task': self.task.id, 'entry_type': 'manual'},
+            {'task': self.task.id, 'entry_type': 'manual', 'hours': 1, 'teacher': 'api_teacher_1'},
+            'nope',
+        ])
+        self.assertEqual(status, 400)
+        self.assertEqual([error['index'] for error in body['errors']], [1, 2, 3])
+        self.assertEqual(WorkSession.objects.count(), before)
+
+        admin = self.client_for(self.admin)
+        status, body = self.post_sessions(admin, [{'task': self.task.id, 'entry_type': 'manual', 'hours': 1}])
+        self.assertEqual(status, 400)
+        status, _ = self.post_sessions(admin, [
+            {'teacher': 'api_teacher_1', 'task': self.task.id, 'entry_type': 'manual', 'hours': 1}
+        ])
+        self.assertEqual(status, 201)
+
+    def test_only_superusers_set_rates_and_dates(self):
+        fields = {'task': self.task.id, 'entry_type': 'manual', 'hours': '1'}
+        status, body = self.post_sessions(self.client_for(self.teacher.user), [
+            {**fields, 'hourly_rate': '999.00'},
+            {**fields, 'created_at': '2020-01-05'},
+            fields,
+        ])
+        self.assertEqual(status, 400)
+        self.assertEqual([error['index'] for error in body['errors']], [0, 1])
+        self.assertIn('hourly_rate', body['errors'][0]['error'])
+        self.assertEqual(WorkSession.objects.count(), 5)
+
+        status, body = self.post_sessions(self.client_for(self.admin), [
+            {**fields, 'teacher': 'api_teacher_0', 'hourly_rate': '15.00', 'created_at': '2020-01-05'},
+        ], fields='teacher_payment_amount,created_at')
+        self.assertEqual(status, 201)
+        self.assertEqual(body['results'][0]['teacher_payment_amount'], '15.00')
+        self.assertTrue(body['results'][0]['created_at'].startswith('2020-01-05'))
+
+    def test_inspectors_cannot_create_sessions(self):
+        inspector = CustomUser.objects.create_user(username='api_inspector', password='pass', is_inspector=True)
+        status, _ = self.post_sessions(self.client_for(inspector), [
+            {'teacher': 'api_teacher_0', 'task': self.task.id, 'entry_type': 'manual', 'hours': 1}
+        ])
+        self.assertEqual(status, 403)
+        self.assertEqual(WorkSession.objects.count(), 5)
+        # They can still read them
+        self.assertEqual(self.get(self.client_for(inspector), 'api_work_sessions')[0], 200)
+
+    def test_reports_and_bills(self):
+        start, end = BulkSalaryService.month_range(2025, 3)
+        SalaryReport.objects.create(teacher=self.teacher, start_date=start, end_date=end)
+        bill = Bill.objects.create(student=self.student, month=date(2025, 3, 1), total_amount=Decimal('5.00'))
+        BillItem.objects.create(bill=bill, service_name="Books", service_price_at_billing=Decimal('5.00'),
+                                quantity=Decimal('1'), amount=Decimal('5.00'))
+
+        status, body = self.get(self.client_for(self.teacher.user), 'api_salary_reports')
+        self.assertEqual(status, 200)
+        # Missing totals are filled from the rollups
+        self.assertEqual((body['results'][0]['total_hours'], body['results'][0]['total_amount']), ('3.00', '37.50'))
+        self.assertEqual(self.get(self.client_for(self.teachers[1].user), 'api_salary_reports')[1]['results'], [])
+
+        student = self.client_for(self.student.user)
+        with self.assertNumQueries(5):
+            status, body = self.get(student, 'api_bills', fields='total_amount,items')
+        self.assertEqual(status, 200)
+        self.assertEqual(body['results'][0]['items'][0]['service_name'], 'Books')
+        self.assertEqual(self.get(self.client_for(self.teachers[1].user), 'api_bills')[0], 403)
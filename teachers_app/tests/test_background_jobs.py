@@ -0,0 +1,99 @@
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.utils import timezone
+from decimal import Decimal
+from teachers_app.models import CustomUser, Teacher, Task, WorkSession, SalaryReport
+from teachers_app.job_models import BackgroundJob
+from teachers_app.job_services import JobService
+
+
+class BackgroundJobTestCase(TestCase):
+    def setUp(self):
+        self.superuser = CustomUser.objects.create_superuser(username='jobs_admin', password='pass', is_inspector=True)
+        self.task = Task.objects.create(name="Tutoring", hourly_rate=Decimal('12.50'), price=Decimal('20.00'))
+        self.teachers = []
+        for i in range(5):
+            user = CustomUser.objects.create_user(username=f'jobs_teacher_{i}', password='pass', is_teacher=True)
+            teacher = Teacher.objects.create(user=user)
+            WorkSession.objects.create(teacher=teacher, task=self.task, entry_type='manual', manual_hours=Decimal('2.00'))
+            self.teachers.append(teacher)
+        self.now = timezone.now()
+
+    def _enqueue(self, **kwargs):
+        actions = {teacher.id: 'create' for teacher in self.teachers}
+        return JobService.enqueue('salary_reports', self.now.year, self.now.month, actions, created_by=self.superuser, **kwargs)
+
+    def test_worker_processes_job_in_chunks(self):
+        """The worker claims the job, runs it chunk by chunk and stores the result"""
+        job = self._enqueue()
+
+        call_command('run_jobs', '--once', '--chunk-size', '2', stdout=StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'succeeded')
+        self.assertEqual(job.progress_done, 5)
+        self.assertEqual(job.progress_percent, 100)
+        self.assertEqual(job.result, {'created': 5})
+        self.assertEqual(SalaryReport.objects.filter(created_by=self.superuser).count(), 5)
+
+    def test_job_is_claimed_once(self):
+        """A claimed job is not handed to a second worker"""
+        job = self._enqueue()
+        self.assertEqual(JobService.claim_next('worker-1'), job)
+        self.assertIsNone(JobService.claim_next('worker-2'))
+
+    def test_failed_job_is_retried_then_marked_failed(self):
+        """Errors schedule a retry with backoff until max_attempts is reached"""
+        job = self._enqueue(max_attempts=2)
+
+        with mock.patch('teachers_app.job_services.run_job_chunk', side_effect=RuntimeError('boom')):
+            JobService.run(JobService.claim_next('worker'))
+            job.refresh_from_db()
+            self.assertEqual(job.status, 'queued')
+            self.assertGreater(job.run_after, timezone.now())
+            self.assertIn('boom', job.error)
+
+            BackgroundJob.objects.filter(pk=job.pk).update(run_after=timezone.now())
+            JobService.run(JobService.claim_next('worker'))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.attempts, 2)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_stale_jobs_are_found_by_heartbeat(self):
+        """Long jobs that still report progress stay running; silent ones are requeued or failed"""
+        alive, silent, exhausted = (self._enqueue(max_attempts=2) for _ in range(3))
+        for job in (alive, silent, exhausted):
+            JobService.claim_next('worker')
+        long_ago = timezone.now() - timezone.timedelta(hours=3)
+        BackgroundJob.objects.update(started_at=long_ago, heartbeat_at=long_ago)
+        JobService.heartbeat(alive, 2)
+        BackgroundJob.objects.filter(pk=exhausted.pk).update(attempts=2)
+
+        self.assertEqual(JobService.requeue_stale(timezone.timedelta(hours=1)), (1, 1))
+        statuses = dict(BackgroundJob.objects.values_list('pk', 'status'))
+        self.assertEqual([statuses[job.pk] for job in (alive, silent, exhausted)], ['running', 'queued', 'failed'])
+        exhausted.refresh_from_db()
+        self.assertIsNotNone(exhausted.finished_at)
+        self.assertTrue(exhausted.error)
+
+    def test_bulk_view_enqueues_job(self):
+        """Choosing background processing queues a job and shows its status page"""
+        client = Client()
+        client.force_login(self.superuser)
+        url = reverse('salary_reports_bulk') + f'?month={self.now.month}&year={self.now.year}'
+        data = {f'action_{teacher.id}': 'create' for teacher in self.teachers}
+        data['background'] = '1'
+
+        response = client.post(url, data)
+
+        job = BackgroundJob.objects.get()
+        self.assertRedirects(response, reverse('job_detail', args=[job.pk]))
+        self.assertEqual(job.progress_total, 5)
+        self.assertFalse(SalaryReport.objects.exists())
+        response = client.get(reverse('job_detail', args=[job.pk]))
+        self.assertContains(response, 'http-equiv="refresh"')
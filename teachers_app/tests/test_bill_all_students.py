@@ -0,0 +1,117 @@
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.utils import timezone
+from decimal import Decimal
+from teachers_app.models import CustomUser, Teacher, Student, Task, WorkSession
+from teachers_app.billing_models import Bill, BillItem, LedgerEntry
+from teachers_app.billing_services import BulkBillingService
+
+
+class BulkBillingServiceTestCase(TestCase):
+    def setUp(self):
+        self.superuser = CustomUser.objects.create_superuser(username='billing_admin', password='pass', is_inspector=True)
+        teacher_user = CustomUser.objects.create_user(username='billing_teacher', password='pass', is_teacher=True)
+        self.teacher = Teacher.objects.create(user=teacher_user)
+        self.task = Task.objects.create(name="Tutoring", hourly_rate=Decimal('10.00'), price=Decimal('20.00'))
+        self.free_task = Task.objects.create(name="Trial", hourly_rate=Decimal('10.00'), price=Decimal('0.00'))
+        self.students = []
+        for i in range(3):
+            user = CustomUser.objects.create_user(username=f'billing_student_{i}', password='pass', is_student=True)
+            self.students.append(Student.objects.create(user=user))
+        self.month_start = timezone.localdate().replace(day=1)
+
+        for hours in ['1.50', '2.00']:
+            self._session(self.students[0], self.task, hours)
+        self._session(self.students[0], self.free_task, '1.00')
+        self._session(self.students[1], self.task, '0.75')
+
+    def _session(self, student, task, hours):
+        return WorkSession.objects.create(
+            teacher=self.teacher, task=task, student=student, entry_type='manual', manual_hours=Decimal(hours)
+        )
+
+    def test_task_totals_group_by_student_and_task(self):
+        """One row per billable task, free tasks left out"""
+        totals = BulkBillingService.task_totals(self.month_start)
+
+        self.assertEqual(len(totals[self.students[0].id]), 1)
+        row = totals[self.students[0].id][0]
+        self.assertEqual(row['session_count'], 2)
+        self.assertEqual(row['quantity'], Decimal('3.50'))
+        self.assertEqual(row['amount'], Decimal('70.00'))
+        self.assertNotIn(self.students[2].id, totals)
+        self.assertEqual(BulkBillingService.session_counts(self.month_start)[self.students[0].id], 3)
+
+    def test_apply_creates_bills_and_items(self):
+        """New bills get one item per task and a matching total"""
+        actions = {student.id: 'create' for student in self.students}
+        results, stats = BulkBillingService.apply(self.month_start, actions)
+
+        self.assertEqual(dict(results), {
+            self.students[0].id: 'created', self.students[1].id: 'created', self.students[2].id: 'skipped'
+        })
+        self.assertEqual(stats['bills_created'], 2)
+        self.assertEqual(stats['items_created'], 2)
+        self.assertEqual(stats['sessions'], 3)
+        bill = Bill.objects.get(student=self.students[0], month=self.month_start)
+        self.assertEqual(bill.total_amount, Decimal('70.00'))
+        item = bill.items.get()
+        self.assertEqual(item.task, self.task)
+        self.assertEqual(item.quantity, Decimal('3.50'))
+        self.assertFalse(Bill.objects.filter(student=self.students[2]).exists())
+
+    def test_apply_creates_no_empty_bills(self):
+        """Students with only free sessions, or none, get no 0.00 bill and no ledger entry"""
+        self._session(self.students[2], self.free_task, '2.00')
+        actions = {self.students[2].id: 'create'}
+        results, stats = BulkBillingService.apply(self.month_start, actions)
+        self.assertEqual((results, stats['bills_created']), ([(self.students[2].id, 'skipped')], 0))
+        BulkBillingService.apply(self.month_start, {self.students[2].id: 'sync'})
+        self.assertFalse(Bill.objects.filter(student=self.students[2]).exists())
+        self.assertFalse(LedgerEntry.objects.filter(student=self.students[2]).exists())
+
+    def test_apply_updates_items_and_keeps_service_items(self):
+        """Updating refreshes session items in place and keeps manual service items in the total"""
+        BulkBillingService.apply(self.month_start, {self.students[0].id: 'create'})
+        bill = Bill.objects.get(student=self.students[0])
+        item = bill.items.get()
+        BillItem.objects.create(
+            bill=bill, service_name="Books", service_price_at_billing=Decimal('5.00'),
+            quantity=Decimal('2'), amount=Decimal('10.00')
+        )
+        self._session(self.students[0], self.task, '1.00')
+
+        results, stats = BulkBillingService.apply(self.month_start, {self.students[0].id: 'update'})
+
+        self.assertEqual(results, [(self.students[0].id, 'updated')])
+        self.assertEqual(stats['items_updated'], 1)
+        self.assertEqual(stats['items_created'], 0)
+        item.refresh_from_db()
+        self.assertEqual(item.quantity, Decimal('4.50'))
+        bill.refresh_from_db()
+        self.assertEqual(bill.total_amount, Decimal('100.00'))
+
+    def test_apply_removes_items_for_tasks_without_sessions(self):
+        """Session items whose sessions are gone are deleted on update"""
+        BulkBillingService.apply(self.month_start, {self.students[1].id: 'create'})
+        WorkSession.objects.filter(student=self.students[1]).update(is_deleted=True)
+
+        _, stats = BulkBillingService.apply(self.month_start, {self.students[1].id: 'update'})
+
+        self.assertEqual(stats['items_deleted'], 1)
+        bill = Bill.objects.get(student=self.students[1])
+        self.assertFalse(bill.items.exists())
+        self.assertEqual(bill.total_amount, Decimal('0.00'))
+
+    def test_bulk_view_query_count_is_constant(self):
+        """The confirm POST does not issue queries per student"""
+        client = Client()
+        client.force_login(self.superuser)
+        url = reverse('bill_all_students') + f'?month={self.month_start.month}&year={self.month_start.year}'
+
+        # Includes the ledger: one locked balance read and two bulk inserts, whatever the number of students
+        with self.assertNumQueries(13):
+            response = client.post(url, {'confirm': '1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Bill.objects.filter(month=self.month_start).count(), 2)
+        self.assertEqual(response.context['stats']['bills_created'], 2)
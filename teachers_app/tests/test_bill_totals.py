@@ -0,0 +1,140 @@
+import threading
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase, Client
+from django.urls import reverse
+from teachers_app.billing_models import Bill, BillItem
+from teachers_app.billing_services import BillTotalsService, BulkBillingService, LedgerService
+from teachers_app.models import CustomUser, Student, Service
+
+
+def item_fields(amount, price=None, name="Books"):
+    price = Decimal(price if price is not None else amount)
+    amount = Decimal(amount)
+    return {
+        'service_name': name, 'service_price_at_billing': price,
+        'quantity': amount / price if price else Decimal('1'), 'amount': amount,
+    }
+
+
+class BillTotalsTestCase(TestCase):
+    def setUp(self):
+        user = CustomUser.objects.create_user(username='totals_student', password='pass', is_student=True)
+        self.student = Student.objects.create(user=user)
+        self.bill = Bill.objects.create(student=self.student, month=date(2025, 3, 1), total_amount=Decimal('0.00'))
+
+    def total(self, bill=None):
+        return Bill.objects.get(pk=(bill or self.bill).pk).total_amount
+
+    def test_items_move_the_total(self):
+        # INSERT, one UPDATE of the bill and the ledger charge (locked balance read, balance insert,
+        # entry insert); no re-aggregation. Plus the savepoint pair inside the test transaction
+        with self.assertNumQueries(7):
+            item = BillTotalsService.add_item(self.bill, **item_fields('10.00'))
+        BillTotalsService.add_item(self.bill, **item_fields('2.5050', '2.5050'))
+        # Free and negative items do not count, as in create_bill
+        BillTotalsService.add_item(self.bill, **item_fields('0.00', '0.00'))
+        BillTotalsService.add_item(self.bill, **item_fields('-5.00'))
+        self.assertEqual(self.total(), Decimal('12.51'))
+
+        item.amount = Decimal('4.00')
+        BillTotalsService.save_item(item)
+        self.assertEqual(self.total(), Decimal('6.51'))
+
+        other = Bill.objects.create(student=self.student, month=date(2025, 4, 1), total_amount=Decimal('0.00'))
+        item.bill = other
+        BillTotalsService.save_item(item)
+        self.assertEqual((self.total(), self.total(other)), (Decimal('2.51'), Decimal('4.00')))
+
+        BillTotalsService.delete_item(item)
+        self.assertEqual(self.total(other), Decimal('0.00'))
+        self.assertEqual(BillTotalsService.find_drift(), [])
+
+    def test_charge_view_adds_to_the_total(self):
+        admin = CustomUser.objects.create_superuser(username='totals_admin', password='pass', email='t@example.com')
+        service = Service.objects.create(name="Books", price=Decimal('7.50'))
+        BillTotalsService.add_item(self.bill, **item_fields('10.00'))
+        client = Client()
+        client.force_login(admin)
+        client.post(reverse('charge_student_for_service'), {
+            'student': self.student.id, 'service': service.id, 'quantity': '2', 'month': '3', 'year': '2025',
+        })
+        self.assertEqual(self.total(), Decimal('25.00'))
+
+    def test_create_bill_view_keeps_a_concurrent_charge(self):
+        admin = CustomUser.objects.create_superuser(username='totals_admin', password='pass', email='t@example.com')
+        BillTotalsService.add_item(self.bill, **item_fields('10.00'))
+        task_totals = BulkBillingService.task_totals
+
+        def charge_meanwhile(*args, **kwargs):
+            # Another request charges the bill after the view has aggregated the month's sessions
+            BillTotalsService.add_item(self.bill, **item_fields('5.00'))
+            return task_totals(*args, **kwargs)
+
+        client = Client()
+        client.force_login(admin)
+        with mock.patch.object(BulkBillingService, 'task_totals', side_effect=charge_meanwhile):
+            client.get(reverse('create_bill', args=[self.student.id]), {'month': '3', 'year': '2025', 'action': 'create'})
+        self.assertEqual(self.total(), Decimal('15.00'))
+        self.assertEqual(LedgerService.balance(self.student), Decimal('15.00'))
+
+    def test_reconcile_command_finds_and_fixes_drift(self):
+        BillTotalsService.add_item(self.bill, **item_fields('10.00'))
+        BillItem.objects.create(bill=self.bill, **item_fields('5.00'))  # bypasses the totals
+        clean = Bill.objects.create(student=self.student, month=date(2025, 4, 1), total_amount=Decimal('0.00'))
+
+        out = StringIO()
+        call_command('reconcile_bill_totals', stdout=out)
+        self.assertIn(f"Bill {self.bill.pk}: total 10.00, items add up to 15.00", out.getvalue())
+        self.assertEqual(self.total(), Decimal('10.00'))
+
+        out = StringIO()
+        call_command('reconcile_bill_totals', '--fix', stdout=out)
+        self.assertIn('Fixed 1 bill totals.', out.getvalue())
+        self.assertEqual((self.total(), self.total(clean)), (Decimal('15.00'), Decimal('0.00')))
+        self.assertEqual(BillTotalsService.find_drift(), [])
+
+
+class ConcurrentBillTotalsTestCase(TransactionTestCase):
+    THREADS = 8
+    CHARGES = 10
+
+    def test_concurrent_charges_all_count(self):
+        """Many threads charging one bill: every committed item is in the total"""
+        user = CustomUser.objects.create_user(username='race_student', password='pass', is_student=True)
+        bill = Bill.objects.create(
+            student=Student.objects.create(user=user), month=date(2025, 3, 1), total_amount=Decimal('0.00')
+        )
+        errors = []
+
+        def charge():
+            try:
+                for _ in range(self.CHARGES):
+                    # SQLite reports a busy table instead of waiting; retry like a user would
+                    while True:
+                        try:
+                            BillTotalsService.add_item(bill, **item_fields('1.25'))
+                            break
+                        except OperationalError as e:
+                            if 'locked' not in str(e):
+                                raise
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=charge) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(BillItem.objects.filter(bill=bill).count(), self.THREADS * self.CHARGES)
+        bill.refresh_from_db()
+        self.assertEqual(bill.total_amount, Decimal('1.25') * self.THREADS * self.CHARGES)
+        self.assertEqual(BillTotalsService.find_drift(), [])
@@ -0,0 +1,60 @@
+from django.test import TestCase
+from django.utils import timezone
+from datetime import date, datetime
+from decimal import Decimal
+from teachers_app.models import CustomUser, Teacher, Student, Task, WorkSession
+from teachers_app.billing_services import StudentBillingService
+
+
+class BillingMonthTestCase(TestCase):
+    def setUp(self):
+        teacher_user = CustomUser.objects.create_user(username='month_teacher', password='pass', is_teacher=True)
+        student_user = CustomUser.objects.create_user(username='month_student', password='pass', is_student=True)
+        self.teacher = Teacher.objects.create(user=teacher_user)
+        self.student = Student.objects.create(user=student_user)
+        self.task = Task.objects.create(name="Tutoring", hourly_rate=Decimal('10.00'), price=Decimal('20.00'))
+
+    def test_effective_date_follows_entry_type(self):
+        """effective_date comes from created_at, clock_in or start_time"""
+        manual = WorkSession.objects.create(
+            teacher=self.teacher, task=self.task, student=self.student, entry_type='manual', manual_hours=Decimal('1.00')
+        )
+        self.assertEqual(manual.effective_date, timezone.localdate())
+
+        clock_in = timezone.make_aware(datetime(2025, 3, 31, 23, 30))
+        clock = WorkSession.objects.create(
+            teacher=self.teacher, task=self.task, student=self.student, entry_type='clock',
+            clock_in=clock_in, clock_out=clock_in + timezone.timedelta(hours=2)
+        )
+        self.assertEqual(clock.effective_date, date(2025, 3, 31))
+        self.assertEqual(clock.effective_month, date(2025, 3, 1))
+
+        start = timezone.make_aware(datetime(2025, 4, 1, 0, 30))
+        time_range = WorkSession.objects.create(
+            teacher=self.teacher, task=self.task, student=self.student, entry_type='time_range',
+            start_time=start, end_time=start + timezone.timedelta(hours=1)
+        )
+        self.assertEqual(time_range.effective_month, date(2025, 4, 1))
+
+    def test_month_filter_matches_date_lookups(self):
+        """The indexed month filter returns the same sessions as the per-column date lookups"""
+        for day, hour in [(31, 23), (1, 0), (15, 12)]:
+            month = 3 if day == 31 else 4
+            start = timezone.make_aware(datetime(2025, month, day, hour, 30))
+            WorkSession.objects.create(
+                teacher=self.teacher, task=self.task, student=self.student, entry_type='time_range',
+                start_time=start, end_time=start + timezone.timedelta(hours=1)
+            )
+            WorkSession.objects.create(
+                teacher=self.teacher, task=self.task, student=self.student, entry_type='clock',
+                clock_in=start, clock_out=start + timezone.timedelta(hours=1)
+            )
+
+        sessions = StudentBillingService.get_month_work_sessions(self.student, date(2025, 4, 1))
+        expected = WorkSession.objects.filter(student=self.student).filter(
+            start_time__date__year=2025, start_time__date__month=4
+        ).count() + WorkSession.objects.filter(student=self.student).filter(
+            clock_in__date__year=2025, clock_in__date__month=4
+        ).count()
+        self.assertEqual(sessions.count(), expected)
+        self.assertEqual(sessions.count(), 4)
@@ -0,0 +1,116 @@
+from datetime import date, datetime
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from teachers_app.billing_models import Bill, BillItem
+from teachers_app.billing_services import BillingPipeline, BillTotalsService, StudentBillingService
+from teachers_app.job_models import BackgroundJob
+from teachers_app.models import CustomUser, Teacher, Student, Task, WorkSession
+
+
+class BillingPipelineTestCase(TestCase):
+    def setUp(self):
+        teacher_user = CustomUser.objects.create_user(username='pipe_teacher', password='pass', is_teacher=True)
+        self.teacher = Teacher.objects.create(user=teacher_user)
+        self.students = []
+        for i in range(3):
+            user = CustomUser.objects.create_user(username=f'pipe_student_{i}', password='pass', is_student=True)
+            self.students.append(Student.objects.create(user=user))
+        self.student = self.students[0]
+        self.task = Task.objects.create(name="Tutoring", hourly_rate=Decimal('12.50'), price=Decimal('20.00'))
+        self.free_task = Task.objects.create(name="Free", hourly_rate=Decimal('7.50'), price=Decimal('0.00'))
+        self.start = timezone.make_aware(datetime(2025, 3, 10, 10, 0))
+        self.month = date(2025, 3, 1)
+
+    def _session(self, hours='2.00', task=None, student=None):
+        start = self.start
+        return WorkSession.objects.create(
+            teacher=self.teacher, task=task or self.task, student=student or self.student, entry_type='time_range',
+            start_time=start, end_time=start + timezone.timedelta(hours=float(hours)),
+        )
+
+    def test_session_is_billed_once_per_task(self):
+        item = StudentBillingService.create_bill_item_for_work_session(self._session())
+        self.assertEqual((item.task_id, item.quantity, item.amount), (self.task.id, Decimal('2.00'), Decimal('40.00')))
+        self.assertEqual(item.bill.month, self.month)
+
+        second = self._session('1.00')
+        item = StudentBillingService.create_bill_item_for_work_session(second)
+        # Billing the same session again changes nothing
+        item = StudentBillingService.create_bill_item_for_work_session(second)
+        self.assertEqual((item.quantity, item.amount), (Decimal('3.00'), Decimal('60.00')))
+        bill = Bill.objects.get(student=self.student, month=self.month)
+        self.assertEqual(bill.items.count(), 1)
+        self.assertEqual(bill.total_amount, Decimal('60.00'))
+        self.assertEqual(BillTotalsService.find_drift(), [])
+
+    def test_unbillable_sessions(self):
+        self.assertIsNone(StudentBillingService.create_bill_item_for_work_session(self._session(task=self.free_task)))
+        open_session = WorkSession.objects.create(
+            teacher=self.teacher, task=self.task, student=self.student, entry_type='clock', clock_in=self.start
+        )
+        self.assertIsNone(StudentBillingService.create_bill_item_for_work_session(open_session))
+        self.assertFalse(BillItem.objects.exists())
+
+    def test_paid_bills_are_left_alone(self):
+        StudentBillingService.create_bill_item_for_work_session(self._session())
+        Bill.objects.update(is_paid=True)
+        StudentBillingService.create_bill_item_for_work_session(self._session('1.00'))
+        self.assertEqual(Bill.objects.get().total_amount, Decimal('40.00'))
+
+    def test_flush_cost_does_not_grow_with_sessions(self):
+        def flush_queries(sessions):
+            with BillingPipeline.collect() as pipeline:
+                for session in sessions:
+                    StudentBillingService.create_bill_item_for_work_session(session)
+                self.assertFalse(Bill.objects.filter(student__in=[s.student_id for s in sessions]).exists())
+                with CaptureQueriesContext(connection) as ctx:
+                    pipeline.flush()
+            return len(ctx.captured_queries)
+
+        one = flush_queries([self._session()])
+        many = flush_queries([self._session(student=student, task=task)
+                              for student in self.students[1:] for task in (self.task, self.free_task) for _ in range(3)])
+        self.assertEqual(one, many)
+        self.assertEqual(Bill.objects.count(), 3)
+        self.assertEqual(set(Bill.objects.values_list('total_amount', flat=True)), {Decimal('120.00'), Decimal('40.00')})
+
+    @override_settings(BILLING_FLUSH='job')
+    def test_job_mode_queues_a_background_job(self):
+        with BillingPipeline.collect():
+            StudentBillingService.create_bill_item_for_work_session(self._session())
+        job = BackgroundJob.objects.get()
+        self.assertEqual((job.kind, job.params['actions']), ('bill_students', {str(self.student.id): 'sync'}))
+        self.assertFalse(Bill.objects.exists())
+
+        call_command('run_jobs', '--once', stdout=StringIO())
+        self.assertEqual(Bill.objects.get().total_amount, Decimal('40.00'))
+
+    @override_settings(BILLING_FLUSH='month_close')
+    def test_month_close_mode_leaves_billing_to_month_end(self):
+        with BillingPipeline.collect():
+            StudentBillingService.create_bill_item_for_work_session(self._session())
+        self.assertFalse(Bill.objects.exists())
+
+    def test_record_work_bills_at_the_end_of_the_request(self):
+        client = Client()
+        client.login(username='pipe_teacher', password='pass')
+        client.post(reverse('record_work'), {
+            'entry_type': 'manual', 'task': self.task.id, 'student': self.student.id, 'manual_hours': '1.50',
+        })
+        bill = Bill.objects.get(student=self.student)
+        self.assertEqual(bill.total_amount, Decimal('30.00'))
+
+    def test_balance_and_bills(self):
+        StudentBillingService.create_bill_item_for_work_session(self._session())
+        Bill.objects.create(student=self.student, month=date(2025, 2, 1), total_amount=Decimal('15.00'), is_paid=True)
+        with self.assertNumQueries(1):
+            self.assertEqual(StudentBillingService.calculate_student_balance(self.student), Decimal('40.00'))
+        self.assertEqual(StudentBillingService.calculate_student_balance(self.students[1]), Decimal('0.00'))
+        self.assertEqual([bill.month for bill in StudentBillingService.get_student_bills(self.student)],
+                         [self.month, date(2025, 2, 1)])
@@ -0,0 +1,158 @@
+import random
+from datetime import datetime, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from teachers_app import calculations
+from teachers_app.models import CustomUser, Teacher, Task, WorkSession
+
+# Property tests run on seeded random samples so failures are reproducible
+SAMPLES = 2000
+CENT = Decimal('0.01')
+
+
+def reference_hours(entry_type, manual_hours, clock_in, clock_out, start_time, end_time):
+    """The per-row Decimal rules WorkSession.save() used before calculations.py"""
+    if entry_type == 'manual':
+        return manual_hours
+    start, end = (clock_in, clock_out) if entry_type == 'clock' else (start_time, end_time)
+    if not (start and end):
+        return None
+    hours = (end - start).total_seconds() / 3600
+    return Decimal(str(hours)).quantize(Decimal('1'), rounding=ROUND_HALF_UP)
+
+
+def reference_amounts(hours, rate, price):
+    """(teacher payment, student billing) as calculate_salary rounds them, per row"""
+    if hours is None or hours <= 0:
+        return None, None
+    payment = (hours * rate).quantize(CENT, rounding=ROUND_HALF_UP) if rate is not None else None
+    billing = Decimal('0.00') if price == 0 else (hours * price).quantize(CENT, rounding=ROUND_HALF_UP)
+    return payment, billing
+
+
+def random_money(rng, top=20000):
+    return Decimal(rng.randint(0, top)).scaleb(-2)
+
+
+def random_session(rng, base):
+    entry_type = rng.choice(['manual', 'clock', 'time_range'])
+    start = base + timedelta(microseconds=rng.randint(0, 10 ** 12))
+    # Mix arbitrary durations with exact and near half-hour boundaries
+    duration = rng.choice([
+        timedelta(microseconds=rng.randint(0, 12 * 3600 * 10 ** 6)),
+        timedelta(minutes=30 + 60 * rng.randint(0, 10)),
+        timedelta(minutes=30 + 60 * rng.randint(0, 10), microseconds=rng.choice([-1, 1])),
+    ])
+    end = start + duration if rng.random() > 0.05 else None
+    return {
+        'entry_type': entry_type,
+        'manual_hours': Decimal(rng.randint(-100, 99999)).scaleb(-2) if entry_type == 'manual' else None,
+        'clock_in': start if entry_type == 'clock' else None,
+        'clock_out': end if entry_type == 'clock' else None,
+        'start_time': start if entry_type == 'time_range' else None,
+        'end_time': end if entry_type == 'time_range' else None,
+        'hourly_rate': random_money(rng) if rng.random() > 0.05 else None,
+        'price': random_money(rng) if rng.random() > 0.2 else Decimal('0.00'),
+    }
+
+
+class CalculationPropertyTestCase(SimpleTestCase):
+    def setUp(self):
+        self.rng = random.Random(20261018)
+        self.base = timezone.make_aware(datetime(2025, 1, 1))
+
+    def test_duration_hours_match_the_float_rule(self):
+        for _ in range(SAMPLES):
+            start = self.base + timedelta(microseconds=self.rng.randint(0, 10 ** 12))
+            end = start + timedelta(microseconds=self.rng.randint(-3600 * 10 ** 6, 48 * 3600 * 10 ** 6))
+            expected = reference_hours('clock', None, start, end, None, None)
+            self.assertEqual(calculations.from_hundredths(calculations.duration_hundredths(start, end)), expected)
+
+    def test_exact_half_hours_round_away_from_zero(self):
+        start = self.base
+        self.assertEqual(calculations.duration_hundredths(start, start + timedelta(minutes=90)), 200)
+        self.assertEqual(calculations.duration_hundredths(start, start + timedelta(minutes=89, seconds=59)), 100)
+        self.assertEqual(calculations.duration_hundredths(start, start - timedelta(minutes=30)), -100)
+
+    def test_amount_cents_match_decimal_half_up(self):
+        for _ in range(SAMPLES):
+            hours, rate = random_money(self.rng, 100000), random_money(self.rng)
+            expected = (hours * rate).quantize(CENT, rounding=ROUND_HALF_UP)
+            cents = calculations.amount_cents(calculations.to_hundredths(hours), calculations.to_hundredths(rate))
+            self.assertEqual(calculations.from_hundredths(cents), expected)
+
+    def test_batch_matches_per_row_rules(self):
+        sessions = [random_session(self.rng, self.base) for _ in range(SAMPLES)]
+        columns = {key: [session[key] for session in sessions] for key in sessions[0]}
+        results = calculations.compute_batch(
+            columns['entry_type'], columns['manual_hours'], columns['clock_in'], columns['clock_out'],
+            columns['start_time'], columns['end_time'], columns['hourly_rate'], columns['price'],
+        )
+        self.assertEqual(len(results), len(sessions))
+        for session, result in zip(sessions, results):
+            hours = reference_hours(session['entry_type'], session['manual_hours'], session['clock_in'],
+                                    session['clock_out'], session['start_time'], session['end_time'])
+            payment, billing = reference_amounts(hours, session['hourly_rate'], session['price'])
+            self.assertEqual(calculations.from_hundredths(result.hours), hours, session)
+            self.assertEqual(calculations.from_hundredths(result.teacher_payment), payment, session)
+            self.assertEqual(calculations.from_hundredths(result.student_billing), billing, session)
+
+    def test_to_hundredths_rounds_half_up(self):
+        self.assertEqual(calculations.to_hundredths(Decimal('1.235')), 124)
+        self.assertEqual(calculations.to_hundredths(Decimal('1.234')), 123)
+        self.assertEqual(calculations.to_hundredths('2'), 200)
+        self.assertIsNone(calculations.to_hundredths(None))
+
+
+class WorkSessionSaveCalculationTestCase(TestCase):
+    def setUp(self):
+        user = CustomUser.objects.create_user(username='calc_teacher', password='pass', is_teacher=True)
+        self.teacher = Teacher.objects.create(user=user)
+        self.rng = random.Random(7)
+
+    def test_saved_sessions_store_the_batch_results(self):
+        """save() stores exactly what the batch computation returns, after the database round trip"""
+        base = timezone.make_aware(datetime(2025, 1, 1))
+        for _ in range(60):
+            values = random_session(self.rng, base)
+            if values['entry_type'] == 'time_range' and values['end_time'] is None:
+                continue  # save() rejects incomplete time ranges; open clock sessions are kept
+            task = Task.objects.create(
+                name="Random", hourly_rate=values['hourly_rate'] or Decimal('1.00'), price=values['price']
+            )
+            session = WorkSession.objects.create(
+                teacher=self.teacher, task=task, entry_type=values['entry_type'],
+                manual_hours=values['manual_hours'] if values['manual_hours'] is None else abs(values['manual_hours']) % 1000,
+                clock_in=values['clock_in'], clock_out=values['clock_out'],
+                start_time=values['start_time'], end_time=values['end_time'],
+            )
+            session.refresh_from_db()
+            [expected] = calculations.compute_sessions([session], {task.id: task.price})
+            self.assertEqual(session.stored_hours, calculations.from_hundredths(expected.hours))
+            self.assertEqual(session.teacher_payment_amount, calculations.from_hundredths(expected.teacher_payment))
+            self.assertEqual(session.total_amount, calculations.from_hundredths(expected.student_billing))
+            self.assertEqual(session.calculated_hours(), session.stored_hours)
+
+    def test_half_cent_ties_round_up(self):
+        """Stored amounts round like the salary report instead of the database adapter's half-even"""
+        task = Task.objects.create(name="Tie", hourly_rate=Decimal('0.01'), price=Decimal('0.01'))
+        session = WorkSession.objects.create(
+            teacher=self.teacher, task=task, entry_type='manual', manual_hours=Decimal('0.50')
+        )
+        session.refresh_from_db()
+        self.assertEqual(session.teacher_payment_amount, Decimal('0.01'))
+        self.assertEqual(session.total_amount, Decimal('0.01'))
+
+    def test_int_rates_and_prices_are_money(self):
+        """A task created with plain ints is paid and billed in euros, not cents"""
+        [result] = calculations.compute_batch(['manual'], [Decimal('2.00')], [None], [None], [None], [None], [10], [20])
+        self.assertEqual((result.teacher_payment, result.student_billing), (2000, 4000))
+
+        task = Task.objects.create(name="Ints", hourly_rate=10, price=20)
+        session = WorkSession.objects.create(
+            teacher=self.teacher, task=task, entry_type='manual', manual_hours=Decimal('2.00')
+        )
+        session.refresh_from_db()
+        self.assertEqual(session.teacher_payment_amount, Decimal('20.00'))
+        self.assertEqual(session.total_amount, Decimal('40.00'))
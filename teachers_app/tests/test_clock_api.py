@@ -0,0 +1,264 @@
+import json
+from datetime import timedelta
+from io import StringIO
+from decimal import Decimal
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from teachers_app.clock_services import AlreadyClockedIn, ClockService
+from teachers_app.billing_models import BillItem
+from teachers_app.models import (
+    CustomUser, Teacher, Student, Task, WorkSession, SalaryReport, MonthlyTeacherTotals, MonthlyStudentTotals
+)
+from teachers_app.services import SalaryCacheService
+
+
+class ClockApiTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        teacher_user = CustomUser.objects.create_user(username='clock_teacher', password='pass', is_teacher=True)
+        other_user = CustomUser.objects.create_user(username='clock_other', password='pass', is_teacher=True)
+        student_user = CustomUser.objects.create_user(username='clock_student', password='pass', is_student=True)
+        self.admin = CustomUser.objects.create_superuser(username='clock_admin', password='pass', email='a@example.com')
+        self.teacher = Teacher.objects.create(user=teacher_user)
+        self.other = Teacher.objects.create(user=other_user)
+        self.student = Student.objects.create(user=student_user)
+        self.task = Task.objects.create(name="Tutoring", hourly_rate=Decimal('12.50'), price=Decimal('20.00'))
+        self.client = Client()
+        self.client.login(username='clock_teacher', password='pass')
+        self.url = reverse('clock_api')
+
+    def post(self, data, url=None):
+        return self.client.post(url or self.url, json.dumps(data), content_type='application/json')
+
+    def snapshot(self):
+        return (
+            sorted(MonthlyTeacherTotals.objects.values_list('teacher_id', 'month', 'session_count', 'hours', 'teacher_payment')),
+            sorted(MonthlyStudentTotals.objects.values_list('student_id', 'month', 'session_count', 'hours', 'student_billing')),
+        )
+
+    def test_clock_in_and_out(self):
+        response = self.post({'action': 'in', 'task': self.task.id, 'student': self.student.id})
+        self.assertEqual(response.status_code, 201)
+        opened = response.json()['session']
+        self.assertIsNone(opened['clock_out'])
+        self.assertEqual(self.client.get(self.url).json()['active']['id'], opened['id'])
+
+        # Backdate the clock-in so the session has hours
+        WorkSession.objects.filter(pk=opened['id']).update(clock_in=timezone.now() - timedelta(hours=2, minutes=10))
+        response = self.post({'action': 'out'})
+        self.assertEqual(response.status_code, 200)
+        closed = response.json()['session']
+        self.assertEqual(closed['id'], opened['id'])
+        self.assertEqual(closed['hours'], '2.00')
+        self.assertEqual(closed['teacher_payment'], '25.00')
+        self.assertEqual(closed['total_amount'], '40.00')
+        self.assertIsNone(self.client.get(self.url).json()['active'])
+
+        session = WorkSession.objects.get(pk=opened['id'])
+        self.assertIsNotNone(session.clock_out)
+        self.assertEqual(session.stored_hours, Decimal('2.00'))
+        self.assertEqual((session.hours_hundredths, session.teacher_payment_cents, session.total_amount_cents), (200, 2500, 4000))
+
+    def test_double_clock_in_is_rejected(self):
+        first = self.post({'action': 'in', 'task': self.task.id})
+        second = self.post({'action': 'in', 'task': self.task.id})
+        self.assertEqual(second.status_code, 409)
+        self.assertEqual(second.json()['active']['id'], first.json()['session']['id'])
+        self.assertEqual(WorkSession.objects.filter(teacher=self.teacher, entry_type='clock').count(), 1)
+        self.assertEqual(self.post({'action': 'out'}).status_code, 200)
+        self.assertEqual(self.post({'action': 'out'}).status_code, 409)
+
+    def test_constraint_allows_one_open_session_per_teacher(self):
+        now = timezone.now()
+        WorkSession.objects.create(teacher=self.teacher, task=self.task, entry_type='clock', clock_in=now)
+        # A racing insert that skipped the service check still fails in the database
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            WorkSession.objects.create(teacher=self.teacher, task=self.task, entry_type='clock', clock_in=now)
+        with self.assertRaises(AlreadyClockedIn):
+            ClockService.clock_in(self.teacher.id, self.task)
+        # Other teachers, closed sessions and deleted sessions are not affected
+        ClockService.clock_in(self.other.id, self.task)
+        WorkSession.objects.create(teacher=self.teacher, task=self.task, entry_type='clock',
+                                   clock_in=now - timedelta(hours=3), clock_out=now - timedelta(hours=2))
+        WorkSession.objects.create(teacher=self.teacher, task=self.task, entry_type='clock', clock_in=now, is_deleted=True)
+
+    def test_clock_out_updates_rollups_reports_and_cache(self):
+        start = timezone.now() - timedelta(hours=3)
+        ClockService.clock_in(self.teacher.id, self.task, self.student.id, now=start)
+        local = timezone.localtime(start)
+        report_start = local.date().replace(day=1)
+        report = SalaryReport.objects.create(
+            teacher=self.teacher, start_date=report_start, end_date=report_start + timedelta(days=40),
+            total_hours=0, total_amount=0
+        )
+        before = SalaryCacheService.get_salary(self.teacher, local.year, local.month)['total_salary']
+
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(7):
+            session = ClockService.clock_out(self.teacher.id, now=start + timedelta(hours=3))
+        self.assertEqual(session.stored_hours, Decimal('3.00'))
+
+        report.refresh_from_db()
+        self.assertTrue(report.is_stale)
+        after = SalaryCacheService.get_salary(self.teacher, local.year, local.month)['total_salary']
+        self.assertEqual(Decimal(after) - Decimal(before), Decimal('37.50'))
+
+        # The incremental rollups match a full rebuild
+        incremental = self.snapshot()
+        call_command('rebuild_monthly_totals', stdout=StringIO())
+        self.assertEqual(self.snapshot(), incremental)
+
+    def test_permissions(self):
+        self.assertEqual(Client().get(self.url).status_code, 401)
+        own = reverse('clock_api_for_teacher', args=[self.other.id])
+        self.assertEqual(self.client.get(own).status_code, 403)
+
+        admin = Client()
+        admin.login(username='clock_admin', password='pass')
+        self.assertEqual(admin.get(self.url).status_code, 400)
+        response = admin.post(own, json.dumps({'action': 'in', 'task': self.task.id}), content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['session']['teacher'], self.other.id)
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.post({'action': 'in', 'task': 999999}).status_code, 400)
+        self.assertEqual(self.post({'action': 'in', 'task': self.task.id, 'student': 'x'}).status_code, 400)
+        self.assertEqual(self.post({'action': 'pause'}).status_code, 400)
+        response = self.client.post(self.url, 'not json', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_record_work_page_uses_the_clock(self):
+        url = reverse('record_work')
+        self.client.post(url, {'entry_type': 'clock', 'task': self.task.id})
+        response = self.client.post(url, {'entry_type': 'clock', 'task': self.task.id}, follow=True)
+        self.assertContains(response, 'já possui um ponto de entrada em aberto')
+        session = WorkSession.objects.get(teacher=self.teacher, entry_type='clock')
+        self.client.post(reverse('clock_out', args=[session.id]))
+        session.refresh_from_db()
+        self.assertIsNotNone(session.clock_out)
+
+
+class ClockBatchTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teachers = [
+            Teacher.objects.create(user=CustomUser.objects.create_user(username=f'kiosk_teacher_{i}', password='pass', is_teacher=True))
+            for i in range(2)
+        ]
+        self.student = Student.objects.create(
+            user=CustomUser.objects.create_user(username='kiosk_student', password='pass', is_student=True)
+        )
+        self.task = Task.objects.create(name="Tutoring", hourly_rate=Decimal('12.50'), price=Decimal('20.00'))
+        CustomUser.objects.create_superuser(username='kiosk_admin', password='pass', email='k@example.com')
+        self.kiosk = Client()
+        self.kiosk.login(username='kiosk_admin', password='pass')
+        self.url = reverse('clock_batch')
+        self.start = timezone.now().replace(microsecond=0) - timedelta(hours=5)
+
+    def at(self, hours):
+        return (self.start + timedelta(hours=hours)).isoformat()
+
+    def sync(self, events, client=None):
+        response = (client or self.kiosk).post(self.url, json.dumps({'events': events}), content_type='application/json')
+        return response.status_code, response.json()
+
+    def test_offline_events_are_applied_in_order(self):
+        first, second = self.teachers
+        status, body = self.sync([
+            {'action': 'in', 'teacher': first.id, 'task': self.task.id, 'student': self.student.id, 'at': self.at(0)},
+            {'action': 'in', 'teacher': second.id, 'task': self.task.id, 'at': self.at(1)},
+            {'action': 'out', 'teacher': first.id, 'at': self.at(2)},
+            {'action': 'in', 'teacher': first.id, 'task': self.task.id, 'at': self.at(3)},
+        ])
+        self.assertEqual(status, 200)
+        self.assertEqual([result['status'] for result in body['results']], [201, 201, 200, 201])
+        closed = body['results'][2]['session']
+        self.assertEqual((closed['id'], closed['hours'], closed['total_amount']),
+                         (body['results'][0]['session']['id'], '2.00', '40.00'))
+        self.assertEqual(ClockService.active_session(first.id).clock_in, self.start + timedelta(hours=3))
+        self.assertEqual(ClockService.active_session(second.id).clock_in, self.start + timedelta(hours=1))
+        # The closed session is billed once the request is done
+        self.assertEqual(BillItem.objects.filter(bill__student=self.student, task=self.task).get().quantity, Decimal('2.00'))
+
+        status, body = self.sync([{'action': 'out', 'teacher': first.id}, {'action': 'out', 'teacher': second.id}])
+        self.assertEqual([result['status'] for result in body['results']], [200, 200])
+        self.assertFalse(ClockService.open_sessions().exists())
+
+    @override_settings(CLOCK_OFFLINE_WINDOW=60 * 60 * 24 * 40)
+    def test_queued_taps_count_in_their_own_month(self):
+        first = self.teachers[0]
+        # Tapped on the last day of the previous month, synced now
+        month_start = timezone.localtime().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        tapped = month_start - timedelta(hours=10)
+        status, body = self.sync([
+            {'action': 'in', 'teacher': first.id, 'task': self.task.id, 'at': tapped.isoformat()},
+            {'action': 'out', 'teacher': first.id, 'at': (tapped + timedelta(hours=2)).isoformat()},
+        ])
+        self.assertEqual([result['status'] for result in body['results']], [201, 200])
+        session = WorkSession.objects.get(pk=body['results'][0]['session']['id'])
+        self.assertEqual(session.created_at, tapped)
+        previous_month = timezone.localtime(tapped).date().replace(day=1)
+        totals = MonthlyTeacherTotals.objects.get(teacher=first)
+        self.assertEqual((totals.month, totals.hours), (previous_month, Decimal('2.00')))
+
+    def test_backdating_is_limited(self):
+        first = self.teachers[0]
+        teacher = Client()
+        teacher.login(username='kiosk_teacher_0', password='pass')
+        recent = (timezone.now() - timedelta(minutes=1)).isoformat()
+        status, body = self.sync([
+            {'action': 'in', 'task': self.task.id, 'at': self.at(0)},
+            {'action': 'in', 'task': self.task.id, 'at': recent},
+        ], client=teacher)
+        # Teachers cannot clock in hours ago, only now
+        self.assertEqual([result['status'] for result in body['results']], [400, 201])
+        self.assertEqual(WorkSession.objects.filter(teacher=first).count(), 1)
+
+        # Kiosks sync taps up to the offline window old
+        old = (timezone.now() - timedelta(days=8)).isoformat()
+        status, body = self.sync([
+            {'action': 'in', 'teacher': self.teachers[1].id, 'task': self.task.id, 'at': old},
+            {'action': 'in', 'teacher': self.teachers[1].id, 'task': self.task.id, 'at': self.at(0)},
+        ])
+        self.assertEqual([result['status'] for result in body['results']], [400, 201])
+
+    def test_failed_events_do_not_stop_the_rest(self):
+        first, second = self.teachers
+        ClockService.clock_in(second.id, self.task, now=self.start)
+        future = (timezone.now() + timedelta(hours=1)).isoformat()
+        status, body = self.sync([
+            {'action': 'out', 'teacher': first.id},
+            {'action': 'in', 'teacher': second.id, 'task': self.task.id},
+            {'action': 'in', 'teacher': first.id, 'task': 999999},
+            {'action': 'in', 'teacher': first.id, 'task': self.task.id, 'student': 999999},
+            {'action': 'in', 'teacher': 999999, 'task': self.task.id},
+            {'action': 'in', 'teacher': first.id, 'task': self.task.id, 'at': future},
+            {'action': 'out', 'teacher': second.id, 'at': self.at(-1)},
+            {'action': 'pause', 'teacher': first.id},
+            'nope',
+            {'action': 'in', 'teacher': first.id, 'task': self.task.id, 'at': self.at(1)},
+        ])
+        self.assertEqual(status, 200)
+        self.assertEqual([result['status'] for result in body['results']], [409, 409, 400, 400, 400, 400, 400, 400, 400, 201])
+        self.assertEqual(body['results'][1]['active']['teacher'], second.id)
+        self.assertEqual(ClockService.open_sessions().count(), 2)
+
+    def test_permissions(self):
+        first, second = self.teachers
+        self.assertEqual(self.sync([{'action': 'in'}], client=Client())[0], 401)
+        teacher = Client()
+        teacher.login(username='kiosk_teacher_0', password='pass')
+        status, body = self.sync([
+            {'action': 'in', 'task': self.task.id},
+            {'action': 'in', 'teacher': second.id, 'task': self.task.id},
+        ], client=teacher)
+        self.assertEqual([result['status'] for result in body['results']], [201, 403])
+        self.assertEqual(body['results'][0]['session']['teacher'], first.id)
+
+        student = Client()
+        student.login(username='kiosk_student', password='pass')
+        self.assertEqual(self.sync([{'action': 'in'}], client=student)[0], 403)
+        self.assertEqual(self.sync([])[0], 400)
@@ -0,0 +1,101 @@
+from datetime import date
+from decimal import Decimal
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.utils import timezone
+from teachers_app.billing_models import Bill
+from teachers_app.billing_services import BillTotalsService, LedgerService
+from teachers_app.models import CustomUser, Teacher, Student, Task, WorkSession, SalaryReport
+from teachers_app.services import BulkSalaryService
+
+
+class ConditionalGetTestCase(TestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_superuser(
+            username='etag_admin', password='pass', email='e@example.com', is_inspector=True
+        )
+        teacher_user = CustomUser.objects.create_user(username='etag_teacher', password='pass', is_teacher=True)
+        other_user = CustomUser.objects.create_user(username='etag_other', password='pass', is_teacher=True)
+        self.teacher = Teacher.objects.create(user=teacher_user)
+        self.other = Teacher.objects.create(user=other_user)
+        student_user = CustomUser.objects.create_user(username='etag_student', password='pass', is_student=True)
+        self.student = Student.objects.create(user=student_user)
+        self.task = Task.objects.create(name="Tutoring", hourly_rate=Decimal('10.00'), price=Decimal('20.00'))
+        self.start = timezone.make_aware(timezone.datetime(2025, 3, 10, 10, 0))
+        self.session = WorkSession.objects.create(
+            teacher=self.teacher, task=self.task, student=self.student, entry_type='time_range',
+            start_time=self.start, end_time=self.start + timezone.timedelta(hours=2), created_at=self.start,
+        )
+        self.bill = Bill.objects.create(student=self.student, month=date(2025, 3, 1), total_amount=Decimal('0.00'))
+        self.client = Client()
+        self.client.force_login(self.admin)
+        self.report_url = reverse('view_salary_report', args=[self.teacher.id, 2025, 3])
+        self.bill_url = reverse('bill_detail', args=[self.bill.id])
+
+    def revalidate(self, url, response, client=None):
+        return (client or self.client).get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_unchanged_report_is_not_rendered_again(self):
+        response = self.client.get(self.report_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Last-Modified', response)
+        self.assertIn('private', response['Cache-Control'])
+
+        # One query for the validators; the report is not computed
+        with self.assertNumQueries(3):
+            not_modified = self.revalidate(self.report_url, response)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified['ETag'], response['ETag'])
+        self.assertEqual(self.client.get(self.report_url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304)
+
+    def test_report_changes_invalidate_the_etag(self):
+        def changed(change):
+            response = self.client.get(self.report_url)
+            change()
+            return self.revalidate(self.report_url, response).status_code == 200
+
+        self.assertTrue(changed(lambda: self.session.save()))
+        self.assertTrue(changed(lambda: Task.objects.get(pk=self.task.pk).save()))
+        start, end = BulkSalaryService.month_range(2025, 3)
+        report = SalaryReport.objects.create(teacher=self.teacher, start_date=start, end_date=end, total_hours=0, total_amount=0)
+        self.assertTrue(changed(report.delete))
+        self.assertTrue(changed(lambda: WorkSession.objects.filter(pk=self.session.pk).delete()))
+        self.assertFalse(changed(lambda: WorkSession.objects.create(
+            teacher=self.other, task=self.task, entry_type='manual', manual_hours=Decimal('1.00'), created_at=self.start
+        )))
+
+    def test_etags_are_per_user(self):
+        response = self.client.get(self.report_url)
+        teacher = Client()
+        teacher.force_login(self.teacher.user)
+        self.assertEqual(self.revalidate(self.report_url, response, teacher).status_code, 200)
+
+        # Another teacher's report is refused whatever the validators
+        other = Client()
+        other.force_login(self.other.user)
+        self.assertEqual(self.revalidate(self.report_url, response, other).status_code, 403)
+
+    def test_bill_changes_invalidate_the_etag(self):
+        def changed(change):
+            response = self.client.get(self.bill_url)
+            self.assertEqual(response.status_code, 200)
+            change()
+            return self.revalidate(self.bill_url, response).status_code == 200
+
+        self.assertFalse(changed(lambda: None))
+        self.assertTrue(changed(lambda: BillTotalsService.add_item(
+            self.bill, service_name="Books", service_price_at_billing=Decimal('5.00'), quantity=Decimal('1'),
+            amount=Decimal('5.00')
+        )))
+        self.assertTrue(changed(lambda: LedgerService.pay_bill(self.bill)))
+        self.assertTrue(changed(lambda: self.session.save()))
+
+    def test_missing_bill_and_flash_messages_render_the_view(self):
+        self.assertEqual(self.client.get(reverse('bill_detail', args=[999999])).status_code, 404)
+
+        response = self.client.get(self.bill_url)
+        self.client.post(reverse('mark_bill_paid', args=[self.bill.id]))
+        # The payment message is pending, so the page is rendered to show it
+        response = self.revalidate(self.bill_url, response)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Pagamento da fatura')
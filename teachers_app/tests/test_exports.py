@@ -0,0 +1,117 @@
+import csv
+import io
+import os
+import tempfile
+from datetime import date
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from decimal import Decimal
+from teachers_app.models import CustomUser, Teacher, Student, Task, WorkSession, SalaryReport
+from teachers_app.billing_models import Bill, BillItem
+
+
+class ExportTestCase(TestCase):
+    def setUp(self):
+        self.superuser = CustomUser.objects.create_superuser(username='export_admin', password='pass', is_inspector=True)
+        self.task = Task.objects.create(name="Tutoring", hourly_rate=Decimal('10.00'), price=Decimal('20.00'))
+        self.teachers = []
+        for i in range(2):
+            user = CustomUser.objects.create_user(username=f'export_teacher_{i}', password='pass', is_teacher=True)
+            self.teachers.append(Teacher.objects.create(user=user))
+        student_user = CustomUser.objects.create_user(username='export_student', password='pass', is_student=True)
+        self.student = Student.objects.create(user=student_user)
+        self.now = timezone.now()
+        self.client = Client()
+        self.client.force_login(self.superuser)
+
+    def _create_sessions(self, count):
+        # bulk_create skips WorkSession.save(); the export only reads the stored columns
+        WorkSession.objects.bulk_create([
+            WorkSession(
+                teacher=self.teachers[i % 2], task=self.task, student=self.student, entry_type='manual',
+                manual_hours=Decimal('1.50'), stored_hours=Decimal('1.50'), hourly_rate=Decimal('10.00'),
+                teacher_payment_amount=Decimal('15.00'), total_amount=Decimal('30.00')
+            )
+            for i in range(count)
+        ])
+
+    def _rows(self, response):
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode()
+        return list(csv.reader(io.StringIO(content)))
+
+    def test_work_session_export_streams_filtered_rows(self):
+        """The work session export honours the list filters"""
+        self._create_sessions(10)
+        response = self.client.get(reverse('export_work_sessions'), {'teacher': self.teachers[0].id})
+
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = self._rows(response)
+        self.assertEqual(rows[0][:4], ['id', 'date', 'created_at', 'teacher'])
+        self.assertEqual(len(rows), 6)
+        self.assertTrue(all(row[3] == 'export_teacher_0' for row in rows[1:]))
+        self.assertEqual(rows[1][7:], ['1.50', '10.00', '15.00', '30.00'])
+
+    def test_query_count_does_not_grow_with_rows(self):
+        """Rows are read through one iterator query, not one query per row"""
+        counts = []
+        for total in (5, 500):
+            WorkSession.objects.all().delete()
+            self._create_sessions(total)
+            with CaptureQueriesContext(connection) as queries:
+                rows = self._rows(self.client.get(reverse('export_work_sessions')))
+            self.assertEqual(len(rows), total + 1)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_salary_report_export_refreshes_stale_totals(self):
+        """Stale reports are recomputed before they are exported"""
+        self._create_sessions(2)
+        report = SalaryReport.create_for_month(
+            teacher=self.teachers[0], year=self.now.year, month=self.now.month, created_by=self.superuser
+        )
+        SalaryReport.objects.filter(pk=report.pk).update(total_amount=Decimal('999.00'), is_stale=True)
+        # The rollups are maintained by signals, which bulk_create skips
+        call_command('rebuild_monthly_totals', stdout=io.StringIO())
+
+        rows = self._rows(self.client.get(
+            reverse('export_salary_reports'), {'year': self.now.year, 'month': self.now.month}
+        ))
+
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][1], 'export_teacher_0')
+        self.assertEqual(rows[1][4], '15.00')
+
+    def test_bill_export_has_one_row_per_item(self):
+        """Bills are flattened to one row per item, and bills without items still appear"""
+        bill = Bill.objects.create(student=self.student, month=date(2025, 3, 1), total_amount=Decimal('30.00'))
+        for name in ('Books', 'Lessons'):
+            BillItem.objects.create(
+                bill=bill, service_name=name, service_price_at_billing=Decimal('5.00'),
+                quantity=Decimal('3'), amount=Decimal('15.00')
+            )
+        Bill.objects.create(student=self.student, month=date(2025, 4, 1), total_amount=Decimal('0.00'))
+
+        rows = self._rows(self.client.get(reverse('export_bills'), {'student': self.student.id}))
+
+        self.assertEqual([row[2] for row in rows[1:]], ['2025-03', '2025-03', '2025-04'])
+        self.assertEqual([row[6] for row in rows[1:]], ['Books', 'Lessons', ''])
+
+    def test_export_command_reports_throughput(self):
+        """The command writes the CSV and prints rows per second"""
+        self._create_sessions(3)
+        handle, path = tempfile.mkstemp(suffix='.csv')
+        os.close(handle)
+        err = io.StringIO()
+        try:
+            call_command('export_csv', 'work_sessions', '--output', path, stderr=err)
+            with open(path, newline='', encoding='utf-8') as f:
+                self.assertEqual(len(list(csv.reader(f))), 4)
+        finally:
+            os.remove(path)
+        self.assertIn('Exported 3 rows', err.getvalue())
+        self.assertIn('rows/s', err.getvalue())
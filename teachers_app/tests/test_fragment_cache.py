@@ -0,0 +1,125 @@
+from datetime import date
+from decimal import Decimal
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from teachers_app.billing_models import Bill
+from teachers_app.billing_services import BillTotalsService
+from teachers_app.models import CustomUser, Teacher, Student, Task, WorkSession, SalaryReport
+from teachers_app.services import FragmentCacheService
+
+
+class FragmentCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = CustomUser.objects.create_superuser(
+            username='fragment_admin', password='pass', email='f@example.com', is_inspector=True
+        )
+        teacher_user = CustomUser.objects.create_user(username='fragment_teacher', password='pass', is_teacher=True)
+        self.teacher = Teacher.objects.create(user=teacher_user)
+        student_user = CustomUser.objects.create_user(username='fragment_student', password='pass', is_student=True)
+        self.student = Student.objects.create(user=student_user)
+        self.task = Task.objects.create(name="Tutoring", hourly_rate=Decimal('10.00'), price=Decimal('20.00'))
+        self.now = timezone.localtime()
+        self.session = WorkSession.objects.create(
+            teacher=self.teacher, task=self.task, student=self.student, entry_type='manual', manual_hours=Decimal('2.00')
+        )
+        self.client = Client()
+        self.client.force_login(self.admin)
+        self.report_url = reverse('view_salary_report', args=[self.teacher.id, self.now.year, self.now.month])
+        self.items_url = reverse('student_bill_items', args=[self.student.id])
+
+    def queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, len(ctx.captured_queries)
+
+    def test_repeat_report_views_skip_the_tables(self):
+        _, first = self.queries(self.report_url)
+        response, second = self.queries(self.report_url)
+        # The salary calculation is cached, and the sessions query behind the task summary only runs on a miss
+        self.assertEqual(second, first - 2)
+        self.assertContains(response, 'Tutoring')
+
+        self.task.name = "Marking"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.save()
+        response, third = self.queries(self.report_url)
+        self.assertGreater(third, second)
+        self.assertContains(response, 'Marking')
+        self.assertNotContains(response, 'Tutoring')
+
+    def test_session_changes_touch_their_fragments(self):
+        salary_version = FragmentCacheService.salary_version(self.teacher.id, self.now.year, self.now.month)
+        student_version = FragmentCacheService.student_version(self.student.id)
+        self.assertEqual(FragmentCacheService.student_version(self.student.id), student_version)
+
+        self.session.manual_hours = Decimal('3.00')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.session.save()
+        self.assertNotEqual(
+            FragmentCacheService.salary_version(self.teacher.id, self.now.year, self.now.month), salary_version
+        )
+        self.assertNotEqual(FragmentCacheService.student_version(self.student.id), student_version)
+
+    def test_student_items_are_rendered_once_per_change(self):
+        _, first = self.queries(self.items_url)
+        _, second = self.queries(self.items_url)
+        # Bill items and work sessions are not queried for a cached table
+        self.assertEqual(second, first - 2)
+
+        bill = Bill.objects.create(student=self.student, month=date(2025, 3, 1), total_amount=Decimal('0.00'))
+        with self.captureOnCommitCallbacks(execute=True):
+            item = BillTotalsService.add_item(
+                bill, service_name="Books", service_price_at_billing=Decimal('7.50'), quantity=Decimal('1'),
+                amount=Decimal('7.50')
+            )
+        response, _ = self.queries(self.items_url)
+        self.assertContains(response, 'Books')
+
+        item.service_name = "Atlas"
+        with self.captureOnCommitCallbacks(execute=True):
+            BillTotalsService.save_item(item)
+        response, _ = self.queries(self.items_url)
+        self.assertContains(response, 'Atlas')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            BillTotalsService.delete_item(item)
+        response, _ = self.queries(self.items_url)
+        self.assertNotContains(response, 'Atlas')
+
+    def test_fragments_are_kept_apart_by_owner_and_month(self):
+        other_user = CustomUser.objects.create_user(username='fragment_other', password='pass', is_teacher=True)
+        other = Teacher.objects.create(user=other_user)
+        WorkSession.objects.create(
+            teacher=other, task=Task.objects.create(name="Reading", hourly_rate=Decimal('5.00'), price=Decimal('0.00')),
+            entry_type='manual', manual_hours=Decimal('1.00')
+        )
+        self.client.get(self.report_url)
+        response = self.client.get(reverse('view_salary_report', args=[other.id, self.now.year, self.now.month]))
+        self.assertContains(response, 'Reading')
+        self.assertNotContains(response, 'Tutoring')
+
+        previous = self.now.replace(day=1) - timezone.timedelta(days=1)
+        response = self.client.get(reverse('view_salary_report', args=[self.teacher.id, previous.year, previous.month]))
+        self.assertNotContains(response, 'Tutoring')
+
+    def test_teacher_report_page(self):
+        start = self.now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        SalaryReport.objects.create(
+            teacher=self.teacher, start_date=start, end_date=(start + timezone.timedelta(days=32)).replace(day=1),
+            total_hours=0, total_amount=0
+        )
+        client = Client()
+        client.force_login(self.teacher.user)
+        for _ in range(2):
+            response = client.get(self.report_url)
+            self.assertContains(response, 'Tutoring', count=2)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.session.delete()
+        response = client.get(self.report_url)
+        self.assertContains(response, 'Nenhuma sessão de trabalho encontrada')
@@ -0,0 +1,117 @@
+import io
+import os
+import tempfile
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from datetime import datetime, date
+from decimal import Decimal
+from teachers_app.models import (
+    CustomUser, Teacher, Student, Task, WorkSession, SalaryReport, MonthlyTeacherTotals, MonthlyStudentTotals
+)
+from teachers_app.imports import import_work_sessions, ImportFileError
+from teachers_app.services import MonthlyTotalsService
+
+HEADER = 'teacher,task,student,entry_type,hours,clock_in,clock_out,start_time,end_time,created_at,hourly_rate\n'
+
+
+class WorkSessionImportTestCase(TestCase):
+    def setUp(self):
+        self.superuser = CustomUser.objects.create_superuser(username='import_admin', password='pass')
+        self.task = Task.objects.create(name="Tutoring", hourly_rate=Decimal('10.00'), price=Decimal('20.00'))
+        self.free_task = Task.objects.create(name="Free help", hourly_rate=Decimal('8.00'), price=Decimal('0.00'))
+        teacher_user = CustomUser.objects.create_user(username='import_teacher', password='pass', is_teacher=True)
+        self.teacher = Teacher.objects.create(user=teacher_user)
+        student_user = CustomUser.objects.create_user(username='import_student', password='pass', is_student=True)
+        self.student = Student.objects.create(user=student_user)
+
+    def _import(self, rows, **kwargs):
+        return import_work_sessions(io.StringIO(HEADER + ''.join(rows)), **kwargs)
+
+    def test_imported_amounts_match_save(self):
+        """Every entry type gets the same stored hours and amounts as WorkSession.save()"""
+        rows = [
+            'import_teacher,Tutoring,import_student,manual,1.25,,,,,2025-03-03 10:00,\n',
+            'import_teacher,Tutoring,import_student,clock,,2025-03-04 09:00,2025-03-04 10:40,,,,\n',
+            'import_teacher,Free help,import_student,time_range,,,,2025-03-05 09:00,2025-03-05 11:20,,\n',
+        ]
+        self._import(rows)
+
+        for session in WorkSession.objects.select_related('task'):
+            expected = WorkSession(
+                teacher=self.teacher, task=session.task, student=self.student, entry_type=session.entry_type,
+                manual_hours=session.manual_hours, clock_in=session.clock_in, clock_out=session.clock_out,
+                start_time=session.start_time, end_time=session.end_time
+            )
+            expected.save()
+            expected.refresh_from_db()
+            for field in ('stored_hours', 'hourly_rate', 'total_amount', 'teacher_payment_amount'):
+                self.assertEqual(getattr(session, field), getattr(expected, field), field)
+
+        clock = WorkSession.objects.get(entry_type='clock', is_deleted=False, created_at__year=2025)
+        self.assertEqual(clock.stored_hours, Decimal('2.00'))
+        self.assertEqual(timezone.localtime(clock.created_at).date(), date(2025, 3, 4))
+        self.assertEqual(clock.effective_date, date(2025, 3, 4))
+
+    def test_historical_rate_and_created_at_are_kept(self):
+        self._import(['import_teacher,Tutoring,,manual,2,,,,,2024-11-20,7.50\n'])
+        session = WorkSession.objects.get()
+        self.assertEqual(session.hourly_rate, Decimal('7.50'))
+        self.assertEqual(session.teacher_payment_amount, Decimal('15.00'))
+        self.assertEqual(timezone.localtime(session.created_at).date(), date(2024, 11, 20))
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        stats = self._import([
+            'import_teacher,Tutoring,,manual,1,,,,,,\n',
+            'nobody,Tutoring,,manual,1,,,,,,\n',
+            'import_teacher,Unknown,,manual,1,,,,,,\n',
+            'import_teacher,Tutoring,,clock,,2025-03-04 10:00,2025-03-04 09:00,,,,\n',
+            'import_teacher,Tutoring,,manual,1.234,,,,,,\n',
+        ])
+        self.assertEqual((stats.rows, stats.imported), (5, 1))
+        self.assertEqual([line for line, _ in stats.errors], [3, 4, 5, 6])
+        self.assertEqual(WorkSession.objects.count(), 1)
+
+    def test_missing_columns_are_rejected(self):
+        with self.assertRaises(ImportFileError):
+            import_work_sessions(io.StringIO('teacher,hours\nimport_teacher,1\n'))
+
+    def test_rollups_reports_and_batches_stay_consistent(self):
+        """bulk_create skips the signals, so the import updates the rollups and reports itself"""
+        report = SalaryReport.create_for_month(teacher=self.teacher, year=2025, month=3, created_by=self.superuser)
+        rows = [f'import_teacher,Tutoring,import_student,manual,1.50,,,,,2025-03-{day:02d} 12:00,\n' for day in range(1, 26)]
+
+        # Lookups, a fixed number of queries per batch of 10 rows, then the rollups once
+        with self.assertNumQueries(21):
+            stats = self._import(rows, batch_size=10)
+
+        self.assertEqual(stats.imported, 25)
+        report.refresh_from_db()
+        self.assertTrue(report.is_stale)
+        imported = {
+            (row.teacher_id, row.month, row.session_count, row.teacher_payment)
+            for row in MonthlyTeacherTotals.objects.all()
+        }
+        student_rollup = MonthlyStudentTotals.objects.get(student=self.student)
+        MonthlyTotalsService.rebuild()
+        self.assertEqual(
+            imported,
+            {(row.teacher_id, row.month, row.session_count, row.teacher_payment) for row in MonthlyTeacherTotals.objects.all()}
+        )
+        self.assertEqual(student_rollup.student_billing, MonthlyStudentTotals.objects.get(student=self.student).student_billing)
+        self.assertEqual(student_rollup.session_count, 25)
+
+    def test_command_imports_file(self):
+        handle, path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(handle, 'w', newline='') as f:
+            f.write(HEADER + 'import_teacher,Tutoring,,manual,1,,,,,,\nimport_teacher,Nope,,manual,1,,,,,,\n')
+        out, err = io.StringIO(), io.StringIO()
+        try:
+            call_command('import_work_sessions', path, '--dry-run', stdout=out, stderr=err)
+            self.assertFalse(WorkSession.objects.exists())
+            call_command('import_work_sessions', path, stdout=out, stderr=err)
+        finally:
+            os.remove(path)
+        self.assertEqual(WorkSession.objects.count(), 1)
+        self.assertIn('Imported 1 of 2 rows', out.getvalue())
+        self.assertIn("Line 3: task 'Nope' not found", err.getvalue())
@@ -0,0 +1,85 @@
+import io
+from datetime import date, datetime, timedelta
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from decimal import Decimal
+from teachers_app.models import CustomUser, Teacher, Student, Task, WorkSession
+from teachers_app.billing_models import Bill, BillItem
+from teachers_app.services import SalaryCalculationService, annotate_session_cents
+
+
+class IntegerAmountsTestCase(TestCase):
+    def setUp(self):
+        self.task = Task.objects.create(name="Tutoring", hourly_rate=Decimal('12.50'), price=Decimal('20.00'))
+        user = CustomUser.objects.create_user(username='int_teacher', password='pass', is_teacher=True)
+        self.teacher = Teacher.objects.create(user=user)
+        student_user = CustomUser.objects.create_user(username='int_student', password='pass', is_student=True)
+        self.student = Student.objects.create(user=student_user)
+
+    def test_save_keeps_integer_columns_in_sync(self):
+        session = WorkSession.objects.create(
+            teacher=self.teacher, task=self.task, student=self.student, entry_type='manual', manual_hours=Decimal('1.25')
+        )
+        session.refresh_from_db()
+        self.assertEqual(
+            (session.hours_hundredths, session.hourly_rate_cents, session.teacher_payment_cents, session.total_amount_cents),
+            (125, 1250, 1563, 2500)
+        )
+
+        start = timezone.make_aware(datetime(2025, 3, 3, 9, 0))
+        session.entry_type = 'clock'
+        session.clock_in, session.clock_out = start, start + timedelta(hours=2)
+        session.save()
+        session.refresh_from_db()
+        self.assertEqual((session.hours_hundredths, session.teacher_payment_cents), (200, 2500))
+        self.assertEqual(session.teacher_payment_amount, Decimal('25.00'))
+
+    def test_bill_item_amount_cents_round_half_up(self):
+        bill = Bill.objects.create(student=self.student, month=date(2025, 3, 1), total_amount=Decimal('0.00'))
+        item = BillItem.objects.create(
+            bill=bill, service_name="Books", service_price_at_billing=Decimal('0.3350'),
+            quantity=Decimal('3'), amount=Decimal('1.0050')
+        )
+        item.refresh_from_db()
+        self.assertEqual(item.amount_cents, 101)
+
+    def test_backfill_fills_rows_written_in_bulk(self):
+        WorkSession.objects.bulk_create([
+            WorkSession(
+                teacher=self.teacher, task=self.task, entry_type='manual', manual_hours=Decimal('1.50'),
+                stored_hours=Decimal('1.50'), hourly_rate=Decimal('12.50'),
+                teacher_payment_amount=Decimal('18.75'), total_amount=Decimal('30.00')
+            )
+            for _ in range(3)
+        ])
+        bill = Bill.objects.create(student=self.student, month=date(2025, 3, 1), total_amount=Decimal('0.00'))
+        BillItem.objects.bulk_create([BillItem(
+            bill=bill, service_name="Books", service_price_at_billing=Decimal('2.5000'),
+            quantity=Decimal('2'), amount=Decimal('5.0000')
+        )])
+        now = timezone.localtime()
+        before = SalaryCalculationService.calculate_salary(self.teacher, now.year, now.month)
+
+        out = io.StringIO()
+        call_command('backfill_integer_amounts', stdout=out)
+
+        self.assertIn('Backfilled 12 work session columns and 1 bill items', out.getvalue())
+        self.assertEqual(
+            set(WorkSession.objects.values_list('hours_hundredths', 'hourly_rate_cents', 'teacher_payment_cents', 'total_amount_cents')),
+            {(150, 1250, 1875, 3000)}
+        )
+        self.assertEqual(BillItem.objects.get().amount_cents, 500)
+        self.assertEqual(SalaryCalculationService.calculate_salary(self.teacher, now.year, now.month), before)
+
+        call_command('backfill_integer_amounts', stdout=out)
+        self.assertIn('Backfilled 0 work session columns and 0 bill items', out.getvalue())
+
+    def test_annotations_read_the_integer_columns(self):
+        session = WorkSession.objects.create(
+            teacher=self.teacher, task=self.task, entry_type='manual', manual_hours=Decimal('2.00')
+        )
+        # update() bypasses save(): the integer column is what the aggregates use
+        WorkSession.objects.filter(pk=session.pk).update(hours_hundredths=300, teacher_payment_cents=3750)
+        row = annotate_session_cents(WorkSession.objects.filter(pk=session.pk)).get()
+        self.assertEqual((row.hours_cents, row.amount_cents), (300, 3750))
@@ -0,0 +1,75 @@
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from datetime import datetime
+from decimal import Decimal
+from teachers_app.models import (
+    CustomUser, Teacher, Student, Task, WorkSession, MonthlyTeacherTotals, MonthlyStudentTotals
+)
+
+
+class MonthlyTotalsTestCase(TestCase):
+    def setUp(self):
+        teacher_user = CustomUser.objects.create_user(username='rollup_teacher', password='pass', is_teacher=True)
+        student_user = CustomUser.objects.create_user(username='rollup_student', password='pass', is_student=True)
+        self.teacher = Teacher.objects.create(user=teacher_user)
+        self.student = Student.objects.create(user=student_user)
+        self.task = Task.objects.create(name="Tutoring", hourly_rate=Decimal('12.50'), price=Decimal('20.00'))
+        self.now = timezone.localtime()
+
+    def snapshot(self):
+        teacher_rows = {
+            (row.teacher_id, row.month): (row.session_count, row.hours, row.teacher_payment, row.student_billing)
+            for row in MonthlyTeacherTotals.objects.all() if row.session_count
+        }
+        student_rows = {
+            (row.student_id, row.month): (row.session_count, row.hours, row.teacher_payment, row.student_billing)
+            for row in MonthlyStudentTotals.objects.all() if row.session_count
+        }
+        return teacher_rows, student_rows
+
+    def test_rollups_follow_session_changes(self):
+        """Signals keep the rollups equal to a full rebuild"""
+        session = WorkSession.objects.create(
+            teacher=self.teacher, task=self.task, student=self.student, entry_type='manual', manual_hours=Decimal('1.50')
+        )
+        start = timezone.make_aware(datetime(2025, 1, 10, 9, 0))
+        WorkSession.objects.create(
+            teacher=self.teacher, task=self.task, student=self.student, entry_type='time_range',
+            start_time=start, end_time=start + timezone.timedelta(hours=2)
+        )
+        totals = MonthlyTeacherTotals.for_month(self.teacher, self.now.year, self.now.month)
+        self.assertEqual(totals.session_count, 2)
+        self.assertEqual(totals.hours, Decimal('3.50'))
+        self.assertEqual(totals.teacher_payment, Decimal('43.75'))
+
+        student_totals = MonthlyStudentTotals.for_month(self.student, 2025, 1)
+        self.assertEqual(student_totals.hours, Decimal('2.00'))
+        self.assertEqual(student_totals.student_billing, Decimal('40.00'))
+
+        session.manual_hours = Decimal('3.00')
+        session.save()
+        other = WorkSession.objects.create(
+            teacher=self.teacher, task=self.task, entry_type='manual', manual_hours=Decimal('1.00')
+        )
+        other.delete()
+
+        incremental = self.snapshot()
+        call_command('rebuild_monthly_totals', stdout=StringIO())
+        self.assertEqual(self.snapshot(), incremental)
+        self.assertEqual(MonthlyTeacherTotals.for_month(self.teacher, self.now.year, self.now.month).hours, Decimal('5.00'))
+
+    def test_missing_month_reads_as_zero(self):
+        """A month without sessions gives an unsaved all-zero row"""
+        totals = MonthlyStudentTotals.for_month(self.student, 2020, 5)
+        self.assertIsNone(totals.pk)
+        self.assertEqual(totals.student_billing, Decimal('0.00'))
+
+    def test_deleting_teacher_cascades(self):
+        """Deleting a teacher removes its sessions and rollup rows without errors"""
+        WorkSession.objects.create(
+            teacher=self.teacher, task=self.task, entry_type='manual', manual_hours=Decimal('1.00')
+        )
+        self.teacher.delete()
+        self.assertFalse(MonthlyTeacherTotals.objects.exists())
@@ -0,0 +1,127 @@
+from datetime import date
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from decimal import Decimal
+from teachers_app.models import CustomUser, Teacher, Student, Task, WorkSession, SalaryReport
+from teachers_app.billing_models import Bill, BillItem
+
+# Row counts every view is rendered at; the query count must not change between them
+SIZES = (10, 100, 1000)
+
+
+class QueryBudgetTestCase(TestCase):
+    """
+    Render each list view at 10, 100 and 1000 rows and assert a fixed number of
+    queries, so a template that starts touching an unloaded relation (N+1) fails here.
+    Budgets include the session and user lookups done by the auth middleware.
+    """
+
+    def setUp(self):
+        self.superuser = CustomUser.objects.create_superuser(username='budget_admin', password='pass', is_inspector=True)
+        self.task = Task.objects.create(name="Tutoring", hourly_rate=Decimal('10.00'), price=Decimal('20.00'))
+        teacher_user = CustomUser.objects.create_user(username='budget_teacher', password='pass', is_teacher=True)
+        self.teacher = Teacher.objects.create(user=teacher_user)
+        student_user = CustomUser.objects.create_user(username='budget_student', password='pass', is_student=True)
+        self.student = Student.objects.create(user=student_user)
+        self.now = timezone.now()
+        self.report = SalaryReport.create_for_month(
+            teacher=self.teacher, year=self.now.year, month=self.now.month, created_by=self.superuser
+        )
+        self.rows = 0
+        self.client = Client()
+        self.client.force_login(self.superuser)
+
+    def grow_to(self, size):
+        """Add teachers, students, sessions, bills and bill items until there are `size` of each"""
+        new = range(self.rows, size)
+        users = CustomUser.objects.bulk_create(
+            [CustomUser(username=f'budget_t{i}', password='!', is_teacher=True) for i in new]
+            + [CustomUser(username=f'budget_s{i}', password='!', is_student=True) for i in new]
+        )
+        teachers = Teacher.objects.bulk_create([Teacher(user=user) for user in users[:len(new)]])
+        students = Student.objects.bulk_create([
+            Student(user=user, is_active=i % 2 == 0) for i, user in enumerate(users[len(new):])
+        ])
+        SalaryReport.objects.bulk_create([
+            SalaryReport(
+                teacher=teacher, start_date=self.report.start_date, end_date=self.report.end_date,
+                total_hours=Decimal('1.00'), total_amount=Decimal('10.00'), created_by=self.superuser
+            )
+            for teacher in teachers
+        ])
+        # bulk_create skips WorkSession.save(); the views only read the stored columns.
+        # Half of the sessions belong to self.student, the rest are spread over the new students.
+        WorkSession.objects.bulk_create([
+            WorkSession(
+                teacher=self.teacher, task=self.task, student=self.student if i % 2 else students[i],
+                entry_type='manual', manual_hours=Decimal('1.00'), stored_hours=Decimal('1.00'),
+                hourly_rate=Decimal('10.00'), teacher_payment_amount=Decimal('10.00'), total_amount=Decimal('20.00')
+            )
+            for i in range(len(new))
+        ])
+        bills = Bill.objects.bulk_create([
+            Bill(student=self.student, month=date(2000 + i // 12, i % 12 + 1, 1), total_amount=Decimal('20.00'))
+            for i in new
+        ])
+        BillItem.objects.bulk_create([
+            BillItem(
+                bill=bill, service_name="Books", service_price_at_billing=Decimal('5.00'),
+                quantity=Decimal('4'), amount=Decimal('20.00')
+            )
+            for bill in bills
+        ])
+        self.rows = size
+
+    def assertQueryBudget(self, url, budget):
+        counts = {}
+        for size in SIZES:
+            self.grow_to(size)
+            # grow_to() bypasses the signals that invalidate the salary cache; measure the uncached path
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            counts[size] = len(queries)
+        self.assertEqual(counts, {size: budget for size in SIZES})
+
+    def test_manage_teachers(self):
+        self.assertQueryBudget(reverse('manage_teachers'), 3)
+
+    def test_manage_students(self):
+        self.assertQueryBudget(reverse('manage_students'), 4)
+
+    def test_view_deactivated_students(self):
+        self.assertQueryBudget(reverse('view_deactivated_students'), 3)
+
+    def test_recent_work_sessions(self):
+        self.assertQueryBudget(reverse('recent_work_sessions', args=[self.teacher.id]), 4)
+
+    def test_view_salary_report(self):
+        url = reverse('view_salary_report', args=[self.teacher.id, self.now.year, self.now.month])
+        # Includes the conditional GET validators, which spare revalidations the rest
+        self.assertQueryBudget(url, 8)
+
+    def test_list_work_sessions(self):
+        self.assertQueryBudget(reverse('superuser_list_work_sessions'), 5)
+
+    def test_student_bills(self):
+        self.assertQueryBudget(reverse('student_bills', args=[self.student.id]), 4)
+
+    def test_student_bill_items(self):
+        self.assertQueryBudget(reverse('student_bill_items', args=[self.student.id]), 6)
+
+    def test_select_student_for_billing(self):
+        self.assertQueryBudget(reverse('select_student_billing'), 3)
+
+    def test_select_student_for_bill_creation(self):
+        self.assertQueryBudget(reverse('select_student_for_bill_creation'), 3)
+
+    def test_bill_all_students_preview(self):
+        self.assertQueryBudget(reverse('bill_all_students'), 5)
+
+    def test_list_salary_reports(self):
+        self.assertQueryBudget(reverse('list_salary_reports'), 3)
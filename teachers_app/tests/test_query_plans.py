@@ -0,0 +1,30 @@
+from io import StringIO
+from unittest import mock, skipUnless
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Plan assertions are written for SQLite')
+class QueryPlanTestCase(TestCase):
+    def test_hot_queries_use_indexes(self):
+        """Every hot WorkSession/SalaryReport query is served by an index"""
+        out = StringIO()
+        call_command('explain_queries', stdout=out)
+        output = out.getvalue()
+        self.assertIn('ws_teacher_created_live_idx', output)
+        self.assertIn('ws_effective_live_idx', output)
+        self.assertIn('ws_student_effective_idx', output)
+        self.assertIn('ws_created_live_idx', output)
+        self.assertNotIn('Full scan of', output)
+
+    def test_fail_on_scan(self):
+        scan = mock.patch(
+            'teachers_app.management.commands.explain_queries.Command.analyze_plan',
+            return_value=([], ['teachers_app_worksession'])
+        )
+        with scan:
+            call_command('explain_queries', stdout=StringIO())
+            with self.assertRaisesMessage(CommandError, 'scan whole tables'):
+                call_command('explain_queries', '--fail-on-scan', stdout=StringIO())
@@ -0,0 +1,72 @@
+from django.test import TestCase
+from django.utils import timezone
+from decimal import Decimal
+from teachers_app.models import CustomUser, Teacher, Task, WorkSession
+from teachers_app.services import SalaryCalculationService
+
+
+class SalaryAggregationTestCase(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='aggregate_teacher', password='testpass')
+        self.teacher = Teacher.objects.create(user=self.user)
+        self.task = Task.objects.create(name="Tutoring", hourly_rate=Decimal('15.25'), price=Decimal('20.00'))
+        self.other_task = Task.objects.create(name="Admin", hourly_rate=Decimal('7.33'), price=Decimal('0.00'))
+        self.now = timezone.now()
+
+    def _create_sessions(self):
+        for hours in ['1.50', '2.25', '0.75', '3.00']:
+            WorkSession.objects.create(
+                teacher=self.teacher, task=self.task, entry_type='manual', manual_hours=Decimal(hours)
+            )
+        for hours in ['1.15', '0.05']:
+            WorkSession.objects.create(
+                teacher=self.teacher, task=self.other_task, entry_type='manual', manual_hours=Decimal(hours)
+            )
+        # Deleted sessions and open clock sessions must not change the totals
+        WorkSession.objects.create(
+            teacher=self.teacher, task=self.task, entry_type='manual', manual_hours=Decimal('9.00'), is_deleted=True
+        )
+        WorkSession.objects.create(
+            teacher=self.teacher, task=self.task, entry_type='clock', clock_in=self.now
+        )
+
+    def test_aggregate_matches_python_totals(self):
+        """Aggregate mode gives the same rounded totals as the per-session loop"""
+        self._create_sessions()
+        python_data = SalaryCalculationService.calculate_salary(self.teacher, self.now.year, self.now.month)
+        db_data = SalaryCalculationService.calculate_salary(
+            self.teacher, self.now.year, self.now.month, aggregate=True
+        )
+
+        self.assertEqual(db_data['total_salary'], python_data['total_salary'])
+        self.assertEqual(db_data['period'], python_data['period'])
+        self.assertEqual(db_data['total_hours'], '8.70')
+
+        python_details = [
+            {key: row[key] for key in ('task', 'hours', 'rate', 'amount', 'entry_type', 'notes')}
+            for row in python_data['session_details']
+        ]
+        db_details = [
+            {key: row[key] for key in ('task', 'hours', 'rate', 'amount', 'entry_type', 'notes')}
+            for row in db_data['session_details']
+        ]
+        self.assertEqual(db_details, python_details)
+
+    def test_aggregate_groups_by_task(self):
+        """Aggregate mode returns one summary row per task and rate"""
+        self._create_sessions()
+        db_data = SalaryCalculationService.aggregate_salary(self.teacher, self.now.year, self.now.month)
+        summaries = {row['task_name']: row for row in db_data['task_summaries']}
+
+        self.assertEqual(summaries['Tutoring']['hours'], '7.50')
+        # 22.875 + 34.3125 + 11.4375 + 45.75, each rounded half up to cents
+        self.assertEqual(summaries['Tutoring']['total'], str(Decimal('22.88') + Decimal('34.31') + Decimal('11.44') + Decimal('45.75')))
+        self.assertEqual(summaries['Admin']['hours'], '1.20')
+        self.assertEqual(summaries['Admin']['total'], str(Decimal('8.43') + Decimal('0.37')))
+
+    def test_aggregate_empty_month(self):
+        """A month without sessions totals to zero"""
+        db_data = SalaryCalculationService.aggregate_salary(self.teacher, self.now.year, self.now.month)
+        self.assertEqual(db_data['total_salary'], '0.00')
+        self.assertEqual(db_data['task_summaries'], [])
+        self.assertEqual(list(db_data['session_details']), [])
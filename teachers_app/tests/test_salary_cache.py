@@ -0,0 +1,137 @@
+import io
+from datetime import datetime
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from decimal import Decimal
+from teachers_app.models import CustomUser, Teacher, Task, WorkSession
+from teachers_app.services import SalaryCacheService
+
+
+class SalaryCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.task = Task.objects.create(name="Tutoring", hourly_rate=Decimal('10.00'), price=Decimal('20.00'))
+        self.other_task = Task.objects.create(name="Marking", hourly_rate=Decimal('8.00'), price=Decimal('0.00'))
+        self.teachers = []
+        for i in range(2):
+            user = CustomUser.objects.create_user(username=f'cache_teacher_{i}', password='pass', is_teacher=True)
+            self.teachers.append(Teacher.objects.create(user=user))
+        self.teacher = self.teachers[0]
+        self.march = timezone.make_aware(datetime(2025, 3, 10, 10, 0))
+        self.april = timezone.make_aware(datetime(2025, 4, 10, 10, 0))
+        self.session = self._session(self.teacher, self.task, self.march, '2.00')
+
+    def _session(self, teacher, task, created_at, hours):
+        session = WorkSession.objects.create(
+            teacher=teacher, task=task, entry_type='manual', manual_hours=Decimal(hours)
+        )
+        WorkSession.objects.filter(pk=session.pk).update(created_at=created_at)
+        session.refresh_from_db()
+        # update() skips the signals, so the cache entries of the new month are dropped by hand
+        with self.captureOnCommitCallbacks(execute=True):
+            SalaryCacheService.invalidate(*SalaryCacheService.session_month(session))
+        return session
+
+    def _salary(self, teacher, year=2025, month=3):
+        return SalaryCacheService.get_salary(teacher, year, month)['total_salary']
+
+    def _is_cached(self, teacher_id, year, month):
+        return cache.get(SalaryCacheService.key(teacher_id, year, month)) is not None
+
+    def test_second_lookup_is_a_hit_without_queries(self):
+        self.assertEqual(self._salary(self.teacher), '20.00')
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self._salary(self.teacher), '20.00')
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(SalaryCacheService.stats(), {'hits': 1, 'misses': 1, 'hit_rate': 0.5})
+
+    def test_session_save_and_delete_invalidate_their_month(self):
+        self._salary(self.teacher)
+        self.session.manual_hours = Decimal('3.00')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.session.save()
+        self.assertEqual(self._salary(self.teacher), '30.00')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.session.delete()
+        self.assertEqual(self._salary(self.teacher), '0.00')
+
+    def test_other_teacher_months_stay_cached(self):
+        """Only the affected teacher-month is dropped"""
+        self._session(self.teachers[1], self.task, self.march, '1.00')
+        self._salary(self.teacher, month=3)
+        self._salary(self.teacher, month=4)
+        self._salary(self.teachers[1], month=3)
+
+        self.session.manual_hours = Decimal('4.00')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.session.save()
+
+        self.assertFalse(self._is_cached(self.teacher.id, 2025, 3))
+        self.assertTrue(self._is_cached(self.teacher.id, 2025, 4))
+        self.assertTrue(self._is_cached(self.teachers[1].id, 2025, 3))
+
+    def test_moving_a_session_invalidates_both_months(self):
+        self._salary(self.teacher, month=3)
+        self._salary(self.teacher, month=4)
+        self.session.created_at = self.april
+        with self.captureOnCommitCallbacks(execute=True):
+            self.session.save()
+
+        self.assertEqual(self._salary(self.teacher, month=3), '0.00')
+        self.assertEqual(self._salary(self.teacher, month=4), '20.00')
+
+    def test_task_change_invalidates_teacher_months_using_it(self):
+        self._session(self.teachers[1], self.other_task, self.march, '1.00')
+        self._salary(self.teacher)
+        self._salary(self.teachers[1])
+
+        self.task.name = "Private tutoring"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.save()
+
+        self.assertFalse(self._is_cached(self.teacher.id, 2025, 3))
+        self.assertTrue(self._is_cached(self.teachers[1].id, 2025, 3))
+        details = SalaryCacheService.get_salary(self.teacher, 2025, 3)['session_details']
+        self.assertEqual(details[0]['task'], "Private tutoring")
+
+    def test_unrelated_task_save_keeps_the_cache(self):
+        self._salary(self.teacher)
+        self.task.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.save()
+        self.assertTrue(self._is_cached(self.teacher.id, 2025, 3))
+
+    def test_entries_are_dropped_when_the_change_commits(self):
+        """Until then another request could cache the old value again"""
+        self._salary(self.teacher)
+        self.session.manual_hours = Decimal('3.00')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.session.save()
+            self.assertTrue(self._is_cached(self.teacher.id, 2025, 3))
+        self.assertFalse(self._is_cached(self.teacher.id, 2025, 3))
+
+        self._salary(self.teacher)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.session.delete()
+        self.assertEqual(len(callbacks), 2)
+        self.assertTrue(self._is_cached(self.teacher.id, 2025, 3))
+
+    def test_report_view_uses_the_cache(self):
+        superuser = CustomUser.objects.create_superuser(username='cache_admin', password='pass', is_inspector=True)
+        client = Client()
+        client.force_login(superuser)
+        url = reverse('view_salary_report', args=[self.teacher.id, 2025, 3])
+        for _ in range(3):
+            self.assertEqual(client.get(url).status_code, 200)
+        self.assertEqual(SalaryCacheService.stats()['hits'], 2)
+
+        out = io.StringIO()
+        call_command('salary_cache_stats', '--reset', stdout=out)
+        self.assertIn('2 hits, 1 misses, hit rate 66.7%', out.getvalue())
+        self.assertEqual(SalaryCacheService.stats()['hits'], 0)
@@ -0,0 +1,135 @@
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.utils import timezone
+from decimal import Decimal
+from teachers_app.models import CustomUser, Teacher, Task, WorkSession, SalaryReport
+from teachers_app.services import BulkSalaryService, SalaryCalculationService
+
+
+class BulkSalaryServiceTestCase(TestCase):
+    def setUp(self):
+        self.superuser = CustomUser.objects.create_superuser(username='bulk_admin', password='pass', is_inspector=True)
+        self.task = Task.objects.create(name="Tutoring", hourly_rate=Decimal('12.50'), price=Decimal('20.00'))
+        self.teachers = []
+        for i in range(3):
+            user = CustomUser.objects.create_user(username=f'bulk_teacher_{i}', password='pass', is_teacher=True)
+            self.teachers.append(Teacher.objects.create(user=user))
+        self.now = timezone.now()
+        for teacher, hours in zip(self.teachers, ['1.50', '2.25', '0.00']):
+            WorkSession.objects.create(
+                teacher=teacher, task=self.task, entry_type='manual', manual_hours=Decimal(hours)
+            )
+
+    def test_month_totals_match_calculate_salary(self):
+        """Grouped totals match the per-teacher calculation"""
+        totals = BulkSalaryService.month_totals(self.now.year, self.now.month)
+        for teacher in self.teachers[:2]:
+            expected = SalaryCalculationService.calculate_salary(teacher, self.now.year, self.now.month)
+            self.assertEqual(str(totals[teacher.id]['total_amount']), expected['total_salary'])
+        self.assertEqual(totals[self.teachers[0].id]['total_hours'], Decimal('1.50'))
+
+    def test_apply_creates_and_updates_reports(self):
+        """Reports are created for new teachers and refreshed for existing ones"""
+        existing = SalaryReport.create_for_month(
+            teacher=self.teachers[1], year=self.now.year, month=self.now.month, created_by=self.superuser
+        )
+        existing.total_amount = Decimal('0.00')
+        existing.save()
+
+        actions = {
+            self.teachers[0].id: 'create',
+            self.teachers[1].id: 'update',
+            self.teachers[2].id: 'skip',
+        }
+        results = dict(BulkSalaryService.apply(self.now.year, self.now.month, actions, created_by=self.superuser))
+
+        self.assertEqual(results, {self.teachers[0].id: 'created', self.teachers[1].id: 'updated'})
+        created = SalaryReport.objects.get(teacher=self.teachers[0])
+        self.assertEqual(created.total_amount, Decimal('18.75'))
+        existing.refresh_from_db()
+        self.assertEqual(existing.total_hours, Decimal('2.25'))
+        self.assertEqual(existing.total_amount, Decimal('28.13'))
+        self.assertFalse(SalaryReport.objects.filter(teacher=self.teachers[2]).exists())
+
+    def test_bulk_view_query_count_is_constant(self):
+        """The bulk POST does not issue queries per teacher"""
+        client = Client()
+        client.force_login(self.superuser)
+        url = reverse('salary_reports_bulk') + f'?month={self.now.month}&year={self.now.year}'
+        data = {f'action_{teacher.id}': 'create' for teacher in self.teachers}
+
+        with self.assertNumQueries(8):
+            response = client.post(url, data)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(SalaryReport.objects.filter(is_deleted=False).count(), 3)
+
+
+class SalaryReportListTestCase(TestCase):
+    def setUp(self):
+        self.superuser = CustomUser.objects.create_superuser(username='list_admin', password='pass', is_inspector=True)
+        self.task = Task.objects.create(name="Tutoring", hourly_rate=Decimal('10.00'), price=Decimal('20.00'))
+        self.now = timezone.now()
+        self.teachers = []
+        for i in range(3):
+            user = CustomUser.objects.create_user(username=f'list_teacher_{i}', password='pass', is_teacher=True)
+            teacher = Teacher.objects.create(user=user)
+            WorkSession.objects.create(teacher=teacher, task=self.task, entry_type='manual', manual_hours=Decimal('2.00'))
+            SalaryReport.create_for_month(teacher=teacher, year=self.now.year, month=self.now.month, created_by=self.superuser)
+            self.teachers.append(teacher)
+        self.client = Client()
+        self.client.force_login(self.superuser)
+
+    def test_work_session_changes_mark_report_stale(self):
+        """Saving a session in the report period flags the report as stale"""
+        report = SalaryReport.objects.get(teacher=self.teachers[0])
+        self.assertFalse(report.is_stale)
+        WorkSession.objects.create(teacher=self.teachers[0], task=self.task, entry_type='manual', manual_hours=Decimal('1.00'))
+        report.refresh_from_db()
+        self.assertTrue(report.is_stale)
+
+    def test_moved_session_marks_both_reports_stale(self):
+        """A session moved to another month or teacher flags the report it left as well"""
+        previous = (self.now.replace(day=1) - timezone.timedelta(days=1))
+        old_report = SalaryReport.create_for_month(
+            teacher=self.teachers[0], year=previous.year, month=previous.month, created_by=self.superuser
+        )
+        current = SalaryReport.objects.get(teacher=self.teachers[0], start_date=self.now.date().replace(day=1))
+        session = WorkSession.objects.get(teacher=self.teachers[0])
+        session.created_at = previous
+        session.save()
+        self.assertEqual(
+            set(SalaryReport.objects.filter(is_stale=True).values_list('pk', flat=True)), {old_report.pk, current.pk}
+        )
+
+        SalaryReport.objects.update(is_stale=False)
+        session.teacher = self.teachers[1]
+        session.save()
+        self.assertEqual(
+            set(SalaryReport.objects.filter(is_stale=True).values_list('teacher_id', 'start_date')),
+            {(self.teachers[0].id, old_report.start_date)}
+        )
+
+    def test_list_recomputes_only_stale_totals(self):
+        """The list page refreshes stale totals and stores them"""
+        WorkSession.objects.create(teacher=self.teachers[0], task=self.task, entry_type='manual', manual_hours=Decimal('1.00'))
+        SalaryReport.objects.filter(teacher=self.teachers[1]).update(total_amount=None)
+
+        response = self.client.get(reverse('list_salary_reports'))
+        self.assertEqual(response.status_code, 200)
+        totals = {item['report'].teacher_id: item['total_salary'] for item in response.context['reports']}
+        self.assertEqual(totals[self.teachers[0].id], Decimal('30.00'))
+        self.assertEqual(totals[self.teachers[1].id], Decimal('20.00'))
+        self.assertEqual(totals[self.teachers[2].id], Decimal('20.00'))
+        self.assertFalse(SalaryReport.objects.filter(is_stale=True).exists())
+
+    def test_list_query_count_does_not_grow_with_reports(self):
+        """Rendering the list issues the same number of queries for any number of reports"""
+        SalaryReport.objects.update(is_stale=True)
+        with self.assertNumQueries(5):
+            self.client.get(reverse('list_salary_reports'))
+        user = CustomUser.objects.create_user(username='list_teacher_extra', password='pass', is_teacher=True)
+        teacher = Teacher.objects.create(user=user)
+        SalaryReport.create_for_month(teacher=teacher, year=self.now.year, month=self.now.month, created_by=self.superuser)
+        SalaryReport.objects.update(is_stale=True)
+        with self.assertNumQueries(5):
+            self.client.get(reverse('list_salary_reports'))
@@ -0,0 +1,45 @@
+import io
+import logging
+from unittest import mock
+from django.core.management import call_command
+from django.test import TestCase
+from decimal import Decimal
+from teachers_app.models import CustomUser, Teacher, Task, WorkSession
+
+
+class WorkSessionSaveLoggingTestCase(TestCase):
+    def setUp(self):
+        user = CustomUser.objects.create_user(username='log_teacher', password='pass', is_teacher=True)
+        self.teacher = Teacher.objects.create(user=user)
+        self.task = Task.objects.create(name="Tutoring", hourly_rate=Decimal('10.00'), price=Decimal('20.00'))
+
+    def _save(self):
+        session = WorkSession(teacher=self.teacher, task=self.task, entry_type='manual', manual_hours=Decimal('2.00'))
+        session.save()
+        return session
+
+    def test_one_structured_debug_record_per_save(self):
+        with self.assertLogs('teachers_app.models', level='DEBUG') as logs:
+            session = self._save()
+        self.assertEqual(len(logs.records), 1)
+        record = logs.records[0]
+        self.assertEqual(record.args[0], session.pk)
+        self.assertIn('hours=2.00', record.getMessage())
+
+    def test_nothing_is_formatted_above_debug(self):
+        logger = logging.getLogger('teachers_app.models')
+        previous = logger.level
+        logger.setLevel(logging.INFO)
+        try:
+            with mock.patch.object(logger, 'debug') as debug:
+                self._save()
+            debug.assert_not_called()
+        finally:
+            logger.setLevel(previous)
+
+    def test_benchmark_command_reports_both_profiles(self):
+        out = io.StringIO()
+        call_command('benchmark_work_session_save', '--count', '5', '--repeat', '1', stdout=out)
+        self.assertIn('development (DEBUG): 5 saves', out.getvalue())
+        self.assertIn('production (INFO): 5 saves', out.getvalue())
+        self.assertFalse(WorkSession.objects.exists())
@@ -0,0 +1,160 @@
+from datetime import date, datetime
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.utils import timezone
+from teachers_app.billing_models import Bill, LedgerEntry, StudentBalance
+from teachers_app.billing_services import (
+    BillTotalsService, BulkBillingService, LedgerService, StudentBillingService
+)
+from teachers_app.models import CustomUser, Teacher, Student, Task, WorkSession
+
+
+class StudentLedgerTestCase(TestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_superuser(username='ledger_admin', password='pass', email='l@example.com')
+        teacher_user = CustomUser.objects.create_user(username='ledger_teacher', password='pass', is_teacher=True)
+        self.teacher = Teacher.objects.create(user=teacher_user)
+        self.students = []
+        for i in range(3):
+            user = CustomUser.objects.create_user(username=f'ledger_student_{i}', password='pass', is_student=True)
+            self.students.append(Student.objects.create(user=user))
+        self.student = self.students[0]
+        self.task = Task.objects.create(name="Tutoring", hourly_rate=Decimal('12.50'), price=Decimal('20.00'))
+        self.month = date(2025, 3, 1)
+        self.bill = Bill.objects.create(student=self.student, month=self.month, total_amount=Decimal('0.00'))
+
+    def charge(self, amount, bill=None):
+        amount = Decimal(amount)
+        return BillTotalsService.add_item(
+            bill or self.bill, service_name="Books", service_price_at_billing=amount, quantity=Decimal('1'), amount=amount
+        )
+
+    def test_charges_and_payments_move_the_balance(self):
+        self.charge('10.00')
+        item = self.charge('5.00')
+        item.amount = Decimal('2.00')
+        BillTotalsService.save_item(item)
+        self.assertEqual(LedgerService.balance(self.student), Decimal('12.00'))
+
+        self.assertTrue(LedgerService.pay_bill(self.bill))
+        # A second payment of the same bill is not credited again
+        self.assertFalse(LedgerService.pay_bill(self.bill))
+        self.assertEqual(LedgerService.balance(self.student), Decimal('0.00'))
+
+        entries = list(LedgerEntry.objects.filter(student=self.student).values_list('kind', 'amount', 'balance_after'))
+        self.assertEqual(entries, [
+            ('charge', Decimal('10.00'), Decimal('10.00')),
+            ('charge', Decimal('5.00'), Decimal('15.00')),
+            ('charge', Decimal('-3.00'), Decimal('12.00')),
+            ('payment', Decimal('-12.00'), Decimal('0.00')),
+        ])
+        self.assertEqual(LedgerService.find_drift(), [])
+        self.assertEqual(LedgerService.bill_differences(), [])
+
+    def test_create_bill_views_charge_the_ledger(self):
+        client = Client()
+        client.force_login(self.admin)
+        created_at = timezone.make_aware(datetime(2025, 3, 10, 10, 0))
+        session_fields = {'teacher': self.teacher, 'task': self.task, 'student': self.student, 'entry_type': 'manual'}
+        WorkSession.objects.create(**session_fields, manual_hours=Decimal('2.00'), created_at=created_at)
+        # Deleted sessions are not billed
+        WorkSession.objects.create(**session_fields, manual_hours=Decimal('3.00'), created_at=created_at, is_deleted=True)
+        self.assertEqual(StudentBillingService.get_month_work_sessions(self.student, self.month).count(), 1)
+        self.charge('5.00')
+
+        client.get(reverse('create_bill', args=[self.student.id]), {'month': '3', 'year': '2025', 'action': 'create'})
+        self.bill.refresh_from_db()
+        self.assertEqual(self.bill.total_amount, Decimal('45.00'))
+        self.assertEqual(LedgerService.balance(self.student), Decimal('45.00'))
+
+        WorkSession.objects.create(**session_fields, manual_hours=Decimal('1.00'), created_at=created_at)
+        client.get(f'/dashboard/dashboard/student/{self.student.id}/bills/create/', {'month': '3', 'year': '2025'})
+        self.bill.refresh_from_db()
+        self.assertEqual(self.bill.total_amount, Decimal('65.00'))
+        self.assertEqual(LedgerService.balance(self.student), Decimal('65.00'))
+        self.assertEqual(LedgerService.find_drift(), [])
+        self.assertEqual(LedgerService.bill_differences(), [])
+
+    def test_balance_is_one_read(self):
+        self.charge('10.00')
+        with self.assertNumQueries(1):
+            self.assertEqual(StudentBillingService.calculate_student_balance(self.student), Decimal('10.00'))
+        with self.assertNumQueries(1):
+            self.assertEqual(LedgerService.balance(self.students[1]), Decimal('0.00'))
+
+    def test_record_many_cost_does_not_grow_with_students(self):
+        # Students without a balance row yet: one locked read and two inserts
+        with self.assertNumQueries(3):
+            LedgerService.record_many([(student.id, None, 100) for student in self.students])
+        # Existing balance rows are updated in bulk instead of inserted
+        with self.assertNumQueries(3):
+            LedgerService.record_many([(student.id, None, 50) for student in self.students] * 4)
+        self.assertEqual(
+            sorted(StudentBalance.objects.values_list('balance', flat=True)), [Decimal('3.00')] * 3
+        )
+
+    def test_bulk_billing_and_work_sessions_charge_the_ledger(self):
+        start = timezone.make_aware(datetime(2025, 3, 10, 10, 0))
+        for student in self.students[:2]:
+            WorkSession.objects.create(
+                teacher=self.teacher, task=self.task, student=student, entry_type='time_range',
+                start_time=start, end_time=start + timezone.timedelta(hours=2),
+            )
+        Bill.objects.all().delete()
+        BulkBillingService.apply(self.month, {student.id: 'create' for student in self.students[:2]})
+        self.assertEqual(LedgerService.balance(self.students[1]), Decimal('40.00'))
+
+        session = WorkSession.objects.create(
+            teacher=self.teacher, task=self.task, student=self.students[1], entry_type='time_range',
+            start_time=start, end_time=start + timezone.timedelta(hours=1),
+        )
+        StudentBillingService.create_bill_item_for_work_session(session)
+        self.assertEqual(LedgerService.balance(self.students[1]), Decimal('60.00'))
+        self.assertEqual(
+            [balance.student_id for balance in LedgerService.debtors()], [self.students[1].id, self.student.id]
+        )
+        self.assertEqual(LedgerService.find_drift(), [])
+        self.assertEqual(LedgerService.bill_differences(), [])
+
+    def test_reconcile_command(self):
+        self.charge('10.00')
+        StudentBalance.objects.filter(student=self.student).update(balance=Decimal('99.00'))
+        # Edited outside the services, so the ledger never saw it
+        Bill.objects.create(student=self.students[1], month=self.month, total_amount=Decimal('7.00'))
+
+        out = StringIO()
+        call_command('reconcile_student_balances', stdout=out)
+        self.assertIn(f"Student {self.student.id}: balance 99.00, ledger entries add up to 10.00", out.getvalue())
+        self.assertIn(f"Student {self.students[1].id}: balance 0.00, unpaid bills 7.00", out.getvalue())
+
+        out = StringIO()
+        call_command('reconcile_student_balances', '--fix', '--sync-bills', stdout=out)
+        self.assertIn('Rebuilt 1 balances', out.getvalue())
+        self.assertIn('Adjusted 1 balances', out.getvalue())
+        self.assertEqual(LedgerService.balance(self.student), Decimal('10.00'))
+        self.assertEqual(LedgerEntry.objects.get(student=self.students[1]).kind, 'adjustment')
+        self.assertEqual(LedgerService.find_drift(), [])
+        self.assertEqual(LedgerService.bill_differences(), [])
+
+    def test_pay_view_and_balance_pages(self):
+        self.charge('10.00')
+        client = Client()
+        client.force_login(self.admin)
+        response = client.get(reverse('student_balances'))
+        self.assertContains(response, 'ledger_student_0')
+
+        response = client.post(reverse('mark_bill_paid', args=[self.bill.id]), follow=True)
+        self.assertRedirects(response, reverse('student_bills', args=[self.student.id]))
+        self.bill.refresh_from_db()
+        self.assertTrue(self.bill.is_paid)
+        self.assertEqual(LedgerService.balance(self.student), Decimal('0.00'))
+
+        student_client = Client()
+        student_client.force_login(self.students[1].user)
+        client.post(reverse('mark_bill_paid', args=[self.bill.id]))
+        response = student_client.post(reverse('mark_bill_paid', args=[self.bill.id]))
+        self.assertNotEqual(response.status_code, 200)
+        self.assertEqual(LedgerEntry.objects.filter(kind='payment').count(), 1)
@@ -0,0 +1,93 @@
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from decimal import Decimal
+from teachers_app.models import CustomUser, Teacher, Student, Task, WorkSession
+
+
+class WorkSessionListTestCase(TestCase):
+    def setUp(self):
+        self.superuser = CustomUser.objects.create_superuser(username='list_admin', password='pass')
+        self.task = Task.objects.create(name="Tutoring", hourly_rate=Decimal('10.00'), price=Decimal('20.00'))
+        self.teachers = []
+        for i in range(2):
+            user = CustomUser.objects.create_user(username=f'list_teacher_{i}', password='pass', is_teacher=True)
+            self.teachers.append(Teacher.objects.create(user=user))
+        student_user = CustomUser.objects.create_user(username='list_student', password='pass', is_student=True)
+        self.student = Student.objects.create(user=student_user)
+        self.client = Client()
+        self.client.force_login(self.superuser)
+        self.url = reverse('superuser_list_work_sessions')
+
+    def _create_sessions(self, count):
+        # bulk_create skips WorkSession.save(); the list only needs the stored columns
+        WorkSession.objects.bulk_create([
+            WorkSession(
+                teacher=self.teachers[i % 2], task=self.task, student=self.student, entry_type='manual',
+                manual_hours=Decimal('1.00'), stored_hours=Decimal('1.00'), hourly_rate=Decimal('10.00'),
+                teacher_payment_amount=Decimal('10.00'), total_amount=Decimal('20.00')
+            )
+            for i in range(count)
+        ])
+
+    def _page_ids(self, response):
+        return [session.id for session in response.context['work_sessions']]
+
+    def test_pages_cover_every_session_once(self):
+        """Following the next links walks every session in (created_at, id) order"""
+        self._create_sessions(120)
+        expected = list(WorkSession.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+
+        seen = []
+        response = self.client.get(self.url)
+        while True:
+            seen.extend(self._page_ids(response))
+            page = response.context['page']
+            if not page.has_next:
+                break
+            response = self.client.get(self.url, {'after': page.next_cursor})
+
+        self.assertEqual(seen, expected)
+
+    def test_previous_link_returns_previous_page(self):
+        """The before cursor gives back the page that led here"""
+        self._create_sessions(120)
+        first = self.client.get(self.url)
+        second = self.client.get(self.url, {'after': first.context['page'].next_cursor})
+
+        back = self.client.get(self.url, {'before': second.context['page'].previous_cursor})
+
+        self.assertEqual(self._page_ids(back), self._page_ids(first))
+
+    def test_query_count_does_not_depend_on_table_size(self):
+        """First and deep pages use the same number of queries for small and large tables"""
+        counts = []
+        for total in (10, 140):
+            WorkSession.objects.all().delete()
+            self._create_sessions(total)
+            with CaptureQueriesContext(connection) as first_page:
+                response = self.client.get(self.url)
+            counts.append(len(first_page))
+            if response.context['page'].has_next:
+                with CaptureQueriesContext(connection) as next_page:
+                    self.client.get(self.url, {'after': response.context['page'].next_cursor})
+                counts.append(len(next_page))
+
+        self.assertEqual(len(set(counts)), 1, counts)
+
+    def test_filters_by_teacher_and_keeps_filters_in_links(self):
+        """Filter form values narrow the list and survive pagination"""
+        self._create_sessions(120)
+        response = self.client.get(self.url, {'teacher': self.teachers[0].id})
+
+        self.assertEqual(len(self._page_ids(response)), 50)
+        self.assertTrue(all(session.teacher_id == self.teachers[0].id for session in response.context['work_sessions']))
+        self.assertEqual(response.context['filter_query'], f'teacher={self.teachers[0].id}')
+
+    def test_invalid_cursor_shows_first_page(self):
+        """A tampered cursor falls back to the first page"""
+        self._create_sessions(5)
+        response = self.client.get(self.url, {'after': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self._page_ids(response)), 5)
@@ -1,6 +1,6 @@
 from django.urls import path
 from django.contrib.auth import views as auth_views
-from . import views, billing_views, salary_views
+from . import views, billing_views, salary_views, job_views, export_views, clock_views, api_views
 from .service_views import manage_services, add_service, edit_service, delete_service
 
 urlpatterns = [
@@ -40,6 +40,14 @@ urlpatterns = [
     path('record-work/', views.record_work, name='record_work'),  # For teachers recording their own work
     path('record-work/<int:teacher_id>/', views.record_work, name='record_work_with_teacher'),
     path('clock-out/<int:session_id>/', views.clock_out, name='clock_out'),
+    path('api/clock/', clock_views.clock_api, name='clock_api'),
+    path('api/clock/<int:teacher_id>/', clock_views.clock_api, name='clock_api_for_teacher'),
+    path('api/clock/batch/', clock_views.clock_batch, name='clock_batch'),
+    path('api/work-sessions/', api_views.work_sessions, name='api_work_sessions'),
+    path('api/teachers/', api_views.teachers, name='api_teachers'),
+    path('api/students/', api_views.students, name='api_students'),
+    path('api/salary-reports/', api_views.salary_reports, name='api_salary_reports'),
+    path('api/bills/', api_views.bills, name='api_bills'),
     path('dashboard/recent-work-sessions/<int:teacher_id>/', views.recent_work_sessions, name='recent_work_sessions'),
     path('dashboard/student/<int:student_id>/bills/create/', billing_views.create_bill_final, name='create_bill'),
 
@@ -63,11 +71,22 @@ urlpatterns = [
     path('student/<int:student_id>/bills/', billing_views.student_bills, name='student_bills'),
     path('student/<int:student_id>/bills/create/', billing_views.create_bill, name='create_bill'),
     path('bill/<int:bill_id>/', billing_views.bill_detail, name='bill_detail'),
+    path('bill/<int:bill_id>/pay/', billing_views.mark_bill_paid, name='mark_bill_paid'),
+    path('superuser/student-balances/', billing_views.student_balances, name='student_balances'),
     path('dashboard/superuser/charge-student-for-service/', billing_views.charge_student_for_service, name='charge_student_for_service'),
     path('superuser/student/<int:student_id>/bill-items/', billing_views.student_bill_items, name='student_bill_items'),
     path('bill-item/<int:item_id>/edit/', billing_views.edit_bill_item, name='edit_bill_item'),
     path('bill-item/<int:item_id>/delete/', billing_views.delete_bill_item, name='delete_bill_item'),
 
+    # CSV exports
+    path('superuser/export/work-sessions.csv', export_views.export_work_sessions, name='export_work_sessions'),
+    path('superuser/export/salary-reports.csv', export_views.export_salary_reports, name='export_salary_reports'),
+    path('superuser/export/bills.csv', export_views.export_bills, name='export_bills'),
+
+    # Background jobs
+    path('superuser/jobs/', job_views.list_jobs, name='list_jobs'),
+    path('superuser/jobs/<int:job_id>/', job_views.job_detail, name='job_detail'),
+
     path('manage-inspectors/', views.manage_inspectors, name='manage_inspectors'),
     path('delete-inspector/<int:inspector_id>/', views.delete_inspector, name='delete_inspector'),
     path('change-inspector-password/<int:inspector_id>/', views.change_inspector_password, name='change_inspector_password'),
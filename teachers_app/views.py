@@ -24,7 +24,10 @@ from .forms import (
     ChangeTeacherPasswordForm, SalaryReportForm, StudentCreationForm, EditStudentForm, ChangeStudentPasswordForm,
     InspectorCreationForm
 )
-from .services import SalaryCalculationService
+from .conditional import conditional_page, salary_report_state
+from .services import BulkSalaryService, FragmentCacheService, SalaryCacheService, annotate_session_cents, cents_to_decimal
+from .pagination import KeysetPaginator, InvalidCursor
+from .clock_services import AlreadyClockedIn, ClockService
 
 
 def teacher_or_superuser(function=None, login_url=None, redirect_field_name=None):
@@ -97,7 +100,10 @@ def student_dashboard(request):
     """
     View for the student's dashboard.
     """
-    return render(request, 'student/dashboard.html')
+    from .billing_services import StudentBillingService
+    student = Student.objects.filter(user=request.user).first()
+    balance = StudentBillingService.calculate_student_balance(student) if student else None
+    return render(request, 'student/dashboard.html', {'balance': balance})
 
 
 @login_required
@@ -131,7 +137,7 @@ def change_password(request):
 @login_required
 @user_passes_test(lambda u: u.is_inspector, login_url=None)
 def manage_teachers(request):
-    teachers = Teacher.objects.all()
+    teachers = Teacher.objects.select_related('user')
     can_edit = request.user.is_superuser
     if request.method == "POST" and can_edit:
         form = AddTeacherForm(request.POST)
@@ -176,8 +182,8 @@ def manage_teachers(request):
 @login_required
 @user_passes_test(lambda u: u.is_inspector, login_url=None)
 def manage_students(request):
-    active_students = Student.objects.filter(is_active=True)
-    deactivated_students = Student.objects.filter(is_active=False)
+    active_students = Student.objects.filter(is_active=True).select_related('user', 'ledger_balance')
+    deactivated_students = Student.objects.filter(is_active=False).select_related('user')
     can_add = request.user.is_superuser
     form = StudentCreationForm(request.POST or None)
     if form.is_valid() and can_add:
@@ -384,9 +390,33 @@ def change_student_password(request, student_id):
 @login_required
 @user_passes_test(lambda u: u.is_superuser)
 def list_work_sessions(request):
-    work_sessions = WorkSession.objects.select_related('task', 'teacher').order_by('-start_time')
+    """
+    Live work sessions, newest first, one keyset page at a time so every page
+    costs the same number of queries however large the table gets.
+    """
+    work_sessions = WorkSession.objects.filter(is_deleted=False).select_related(
+        'task', 'teacher__user', 'student__user'
+    )
+    form = WorkSessionFilterForm(request.GET or None)
+    if form.is_valid():
+        work_sessions = form.filter_queryset(work_sessions)
+
+    paginator = KeysetPaginator(work_sessions, ordering=('-created_at', '-id'), page_size=50)
+    try:
+        page = paginator.page(after=request.GET.get('after'), before=request.GET.get('before'))
+    except InvalidCursor:
+        page = paginator.page()
+
+    # Filters are kept in the pagination links
+    filters = request.GET.copy()
+    filters.pop('after', None)
+    filters.pop('before', None)
+
     context = {
-        'work_sessions': work_sessions
+        'work_sessions': page,
+        'page': page,
+        'form': form,
+        'filter_query': filters.urlencode(),
     }
     return render(request, 'superuser/list_work_sessions.html', context)
 
@@ -575,11 +605,14 @@ def record_work(request, teacher_id=None):
         elif entry_type == 'clock':
             clock_form = WorkSessionClockForm(request.POST)
             if clock_form.is_valid():
-                work_session = clock_form.save(commit=False)
-                work_session.teacher = teacher
-                work_session.entry_type = 'clock'
-                work_session.clock_in = timezone.now()
-                work_session.save()
+                student = clock_form.cleaned_data.get('student')
+                try:
+                    work_session = ClockService.clock_in(
+                        teacher.id, clock_form.cleaned_data['task'], student.id if student else None
+                    )
+                except AlreadyClockedIn:
+                    messages.error(request, f'{teacher.user.username} já possui um ponto de entrada em aberto.')
+                    return redirect('record_work_with_teacher', teacher_id=teacher.id)
                 from .billing_services import StudentBillingService
                 if work_session.student:
                     StudentBillingService.create_bill_item_for_work_session(work_session)
@@ -599,11 +632,7 @@ def record_work(request, teacher_id=None):
                 return redirect('record_work_with_teacher', teacher_id=teacher.id)
 
     # Get the active session for the teacher
-    active_session = WorkSession.objects.filter(
-        teacher=teacher,
-        entry_type='clock',
-        clock_out__isnull=True
-    ).first()
+    active_session = ClockService.active_session(teacher.id)
 
     # Get completed sessions for the teacher
     completed_sessions = WorkSession.objects.filter(
@@ -641,13 +670,14 @@ def clock_out(request, session_id):
         elif not request.user.is_superuser:
             raise PermissionDenied("You don't have permission to clock out sessions.")
         
-        # Set clock out time
-        session.clock_out = timezone.now()
-        session.save()
+        # Set clock out time; None when another request closed the session first
+        session = ClockService.clock_out(session.teacher_id, session_id=session.id)
+        if session is None:
+            raise Http404("No open clock session found.")
         
         # Create bill item if there's a student associated
         from .billing_services import StudentBillingService
-        if session.student:
+        if session.student_id:
             StudentBillingService.create_bill_item_for_work_session(session)
         
         messages.success(request, 'Ponto de saída registrado com sucesso!')
@@ -667,10 +697,10 @@ def recent_work_sessions(request, teacher_id=None):
     if request.user.is_superuser or getattr(request.user, 'is_inspector', False):
         if teacher_id is None:
             return HttpResponseForbidden("You must specify a teacher to view sessions for.")
-        teacher = get_object_or_404(Teacher, id=teacher_id)
+        teacher = get_object_or_404(Teacher.objects.select_related('user'), id=teacher_id)
     # Teachers: always see their own sessions
     elif hasattr(request.user, 'teacher'):
-        teacher = get_object_or_404(Teacher, user=request.user)
+        teacher = get_object_or_404(Teacher.objects.select_related('user'), user=request.user)
         # Prevent teachers from viewing other teachers' sessions
         if teacher_id is not None and teacher_id != teacher.id:
             return HttpResponseForbidden("You do not have permission to view other teachers' sessions.")
@@ -678,7 +708,7 @@ def recent_work_sessions(request, teacher_id=None):
         return HttpResponseForbidden("You do not have permission to view work sessions.")
 
     # Fetch all work sessions for the teacher
-    work_sessions = WorkSession.objects.filter(teacher=teacher).order_by('-created_at')
+    work_sessions = WorkSession.objects.filter(teacher=teacher).select_related('task', 'student__user').order_by('-created_at')
 
     context = {
         'teacher': teacher,
@@ -711,8 +741,9 @@ def change_teacher_password(request, teacher_id):
 
 @login_required
 @user_passes_test(lambda u: u.is_inspector_effective or (hasattr(u, 'teacher') and u.is_authenticated), login_url=None)
+@conditional_page(salary_report_state)
 def view_salary_report(request, teacher_id, year, month):
-    teacher = get_object_or_404(Teacher, id=teacher_id)
+    teacher = get_object_or_404(Teacher.objects.select_related('user'), id=teacher_id)
     from django.utils import timezone
     from datetime import datetime, timedelta
     # Use timezone-aware datetimes
@@ -723,15 +754,16 @@ def view_salary_report(request, teacher_id, year, month):
         end_date = timezone.make_aware(datetime(year, month + 1, 1))
     end_date = end_date - timedelta(microseconds=1)
 
+    # Reports store the next month's first instant as end_date, so match on start_date
     reports = SalaryReport.objects.filter(
         teacher=teacher,
-        start_date__gte=start_date,
-        end_date__lte=end_date
-    )
+        start_date=start_date,
+        is_deleted=False
+    ).select_related('created_by')
     report = reports.first()
 
-    # Calculate the report data - FIXED: Use static method
-    report_data = SalaryCalculationService.calculate_salary(teacher, year, month)
+    # Calculate the report data (cached per teacher-month, invalidated by the session/task signals)
+    report_data = SalaryCacheService.get_salary(teacher, year, month)
 
     # Permissions: allow inspector, superuser, or the teacher themselves
     if request.user.is_inspector_effective:
@@ -741,27 +773,34 @@ def view_salary_report(request, teacher_id, year, month):
     else:
         raise PermissionDenied("You do not have permission to view this report")
 
-    # Task summary for this report: total hours per task (only for sessions in this report)
-    from collections import defaultdict
-    task_summary_dict = defaultdict(float)
     if report:
         work_sessions = report.get_work_sessions().order_by('-created_at')
     else:
         work_sessions = WorkSession.objects.filter(teacher=teacher, start_time__gte=start_date, start_time__lte=end_date).order_by('-created_at')
-    for ws in work_sessions:
-        task_name = ws.task.name
-        task_summary_dict[task_name] += float(ws.stored_hours or 0)
-    task_summary = [
-        {'task_name': name, 'total_hours': hours}
-        for name, hours in task_summary_dict.items()
-    ]
-
+    work_sessions = annotate_session_cents(work_sessions.select_related('task', 'student__user'))
+
+    def task_summary():
+        """Total hours per task (only for sessions in this report)"""
+        from collections import defaultdict
+        task_summary_dict = defaultdict(int)
+        for ws in work_sessions:
+            # Sum integer hundredths of an hour instead of floats
+            task_summary_dict[ws.task.name] += ws.hours_cents
+        return [
+            {'task_name': name, 'total_hours': cents_to_decimal(hours)}
+            for name, hours in task_summary_dict.items()
+        ]
+
+    # The tables are cached fragments: the sessions query and the summary (a callable, so the
+    # template only calls it on a miss) run when the teacher-month changed since the last render
     return render(request, template, {
         'teacher': teacher,
         'report': report,
         'report_data': report_data,
         'work_sessions': work_sessions,
         'task_summary': task_summary,
+        'fragment_version': FragmentCacheService.salary_version(teacher.id, year, month),
+        'fragment_timeout': FragmentCacheService.timeout(),
     })
 
 
@@ -779,17 +818,13 @@ def list_salary_reports(request, teacher_id=None):
         reports = SalaryReport.objects.filter(
             is_deleted=False
         ).order_by('-start_date')
+    reports = reports.select_related('teacher__user', 'created_by')
 
-    # For each report, calculate the salary - FIXED: Use static method
-    reports_with_data = []
-    for report in reports:
-        year = report.start_date.year
-        month = report.start_date.month
-        report_data = SalaryCalculationService.calculate_salary(report.teacher, year, month)
-        reports_with_data.append({
-            'report': report,
-            'total_salary': report_data['total_salary']
-        })
+    # Use the stored totals; missing or stale ones are recomputed in a single grouped query
+    reports_with_data = [
+        {'report': report, 'total_salary': report.total_amount}
+        for report in BulkSalaryService.refresh_report_totals(reports)
+    ]
 
     return render(request, 'superuser/list_salary_reports.html', {
         'teacher': teacher,
@@ -813,16 +848,11 @@ def teacher_salary_reports(request):
     teacher = get_object_or_404(Teacher, user=request.user)
     reports = SalaryReport.objects.filter(teacher=teacher).order_by('-start_date')
 
-    # For each report, calculate the salary (reuse logic)
-    reports_with_data = []
-    for report in reports:
-        year = report.start_date.year
-        month = report.start_date.month
-        report_data = SalaryCalculationService.calculate_salary(report.teacher, year, month)
-        reports_with_data.append({
-            'report': report,
-            'total_salary': report_data['total_salary']
-        })
+    # Use the stored totals; missing or stale ones are recomputed in a single grouped query
+    reports_with_data = [
+        {'report': report, 'total_salary': report.total_amount}
+        for report in BulkSalaryService.refresh_report_totals(reports)
+    ]
 
     return render(request, 'teachers/teacher_salary_reports.html', {
         'reports': reports_with_data
@@ -833,7 +863,7 @@ def teacher_salary_reports(request):
 @user_passes_test(lambda u: u.is_superuser)
 def view_deactivated_students(request):
     """View all deactivated students"""
-    deactivated_students = Student.objects.filter(user__is_active=False)
+    deactivated_students = Student.objects.filter(user__is_active=False).select_related('user')
     context = {
         'deactivated_students': deactivated_students
     }
@@ -890,34 +920,3 @@ def change_inspector_password(request, inspector_id):
     return render(request, 'superuser/change_password.html', {'form': form, 'inspector': inspector})
 
 # Removed create_salary_report from this file because it belongs in salary_views.py
-
-@login_required
-@user_passes_test(lambda u: u.is_inspector_effective, login_url=None)
-def list_salary_reports(request, teacher_id=None):
-    if teacher_id:
-        teacher = get_object_or_404(Teacher, id=teacher_id)
-        reports = SalaryReport.objects.filter(
-            teacher=teacher,
-            is_deleted=False
-        ).order_by('-start_date')
-    else:
-        teacher = None
-        reports = SalaryReport.objects.filter(
-            is_deleted=False
-        ).order_by('-start_date')
-
-    # For each report, calculate the salary - FIXED: Use static method
-    reports_with_data = []
-    for report in reports:
-        year = report.start_date.year
-        month = report.start_date.month
-        report_data = SalaryCalculationService.calculate_salary(report.teacher, year, month)
-        reports_with_data.append({
-            'report': report,
-            'total_salary': report_data['total_salary']
-        })
-
-    return render(request, 'superuser/list_salary_reports.html', {
-        'teacher': teacher,
-        'reports': reports_with_data
-    })